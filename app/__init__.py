@@ -10,6 +10,14 @@ from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
+from db import init_db
+from app.auth.role_cache import role_cache
+from app.services.invoice_service import invoice_renderer
+from app.utils.invoice import invoice_numbers
+from app.services.import_job_service import import_jobs
+from app.services.image_service import image_processor
+from app.services.inventory_feed import inventory_feed
+from app.services.reservation_service import reservation_sweeper
 import os
 
 # Initialize extensions
@@ -30,6 +38,33 @@ def create_app():
 
     # Initialize database with Flask app
     db.init_app(app)
+
+    # Initialize the pooled sqlite3 connections used by the controllers
+    init_db(app)
+
+    # Size the admin role cache used by role_required
+    role_cache.configure(maxsize=app.config['ROLE_CACHE_SIZE'], ttl=app.config['ROLE_CACHE_TTL'])
+
+    # Size the process pool that renders invoices in the background
+    invoice_renderer.configure(max_workers=app.config['INVOICE_RENDER_WORKERS'])
+    invoice_numbers.configure(block_size=app.config['INVOICE_NUMBER_BLOCK_SIZE'])
+
+    # Threads that run queued CSV product imports
+    import_jobs.configure(max_workers=app.config['PRODUCT_IMPORT_WORKERS'])
+
+    # Processes that resize uploaded product images
+    image_processor.configure(max_workers=app.config['IMAGE_WORKERS'])
+
+    # Server-Sent Events feed of Inventory_Log changes
+    inventory_feed.configure(
+        poll_interval=app.config['INVENTORY_FEED_POLL_INTERVAL'],
+        queue_size=app.config['INVENTORY_FEED_QUEUE_SIZE']
+    )
+
+    # Releases checkout reservations that expired without being committed
+    reservation_sweeper.configure(interval=app.config['RESERVATION_SWEEP_INTERVAL'])
+    if app.config['RESERVATION_SWEEPER_ENABLED']:
+        reservation_sweeper.start(app)
     
     # Initialize migration for handling database migrations
     migrate.init_app(app, db)
@@ -1,7 +1,32 @@
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, g
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
 from db import get_db_connection
+from app.auth.role_cache import role_cache
+
+
+# Resolve an admin's role names: request scope first, then the process-wide
+# TTL cache, and only then the database
+def get_admin_role_names(admin_id):
+    request_roles = g.setdefault('admin_roles', {})
+    if admin_id in request_roles:
+        return request_roles[admin_id]
+
+    roles = role_cache.get(admin_id)
+    if roles is None:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT RoleName FROM Role
+            JOIN Admin_Role ON Role.RoleID = Admin_Role.RoleID
+            WHERE Admin_Role.AdminID = ?
+        """, (admin_id,))
+        roles = frozenset(row["RoleName"] for row in cursor.fetchall())
+        conn.close()
+        role_cache.set(admin_id, roles)
+
+    request_roles[admin_id] = roles
+    return roles
 
 # Decorator for routes that only super admins can access
 def super_admin_required(fn):
@@ -35,17 +60,8 @@ def role_required(required_roles):
             if identity.get("is_super_admin") == 1:
                 return fn(*args, **kwargs)  # Full access for super admins
 
-            # Fetch the admin's assigned roles from the database if not a super admin
-            admin_id = identity.get("user_id")
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT RoleName FROM Role
-                JOIN Admin_Role ON Role.RoleID = Admin_Role.RoleID
-                WHERE Admin_Role.AdminID = ?
-            """, (admin_id,))
-            roles = [row["RoleName"] for row in cursor.fetchall()]
-            conn.close()
+            # Fetch the admin's assigned roles (cached) if not a super admin
+            roles = get_admin_role_names(identity.get("user_id"))
 
             # Check if the admin has any of the required roles
             if any(role in roles for role in required_roles):
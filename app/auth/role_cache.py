@@ -0,0 +1,57 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class RoleCache:
+    """In-process LRU cache of admin role names with a time-to-live.
+
+    Entries expire after ``ttl`` seconds, which also bounds how stale another
+    worker process can be; within this process the admin routes invalidate
+    entries explicitly whenever an admin is added, updated or deleted.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize=None, ttl=None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            self._entries.clear()
+
+    def get(self, admin_id):
+        """Return the cached roles for an admin, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(admin_id)
+            if entry is None:
+                return None
+            expires_at, roles = entry
+            if expires_at <= time.monotonic():
+                del self._entries[admin_id]
+                return None
+            self._entries.move_to_end(admin_id)
+            return roles
+
+    def set(self, admin_id, roles):
+        with self._lock:
+            self._entries[admin_id] = (time.monotonic() + self.ttl, frozenset(roles))
+            self._entries.move_to_end(admin_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, admin_id=None):
+        """Drop one admin's roles, or every entry when no ID is given."""
+        with self._lock:
+            if admin_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(admin_id, None)
+
+
+role_cache = RoleCache()
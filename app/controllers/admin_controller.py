@@ -10,6 +10,7 @@ import re
 from werkzeug.security import generate_password_hash
 from flask import Blueprint, request, jsonify
 from app.auth.decorators import super_admin_required
+from app.auth.role_cache import role_cache
 from db import get_db_connection
 
 admin_bp = Blueprint('admin', __name__)
@@ -65,6 +66,7 @@ def add_admin():
             )
 
         conn.commit()
+        role_cache.invalidate(admin_id)
         return jsonify({"message": "Admin added and roles assigned successfully"}), 201
 
     except Exception as e:
@@ -89,6 +91,7 @@ def delete_admin(admin_id):
         # Delete the admin
         cursor.execute("DELETE FROM Administrator WHERE UserID = ?", (admin_id,))
         conn.commit()
+        role_cache.invalidate(admin_id)
         return jsonify({"message": "Admin deleted successfully"}), 200
 
     except Exception as e:
@@ -118,6 +121,7 @@ def update_admin(admin_id):
             (email or admin["Email"], role or admin["Role"], admin_id)
         )
         conn.commit()
+        role_cache.invalidate(admin_id)
         return jsonify({"message": "Admin updated successfully"}), 200
 
     except Exception as e:
@@ -1,6 +1,11 @@
-from flask import Blueprint, jsonify
+from datetime import datetime
+from flask import Blueprint, current_app, jsonify, request
 from db import get_db_connection
 from app.auth.decorators import role_required
+from app.utils.streaming import stream_json, stream_events, iter_rows
+from app.utils.forecasting import DEFAULT_HORIZON, FORECAST_MODELS, MAX_HORIZON
+from app.utils.replenishment import plan_replenishment
+from app.services.inventory_feed import inventory_feed
 from app.utils.inventory import (
     calculate_inventory_turnover,
     calculate_popular_products,
@@ -9,48 +14,127 @@ from app.utils.inventory import (
 from flask_cors import CORS
 
 inventory_bp = Blueprint('inventory', __name__)
-CORS(inventory_bp, resources={r"/inventory/*": {"origins": "http://localhost:3000"}})
-
-# Route to get real-time inventory levels across warehouses
+CORS(inventory_bp, resources={r"/inventory/*": {
+    "origins": "http://localhost:3000",
+    "expose_headers": ["X-Inventory-Cursor", "X-Inventory-Sync"]
+}})
+
+# Route to get real-time inventory levels across warehouses. With
+# ?since=<cursor> only products changed after that cursor are returned, and
+# products no longer stocked anywhere come back as null. The cursor for the
+# next call is sent in the X-Inventory-Cursor header; X-Inventory-Sync says
+# whether the body is a "full" snapshot or a "delta" to merge.
 @inventory_bp.route('/realtime-inventory', methods=['GET'])
 @role_required(["Inventory Manager", "Super Admin"])
 def get_realtime_inventory():
     """Fetch real-time stock levels for each product across all warehouses."""
+    since = request.args.get('since')
+    if since is not None:
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({"error": "since must be an integer cursor"}), 400
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    # Query to fetch product stock levels across warehouses along with category name
-    cursor.execute("""
-        SELECT p.ProductID, p.Name AS ProductName, pw.WarehouseID, pw.StockQuantity, c.Name AS CategoryName
-        FROM Product p
-        JOIN Product_Warehouse pw ON p.ProductID = pw.ProductID
-        LEFT JOIN Category c ON p.CategoryID = c.CategoryID
-    """)
-    inventory_data = cursor.fetchall()
-
-    # Organize data by product with warehouse-specific details
-    inventory_report = {}
-    for item in inventory_data:
-        product_id = item["ProductID"]
-        warehouse_id = item["WarehouseID"]
-        stock_quantity = item["StockQuantity"]
-
-        # Initialize the product entry if it doesn't exist
-        if product_id not in inventory_report:
-            inventory_report[product_id] = {
-                "product_name": item["ProductName"],
-                "category_name": item["CategoryName"],
-                "warehouses": []
-            }
-
-        # Add warehouse-specific stock details
-        inventory_report[product_id]["warehouses"].append({
-            "warehouse_id": warehouse_id,
-            "stock_quantity": stock_quantity
-        })
-
-    conn.close()
-    return jsonify(inventory_report), 200
+    # Read the cursor before the data: a change committed in between is sent
+    # again next time rather than missed
+    cursor.execute("SELECT COALESCE(MAX(Seq), 0) FROM Inventory_Change")
+    change_cursor = cursor.fetchone()[0]
+    if since is not None and since > change_cursor:
+        since = None  # Cursor from another database; start over
+
+    if since is None:
+        # Query to fetch product stock levels across warehouses along with category name
+        cursor.execute("""
+            SELECT p.ProductID, p.Name AS ProductName, p.StockQuantity AS TotalStock,
+                pw.WarehouseID, pw.StockQuantity, c.Name AS CategoryName
+            FROM Product p
+            JOIN Product_Warehouse pw ON p.ProductID = pw.ProductID
+            LEFT JOIN Category c ON p.CategoryID = c.CategoryID
+            ORDER BY p.ProductID
+        """)
+    else:
+        # Only products whose change number is past the client's cursor, in
+        # change order so the Seq index serves both the filter and the sort.
+        # Changed products all have distinct numbers, so each one's rows stay
+        # together
+        cursor.execute("""
+            SELECT ch.ProductID, p.Name AS ProductName, p.StockQuantity AS TotalStock,
+                pw.WarehouseID, pw.StockQuantity, c.Name AS CategoryName
+            FROM Inventory_Change ch
+            LEFT JOIN Product p ON p.ProductID = ch.ProductID
+            LEFT JOIN Product_Warehouse pw ON pw.ProductID = ch.ProductID
+            LEFT JOIN Category c ON p.CategoryID = c.CategoryID
+            WHERE ch.Seq > ?
+            ORDER BY ch.Seq
+        """, (since,))
+
+    # Organize data by product with warehouse-specific details. Rows arrive
+    # grouped by product, so each product is emitted as soon as it is complete
+    def inventory_report():
+        product_id, entry = None, None
+        for item in iter_rows(cursor):
+            if item["ProductID"] != product_id:
+                if product_id is not None:
+                    yield product_id, entry
+                product_id = item["ProductID"]
+                entry = None
+                # Products removed from every warehouse (or deleted) stay null
+                if item["WarehouseID"] is not None and item["ProductName"] is not None:
+                    entry = {
+                        "product_name": item["ProductName"],
+                        "category_name": item["CategoryName"],
+                        "total_stock": item["TotalStock"],
+                        "warehouses": []
+                    }
+
+            # Add warehouse-specific stock details
+            if entry is not None:
+                entry["warehouses"].append({
+                    "warehouse_id": item["WarehouseID"],
+                    "stock_quantity": item["StockQuantity"]
+                })
+        if product_id is not None:
+            yield product_id, entry
+
+    response = stream_json(inventory_report(), mapping=True)
+    response.headers['X-Inventory-Cursor'] = str(change_cursor)
+    response.headers['X-Inventory-Sync'] = 'full' if since is None else 'delta'
+    return response
+
+# Route for pushing stock changes and low-stock alerts as Server-Sent Events.
+# Each event's ID is its Inventory_Log LogID; a client that reconnects with
+# Last-Event-ID gets what it missed, or a "resync" event if that is no longer
+# buffered and it should reload /realtime-inventory.
+@inventory_bp.route('/events', methods=['GET'])
+@role_required(["Inventory Manager", "Super Admin"])
+def stream_inventory_events():
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be an integer"}), 400
+
+    subscription, replay = inventory_feed.subscribe(current_app._get_current_object(), last_event_id)
+    heartbeat = current_app.config['INVENTORY_FEED_HEARTBEAT']
+
+    def events():
+        try:
+            if replay is None:
+                yield "resync", {}, None
+            for event in replay or ():
+                yield event["event"], event["data"], event["id"]
+            while True:
+                if subscription.take_overflow():
+                    yield "resync", {}, None
+                event = subscription.get(timeout=heartbeat)
+                yield None if event is None else (event["event"], event["data"], event["id"])
+        finally:
+            inventory_feed.unsubscribe(subscription)
+
+    return stream_events(events())
 
 import logging
 
@@ -61,6 +145,13 @@ logging.basicConfig(level=logging.DEBUG)
 @inventory_bp.route('/inventory-report', methods=['GET'])
 @role_required(["Inventory Manager", "Super Admin"])
 def generate_inventory_report():
+    forecast_model = request.args.get('forecast_model', 'moving_average')
+    horizon = request.args.get('horizon', DEFAULT_HORIZON, type=int)
+    if forecast_model not in FORECAST_MODELS:
+        return jsonify({"error": f"forecast_model must be one of: {', '.join(FORECAST_MODELS)}"}), 400
+    if not 1 <= horizon <= MAX_HORIZON:
+        return jsonify({"error": f"horizon must be between 1 and {MAX_HORIZON} months"}), 400
+
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -72,7 +163,7 @@ def generate_inventory_report():
         popular_products_report = calculate_popular_products(cursor)
 
         # 3. Demand Prediction
-        demand_prediction_report = predict_future_demand(cursor)
+        demand_prediction_report = predict_future_demand(cursor, model=forecast_model, horizon=horizon)
 
         return jsonify({
             "inventory_turnover": turnover_report,
@@ -87,3 +178,64 @@ def generate_inventory_report():
 
     finally:
         conn.close()
+
+
+# Route for inventory turnover over a date range, by month or week, optionally
+# broken down by category or warehouse
+@inventory_bp.route('/inventory-turnover', methods=['GET'])
+@role_required(["Inventory Manager", "Super Admin"])
+def get_inventory_turnover():
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    granularity = request.args.get('granularity', 'month')
+    breakdown = request.args.get('breakdown') or None
+
+    try:
+        dates = [datetime.strptime(date, '%Y-%m-%d') for date in (start_date, end_date) if date]
+    except ValueError:
+        return jsonify({"error": "Dates must use the YYYY-MM-DD format"}), 400
+    if start_date and end_date and dates[0] > dates[1]:
+        return jsonify({"error": "start_date must not be after end_date"}), 400
+    if granularity not in ('month', 'week'):
+        return jsonify({"error": "Granularity must be 'month' or 'week'"}), 400
+    if breakdown not in (None, 'category', 'warehouse'):
+        return jsonify({"error": "Breakdown must be 'category' or 'warehouse'"}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        turnover_report = calculate_inventory_turnover(
+            cursor, start_date=start_date, end_date=end_date, granularity=granularity, breakdown=breakdown
+        )
+        return jsonify({"inventory_turnover": turnover_report}), 200
+    except Exception:
+        logging.exception("Error calculating inventory turnover")
+        return jsonify({"error": "Failed to calculate inventory turnover"}), 500
+    finally:
+        conn.close()
+
+
+# Route for the replenishment plan: reorder points and suggested order
+# quantities per product and warehouse, by default only for stock to reorder
+@inventory_bp.route('/replenishment-plan', methods=['GET'])
+@role_required(["Inventory Manager", "Super Admin"])
+def get_replenishment_plan():
+    forecast_model = request.args.get('forecast_model', 'moving_average')
+    warehouse_id = request.args.get('warehouse_id', type=int)
+    include_all = request.args.get('all', 'false').lower() == 'true'
+    if forecast_model not in FORECAST_MODELS:
+        return jsonify({"error": f"forecast_model must be one of: {', '.join(FORECAST_MODELS)}"}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    plan = plan_replenishment(
+        cursor,
+        model=forecast_model,
+        lead_time_days=current_app.config['REPLENISHMENT_LEAD_TIME_DAYS'],
+        review_days=current_app.config['REPLENISHMENT_REVIEW_DAYS'],
+        service_level=current_app.config['REPLENISHMENT_SERVICE_LEVEL'],
+        warehouse_id=warehouse_id
+    )
+    if not include_all:
+        plan = (entry for entry in plan if entry["needs_reorder"])
+    return stream_json(plan, key="replenishment_plan")
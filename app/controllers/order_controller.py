@@ -1,11 +1,46 @@
-from flask import Blueprint, current_app, request, jsonify, send_file
-from db import get_db_connection
+import os
+import threading
+import uuid
+from flask import Blueprint, Response, current_app, request, jsonify, send_file, stream_with_context, url_for
+from db import get_db_connection, begin_write
 from app.auth.decorators import role_required
 from datetime import datetime
-from app.utils.inventory import check_and_alert_low_stock
-from app.utils.invoice import generate_invoice
+from app.utils.inventory import evaluate_low_stock
+from app.utils.streaming import stream_json, iter_rows, iter_zip
+from app.utils.validators import is_valid_id
+from app.utils.invoice import fetch_invoices_data, invoices_directory
+from app.services.order_service import place_order, return_stock, take_stock, OrderError
+from app.services.reservation_service import (
+    reserve_stock, commit_reservation, release_reservation
+)
+from app.services.invoice_service import request_invoice, invoice_renderer, order_ids_in_range
+from app.services.inventory_feed import inventory_feed
 order_bp = Blueprint('orders', __name__)
-import os
+
+# Low-stock alerts for the products of an order that is already committed;
+# a failure here is logged rather than failing the order
+def alert_low_stock(conn, product_ids):
+    try:
+        evaluate_low_stock(
+            conn, product_ids,
+            threshold=current_app.config['LOW_STOCK_THRESHOLD'],
+            cooldown=current_app.config['LOW_STOCK_ALERT_COOLDOWN']
+        )
+    except Exception as e:
+        current_app.logger.error(f"Low-stock check failed for products {list(product_ids)}: {e}")
+
+# Optional delivery point of an order: {"latitude": 40.7, "longitude": -74.0}
+def parse_ship_to(ship_to):
+    """Return ((latitude, longitude) or None, error message or None)."""
+    if ship_to is None:
+        return None, None
+    try:
+        ship_to = (float(ship_to["latitude"]), float(ship_to["longitude"]))
+    except (KeyError, TypeError, ValueError):
+        return None, "ship_to needs a numeric latitude and longitude"
+    if not (-90 <= ship_to[0] <= 90 and -180 <= ship_to[1] <= 180):
+        return None, "ship_to coordinates are out of range"
+    return ship_to, None
 
 # Route to create a new order
 @order_bp.route('/create', methods=['POST'])
@@ -17,78 +52,85 @@ def create_order():
     # Validate request data
     if not user_id or not products:
         return jsonify({"error": "User ID and product list are required"}), 400
+    ship_to, error = parse_ship_to(data.get("ship_to"))
+    if error:
+        return jsonify({"error": error}), 400
 
     conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # Verify if user exists
-    cursor.execute("SELECT * FROM User WHERE UserID = ?", (user_id,))
-    user = cursor.fetchone()
-    if not user:
+    try:
+        # Validate, price, allocate to warehouses and record the whole order
+        # in one transaction
+        order_id, lines = place_order(
+            conn, user_id, products,
+            strategy=current_app.config['ORDER_ALLOCATION_STRATEGY'], ship_to=ship_to
+        )
+    except OrderError as e:
         conn.close()
-        return jsonify({"error": "Invalid user ID"}), 400
+        return jsonify({"error": str(e)}), e.status_code
 
-    # Calculate total order amount and update stock
-    total_amount = 0
-    order_date = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
-    for item in products:
-        product_id = item["product_id"]
-        quantity = item["quantity"]
+    # Low-stock checks run after the order is committed, in one batch
+    alert_low_stock(conn, lines)
+    conn.close()
+    inventory_feed.notify()
 
-        # Validate quantity is a positive integer
-        if quantity <= 0:
-            conn.close()
-            return jsonify({"error": "Quantity must be a positive integer"}), 400
+    return jsonify({"message": "Order created successfully", "order_id": order_id}), 201
 
-        # Check if product exists and has sufficient stock
-        cursor.execute("SELECT Price, StockQuantity FROM Product WHERE ProductID = ?", (product_id,))
-        product = cursor.fetchone()
-        if not product:
-            conn.close()
-            return jsonify({"error": f"Product with ID {product_id} does not exist"}), 404
-        if product["StockQuantity"] < quantity:
-            conn.close()
-            return jsonify({"error": f"Insufficient stock for product ID {product_id}"}), 400
+# Route to hold stock during checkout. The hold lasts RESERVATION_TTL_SECONDS;
+# commit it to place the order or delete it to give the stock back
+@order_bp.route('/reservations', methods=['POST'])
+def create_reservation():
+    data = request.get_json()
+    user_id = data.get("user_id")
+    products = data.get("products")  # Same format as /create
 
-        # Calculate order total
-        total_amount += product["Price"] * quantity
+    if not user_id or not products:
+        return jsonify({"error": "User ID and product list are required"}), 400
+    ship_to, error = parse_ship_to(data.get("ship_to"))
+    if error:
+        return jsonify({"error": error}), 400
 
-        # Deduct stock quantity
-        cursor.execute(
-            "UPDATE Product SET StockQuantity = StockQuantity - ? WHERE ProductID = ?",
-            (quantity, product_id)
-        )
-        check_and_alert_low_stock(item["product_id"])
-
-        # Log the stock change in Inventory_Log
-        cursor.execute(
-            """
-            INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp)
-            VALUES (?, ?, ?, ?)
-            """,
-            (product_id, -quantity, 'Order Created', order_date)
+    conn = get_db_connection()
+    try:
+        reservation_id, expires_at = reserve_stock(
+            conn, user_id, products, current_app.config['RESERVATION_TTL_SECONDS'],
+            strategy=current_app.config['ORDER_ALLOCATION_STRATEGY'], ship_to=ship_to
         )
+    except OrderError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    finally:
+        conn.close()
 
-    # Insert order into the Order table
-    cursor.execute(
-        "INSERT INTO 'Order' (OrderDate, OrderStatus, TotalAmount, UserID) VALUES (?, 'Pending', ?, ?)",
-        (order_date, total_amount, user_id)
-    )
-    order_id = cursor.lastrowid
+    return jsonify({"reservation_id": reservation_id, "expires_at": expires_at}), 201
 
-    # Insert each product into the Order_Product table
-    for item in products:
-        cursor.execute(
-            "INSERT INTO Order_Product (OrderID, ProductID, Quantity) VALUES (?, ?, ?)",
-            (order_id, item["product_id"], item["quantity"])
-        )
+# Route to turn a reservation into an order
+@order_bp.route('/reservations/<reservation_id>/commit', methods=['POST'])
+def commit_order_reservation(reservation_id):
+    conn = get_db_connection()
+    try:
+        order_id, lines = commit_reservation(conn, reservation_id)
+    except OrderError as e:
+        conn.close()
+        return jsonify({"error": str(e)}), e.status_code
 
-    # Commit the transaction and close connection
-    conn.commit()
+    alert_low_stock(conn, lines)
     conn.close()
+    inventory_feed.notify()
 
     return jsonify({"message": "Order created successfully", "order_id": order_id}), 201
 
+# Route to cancel a reservation and give its stock back
+@order_bp.route('/reservations/<reservation_id>', methods=['DELETE'])
+def delete_reservation(reservation_id):
+    conn = get_db_connection()
+    try:
+        release_reservation(conn, reservation_id)
+    except OrderError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    finally:
+        conn.close()
+
+    return jsonify({"message": "Reservation released"}), 200
+
 # Route to view all orders
 @order_bp.route('/all', methods=['GET'])
 @role_required(["Order Manager", "Super Admin"])
@@ -96,9 +138,9 @@ def get_all_orders():
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM 'Order'")
-    orders = cursor.fetchall()
-    conn.close()
-    return jsonify([dict(order) for order in orders]), 200
+    # Rows are streamed in batches; the connection goes back to the pool
+    # once the whole response has been sent
+    return stream_json(dict(order) for order in iter_rows(cursor))
 
 # Route to view a specific order by ID
 @order_bp.route('/<int:order_id>', methods=['GET'])
@@ -170,22 +212,120 @@ def update_order_status(order_id):
 @role_required(["Order Manager", "Super Admin"])
 def get_invoice(order_id):
     try:
-        current_app.logger.info(f"Received request to generate invoice for Order ID: {order_id}")
-        print(os.path.exists("./invoices/invoice_1.pdf"))  # Should print True
+        current_app.logger.info(f"Received invoice request for Order ID: {order_id}")
 
-        # Attempt to generate the invoice
-        invoice_path = generate_invoice(order_id)
-        
-        if not invoice_path:
-            current_app.logger.error(f"No invoice generated for Order ID: {order_id}. Verify order existence.")
+        # Serve the cached PDF if the order is unchanged, otherwise render it
+        # in the background and let the client poll the job
+        result = request_invoice(order_id)
+        if not result:
+            current_app.logger.error(f"No invoice for Order ID: {order_id}. Verify order existence.")
             return jsonify({"error": "Invoice generation failed or order not found"}), 404
-        
-        current_app.logger.info(f"Invoice successfully generated for Order ID: {order_id}")
-        return send_file(invoice_path, as_attachment=True)
+
+        if result["status"] == "done":
+            return send_file(result["invoice_path"], as_attachment=True, download_name=f"invoice_{order_id}.pdf")
+
+        job = invoice_renderer.describe(result)
+        job["status_url"] = url_for("orders.get_invoice_job", job_id=job["job_id"])
+        return jsonify(job), 202
     except Exception as e:
         current_app.logger.error(f"Error generating invoice for Order ID {order_id}: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+# Route to check on a background invoice render
+@order_bp.route('/invoice-jobs/<job_id>', methods=['GET'])
+@role_required(["Order Manager", "Super Admin"])
+def get_invoice_job(job_id):
+    job = invoice_renderer.get(job_id)
+    if not job:
+        return jsonify({"error": "Invoice job not found"}), 404
+
+    job_status = invoice_renderer.describe(job)
+    if job.get("archive_path"):
+        job_status["download_url"] = url_for("orders.download_invoice_batch", job_id=job_id)
+    elif job_status["status"] == "done" and "order_id" in job:
+        job_status["download_url"] = url_for("orders.get_invoice", order_id=job["order_id"])
+    return jsonify(job_status), 200
+
+# Route to render invoices for many orders at once
+@order_bp.route('/invoices/batch', methods=['POST'])
+@role_required(["Order Manager", "Super Admin"])
+def create_invoice_batch():
+    data = request.get_json(silent=True) or {}
+    order_ids = data.get("order_ids")
+    start_date = data.get("start_date")
+    end_date = data.get("end_date")
+    status = data.get("status")
+    output = data.get("output", "zip")
+
+    if output not in ("zip", "disk"):
+        return jsonify({"error": "Output must be 'zip' or 'disk'"}), 400
+    if status is not None and status not in ['Pending', 'Processing', 'Shipped', 'Delivered']:
+        return jsonify({"error": "Invalid status"}), 400
+    if order_ids is not None:
+        if not isinstance(order_ids, list) or not all(is_valid_id(order_id) for order_id in order_ids):
+            return jsonify({"error": "order_ids must be a list of positive integers"}), 400
+    elif start_date and end_date:
+        try:
+            if datetime.strptime(start_date, '%Y-%m-%d') > datetime.strptime(end_date, '%Y-%m-%d'):
+                return jsonify({"error": "start_date must not be after end_date"}), 400
+        except (TypeError, ValueError):
+            return jsonify({"error": "Dates must use the YYYY-MM-DD format"}), 400
+    else:
+        return jsonify({"error": "Provide order_ids or a start_date and end_date"}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    if order_ids is None:
+        order_ids = order_ids_in_range(cursor, start_date, end_date, status)
+
+    max_orders = current_app.config['INVOICE_BATCH_MAX_ORDERS']
+    if len(order_ids) > max_orders:
+        return jsonify({"error": f"A batch can cover at most {max_orders} orders"}), 400
+
+    invoices = fetch_invoices_data(cursor, order_ids)
+    if not invoices:
+        return jsonify({"error": "No matching orders found"}), 404
+
+    archive_path = None
+    if output == "disk":
+        archive_path = os.path.join(invoices_directory(), 'batches', f"invoices_{uuid.uuid4().hex}.zip")
+    job = invoice_renderer.submit_batch(invoices, archive_path)
+    manifest = {"missing": [order_id for order_id in dict.fromkeys(order_ids) if order_id not in invoices]}
+    current_app.logger.info(f"Invoice batch {job['job_id']} started for {len(invoices)} orders")
+
+    if output == "disk":
+        # Render in the background and let the client poll for the archive
+        threading.Thread(
+            target=invoice_renderer.write_batch_archive,
+            args=(current_app._get_current_object(), job, manifest),
+            daemon=True
+        ).start()
+        job_status = invoice_renderer.describe(job)
+        job_status["status_url"] = url_for("orders.get_invoice_job", job_id=job["job_id"])
+        return jsonify(job_status), 202
+
+    # Stream the archive while the PDFs are rendered; progress is available
+    # from the job status route named in the X-Invoice-Job header
+    return Response(
+        stream_with_context(iter_zip(invoice_renderer.iter_batch_entries(job, manifest))),
+        mimetype='application/zip',
+        headers={
+            "Content-Disposition": f"attachment; filename=invoices_{job['job_id']}.zip",
+            "X-Invoice-Job": job["job_id"],
+        }
+    )
+
+# Route to download the archive of a batch that was written to disk
+@order_bp.route('/invoices/batch/<job_id>/archive', methods=['GET'])
+@role_required(["Order Manager", "Super Admin"])
+def download_invoice_batch(job_id):
+    job = invoice_renderer.get(job_id)
+    if not job or "total" not in job:
+        return jsonify({"error": "Invoice job not found"}), 404
+    if not job.get("archive_path"):
+        return jsonify(invoice_renderer.describe(job)), 202
+    return send_file(job["archive_path"], as_attachment=True, download_name=f"invoices_{job_id}.zip")
+
 # Route to create a return request
 @order_bp.route('/<int:order_id>/create-return', methods=['POST'])
 def create_return(order_id):
@@ -220,9 +360,7 @@ def get_all_returns():
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM 'Return'")
-    returns = cursor.fetchall()
-    conn.close()
-    return jsonify([dict(return_request) for return_request in returns]), 200
+    return stream_json(dict(return_request) for return_request in iter_rows(cursor))
 
 
 # Route to update the status of a return request and log inventory changes if applicable
@@ -265,41 +403,30 @@ def approve_return(return_id):
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    # Update the return status
-    cursor.execute("UPDATE Return SET ReturnStatus = ? WHERE ReturnID = ?", (new_status, return_id))
-    conn.commit()
-
-    # If the return is approved, log the change in Inventory_Log and update stock
-    if new_status == 'Approved':
-        # Fetch the associated order and product details
-        cursor.execute("""
-            SELECT Order_Product.ProductID, Order_Product.Quantity 
-            FROM Order_Product
-            JOIN Return ON Order_Product.OrderID = Return.OrderID
-            WHERE Return.ReturnID = ?
-        """, (return_id,))
-        returned_items = cursor.fetchall()
-
-        # Update inventory and log changes for each returned product
-        for item in returned_items:
-            product_id = item['ProductID']
-            quantity = item['Quantity']
-
-            # Update product stock quantity
-            cursor.execute(
-                "UPDATE Product SET StockQuantity = StockQuantity + ? WHERE ProductID = ?",
-                (quantity, product_id)
-            )
+    # Update the return status and, if it is approved, put the returned
+    # units back in stock (warehouse and product total) in the same transaction
+    begin_write(conn)
+    try:
+        cursor.execute("UPDATE Return SET ReturnStatus = ? WHERE ReturnID = ?", (new_status, return_id))
 
-            # Log the inventory change
+        if new_status == 'Approved':
+            # Fetch the associated order and product details
             cursor.execute("""
-                INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp)
-                VALUES (?, ?, 'Return', ?)
-            """, (product_id, quantity, datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')))
+                SELECT Order_Product.ProductID, Order_Product.Quantity 
+                FROM Order_Product
+                JOIN Return ON Order_Product.OrderID = Return.OrderID
+                WHERE Return.ReturnID = ?
+            """, (return_id,))
+            returned_items = {item['ProductID']: item['Quantity'] for item in cursor.fetchall()}
+            if returned_items:
+                return_stock(cursor, returned_items, 'Return', datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
 
         conn.commit()
+    finally:
+        conn.close()
 
-    conn.close()
+    if new_status == 'Approved':
+        inventory_feed.notify()
 
     return jsonify({"message": f"Return {return_id} status updated to {new_status}"}), 200
 
@@ -339,6 +466,8 @@ def offer_replacement(return_id):
     cursor = conn.cursor()
     
     try:
+        begin_write(conn)
+
         # Fetch the return request
         current_app.logger.info(f"Fetching return request with ReturnID: {return_id}")
         cursor.execute("SELECT * FROM 'Return' WHERE ReturnID = ?", (return_id,))
@@ -397,17 +526,13 @@ def offer_replacement(return_id):
                 """, (new_order_id, item['ProductID'], item['Quantity']))
                 current_app.logger.info(f"Added ProductID: {item['ProductID']} to Replacement OrderID: {new_order_id}.")
 
-        # Update inventory (deduct stock)
-        for item in order_products:
-            cursor.execute("""
-                UPDATE Product SET StockQuantity = StockQuantity - ? WHERE ProductID = ?
-            """, (item['Quantity'], item['ProductID']))
-            
-            # Log inventory change
-            cursor.execute("""
-                INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp)
-                VALUES (?, ?, 'Replacement Order', ?)
-            """, (item['ProductID'], -item['Quantity'], datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')))
+        # Ship the replacement from the warehouses like an order, deducting
+        # their stock and the product totals together
+        if order_products:
+            take_stock(
+                cursor, {item['ProductID']: item['Quantity'] for item in order_products}, 'Replacement Order',
+                order_date, strategy=current_app.config['ORDER_ALLOCATION_STRATEGY']
+            )
 
         # Update the return request to indicate a replacement has been offered
         cursor.execute("""
@@ -415,9 +540,13 @@ def offer_replacement(return_id):
         """, (return_id,))
 
         conn.commit()
+        inventory_feed.notify()
         current_app.logger.info(f"Replacement order {new_order_id} created successfully")
         return jsonify({"message": f"Replacement order {new_order_id} created successfully"}), 201
 
+    except OrderError as e:
+        conn.rollback()
+        return jsonify({"error": str(e)}), e.status_code
     
     except Exception as e:
         current_app.logger.error(f"Error in offer_replacement endpoint: {e}")
@@ -457,9 +586,7 @@ def get_all_refunds():
         FROM "Return" r
         LEFT JOIN Payment p ON r.OrderID = p.OrderID
     """)
-    refunds = cursor.fetchall()
-    conn.close()
-    return jsonify([dict(refund) for refund in refunds]), 200
+    return stream_json(dict(refund) for refund in iter_rows(cursor))
 # Route to process a refund manually
 @order_bp.route('/refunds/<int:return_id>/process', methods=['POST'])
 @role_required(["Order Manager", "Super Admin"])
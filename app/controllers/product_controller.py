@@ -1,14 +1,24 @@
 # app/controllers/product_controller.py
-from flask import Blueprint, request, jsonify, current_app
-from db import get_db_connection
+from flask import Blueprint, request, jsonify, current_app, url_for
+from db import get_db_connection, begin_write
 import logging
+import os
 from app.auth.decorators import role_required
-from app.utils.file_upload import save_image_path_to_database, save_image_to_server, allowed_file
+from app.utils.file_upload import (
+    save_image_path_to_database, save_image_to_server, allowed_file, release_product_images,
+    remove_unreferenced_images, stored_image_hash, IMAGE_STORE
+)
 from werkzeug.utils import secure_filename
 import csv
 from flask import send_from_directory
 
-from io import StringIO
+from app.utils.pagination import parse_page_size, encode_cursor, decode_cursor, MAX_PAGE_SIZE
+from app.services.product_service import load_product_details, load_products_details
+from app.services.import_job_service import import_jobs, get_import_job
+from app.services.image_service import image_processor
+from app.utils.image_processing import IMAGE_VARIANTS, IMAGE_FORMATS, variant_path
+from app.utils.streaming import stream_json, iter_rows
+from app.utils.static_files import send_upload
 from app.utils.validators import (
     is_valid_string, is_valid_price, is_valid_quantity, is_valid_id,
     sanitize_string, validate_warehouse_stock
@@ -113,6 +123,7 @@ def update_product(product_id):
     material = sanitize_string(data.get('material'))
     stock_quantity = data.get('stock_quantity')  # For overall stock
     featured = data.get('featured')
+    low_stock_threshold = data.get('low_stock_threshold')  # Per-product low-stock alert level
     warehouse_updates = data.get('warehouse_updates', [])  # [{"warehouse_id": 1, "quantity": 50}]
 
     # Validate optional fields
@@ -124,6 +135,8 @@ def update_product(product_id):
         return jsonify({"error": "Stock quantity must be a non-negative integer"}), 400
     if featured is not None and not isinstance(featured, int):
         return jsonify({"error": "Featured must be an integer (0 or 1)"}), 400
+    if low_stock_threshold is not None and not is_valid_quantity(low_stock_threshold):
+        return jsonify({"error": "Low stock threshold must be a non-negative integer"}), 400
 
     # Validate and sanitize warehouse updates
     try:
@@ -144,9 +157,10 @@ def update_product(product_id):
                 Color = COALESCE(?, Color),
                 Material = COALESCE(?, Material),
                 StockQuantity = COALESCE(?, StockQuantity),
-                Featured = COALESCE(?, Featured)
+                Featured = COALESCE(?, Featured),
+                LowStockThreshold = COALESCE(?, LowStockThreshold)
             WHERE ProductID = ?
-        """, (name, description, price, size, color, material, stock_quantity, featured, product_id))
+        """, (name, description, price, size, color, material, stock_quantity, featured, low_stock_threshold, product_id))
 
         # Update stock in specified warehouses
         for update in sanitized_warehouse_updates:
@@ -171,13 +185,22 @@ def delete_product(product_id):
     cursor = conn.cursor()
     try:
         # Execute the delete command
+        begin_write(conn)
         cursor.execute("DELETE FROM Product WHERE ProductID = ?", (product_id,))
-        conn.commit()
 
         # Check if the deletion affected any rows (i.e., if the product existed)
         if cursor.rowcount == 0:
             return jsonify({"error": "Product not found"}), 404
 
+        # Drop the product's image references, then the files nobody uses
+        # anymore once the delete is committed
+        released = release_product_images(cursor, product_id)
+        conn.commit()
+        try:
+            remove_unreferenced_images(conn, released)
+        except Exception as e:
+            current_app.logger.error(f"Could not remove images of deleted product {product_id}: {e}")
+
         return jsonify({"message": "Product deleted successfully"}), 200
 
     except Exception as e:
@@ -187,47 +210,180 @@ def delete_product(product_id):
 
 
 
+# Sort keys accepted by /product/all, mapped to their Product columns
+PRODUCT_SORT_COLUMNS = {
+    "product_id": "ProductID",
+    "name": "Name",
+    "price": "Price",
+    "stock": "StockQuantity",
+}
+
+
+def _product_to_dict(product):
+    return {
+        "product_id": product["ProductID"],
+        "name": product["Name"],
+        "description": product["Description"],
+        "price": product["Price"],
+        "size": product["Size"],
+        "color": product["Color"],
+        "material": product["Material"],
+        "stock_quantity": product["StockQuantity"],
+        "category_id": product["CategoryID"],
+        "sub_category_id": product["SubCategoryID"],
+        "featured": bool(product["Featured"]),
+    }
+
+
+def _parse_product_filters(args):
+    """Build the WHERE conditions for the /product/all query string filters."""
+    conditions, params = [], []
+
+    for arg, column in (("category_id", "CategoryID"), ("subcategory_id", "SubCategoryID")):
+        if args.get(arg):
+            value = args.get(arg, type=int)
+            if not is_valid_id(value):
+                raise ValueError(f"Invalid {arg}")
+            conditions.append(f"{column} = ?")
+            params.append(value)
+
+    featured = args.get("featured")
+    if featured:
+        if featured.lower() not in ("0", "1", "true", "false"):
+            raise ValueError("Featured must be 0, 1, true or false")
+        conditions.append("Featured = ?")
+        params.append(1 if featured.lower() in ("1", "true") else 0)
+
+    for arg, operator in (("min_price", ">="), ("max_price", "<=")):
+        if args.get(arg):
+            value = args.get(arg, type=float)
+            if value is None or not is_valid_price(value):
+                raise ValueError(f"Invalid {arg}")
+            conditions.append(f"Price {operator} ?")
+            params.append(value)
+
+    if args.get("stock_below"):
+        value = args.get("stock_below", type=int)
+        if value is None or not is_valid_quantity(value):
+            raise ValueError("Invalid stock_below")
+        conditions.append("StockQuantity < ?")
+        params.append(value)
+
+    return conditions, params
+
+
 @product_bp.route('/all', methods=['GET'])
 @role_required(["Product Manager", "Super Admin"])  # Restrict access to admins
 def list_products():
+    """List products one page at a time.
+
+    Query parameters: limit, cursor (next_cursor from the previous page),
+    sort (product_id, name, price, stock), order (asc, desc) and the filters
+    category_id, subcategory_id, featured, min_price, max_price, stock_below.
+    Pages are keyset-based on (sort column, ProductID), so every page costs
+    the same no matter how deep into the catalog it is.
+    """
+    sort = request.args.get("sort", "product_id")
+    order = request.args.get("order", "asc").lower()
+    if sort not in PRODUCT_SORT_COLUMNS:
+        return jsonify({"error": f"Sort must be one of {', '.join(PRODUCT_SORT_COLUMNS)}"}), 400
+    if order not in ("asc", "desc"):
+        return jsonify({"error": "Order must be asc or desc"}), 400
+
+    try:
+        limit = parse_page_size(request.args.get("limit"))
+        conditions, params = _parse_product_filters(request.args)
+
+        cursor_token = request.args.get("cursor")
+        if cursor_token:
+            cursor_values = decode_cursor(cursor_token)
+            if len(cursor_values) != 4 or cursor_values[:2] != [sort, order]:
+                raise ValueError("Cursor does not match the requested sort order")
+            last_value, last_id = cursor_values[2:]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    sort_column = PRODUCT_SORT_COLUMNS[sort]
+    comparison = ">" if order == "asc" else "<"
+    if cursor_token:
+        if sort_column == "ProductID":
+            conditions.append(f"ProductID {comparison} ?")
+            params.append(last_id)
+        else:
+            conditions.append(f"({sort_column}, ProductID) {comparison} (?, ?)")
+            params.extend([last_value, last_id])
+
+    where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order_clause = f"{sort_column} {order.upper()}"
+    if sort_column != "ProductID":
+        order_clause += f", ProductID {order.upper()}"
+
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        # Fetch all products
-        cursor.execute("""
+        # Fetch one extra row to know whether another page follows
+        cursor.execute(f"""
             SELECT ProductID, Name, Description, Price, Size, Color, Material, StockQuantity, CategoryID, SubCategoryID, Featured
             FROM Product
-        """)
-        products = cursor.fetchall()
-
-        # Format the data as a list of dictionaries
-        product_list = [
-            {
-                "product_id": product["ProductID"],
-                "name": product["Name"],
-                "description": product["Description"],
-                "price": product["Price"],
-                "size": product["Size"],
-                "color": product["Color"],
-                "material": product["Material"],
-                "stock_quantity": product["StockQuantity"],
-                "category_id": product["CategoryID"],
-                "sub_category_id": product["SubCategoryID"],
-                "featured": bool(product["Featured"]),
-            }
-            for product in products
-        ]
-
-        return jsonify({"products": product_list}), 200
-
+            {where_clause}
+            ORDER BY {order_clause}
+            LIMIT ?
+        """, (*params, limit + 1))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
+
+    page = {"next_cursor": None}
+
+    def page_items():
+        last = None
+        for index, product in enumerate(iter_rows(cursor)):
+            if index == limit:
+                page["next_cursor"] = encode_cursor([sort, order, last[sort_column], last["ProductID"]])
+                break
+            last = product
+            yield _product_to_dict(product)
+
+    return stream_json(
+        page_items(),
+        key="products",
+        trailer=lambda: {"next_cursor": page["next_cursor"], "limit": limit}
+    )
 
 @product_bp.route('/uploads/<path:filename>')
 def serve_uploads(filename):
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    # ?variant=thumbnail|card|full serves a resized copy; the format comes from
+    # ?format= or the Accept header, and the original is served until the
+    # variant has been rendered
+    variant = request.args.get('variant')
+    if not variant:
+        return _send_upload(filename)
+    if variant not in IMAGE_VARIANTS:
+        return jsonify({"error": f"variant must be one of {', '.join(IMAGE_VARIANTS)}"}), 400
+
+    image_format = request.args.get('format')
+    if image_format is None:
+        image_format = 'webp' if request.accept_mimetypes['image/webp'] else 'jpeg'
+    elif image_format not in IMAGE_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(IMAGE_FORMATS)}"}), 400
+
+    resized = variant_path(filename, variant, image_format)
+    if os.path.isfile(os.path.join(current_app.config['UPLOAD_FOLDER'], resized)):
+        response = _send_upload(resized)
+    else:
+        # Not rendered yet: the original, but without long-term caching
+        response = send_upload(filename, content_hash=stored_image_hash(filename))
+    response.vary.add('Accept')
+    return response
+
+
+def _send_upload(path):
+    # Content-addressed files and their variants never change, so clients may
+    # keep them forever; anything else is revalidated against its ETag
+    return send_upload(
+        path,
+        content_hash=stored_image_hash(path),
+        immutable=path.startswith(IMAGE_STORE + '/')
+    )
 
 
 @product_bp.route('/<int:product_id>/upload-image', methods=['POST'])
@@ -244,10 +400,23 @@ def upload_product_image(product_id):
     if file_path:
         # Step 2: Save the file path in the database
         try:
-            save_image_path_to_database(product_id, file_path)
-            return jsonify({"message": "Image uploaded and path saved successfully", "image_url": file_path}), 201
+            image_id = save_image_path_to_database(product_id, file_path)
         except Exception as e:
             return jsonify({"error": f"Database error: {str(e)}"}), 500
+
+        # Step 3: Render the resized variants in the background, unless the
+        # same image was uploaded before
+        try:
+            image_processor.process(current_app._get_current_object(), image_id, file_path)
+        except Exception as e:
+            current_app.logger.error(f"Could not queue variants for {file_path}: {e}")
+
+        return jsonify({
+            "message": "Image uploaded and path saved successfully",
+            "image_id": image_id,
+            "image_url": file_path,
+            "variants": list(IMAGE_VARIANTS)
+        }), 201
     else:
         return jsonify({"error": "Invalid file type"}), 400
     
@@ -267,67 +436,33 @@ def bulk_upload_products():
         return jsonify({"error": "Invalid file type, only CSV files are allowed"}), 400
 
     try:
-        # Attempt to decode and read the CSV file
-        print("Decoding and reading CSV file")
-        stream = StringIO(file.stream.read().decode("UTF8"), newline=None)
-        csv_reader = csv.DictReader(stream)
-        
-        # Initialize database connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Iterate over rows in the CSV
-        for row in csv_reader:
-            print(f"Processing row: {row}")  # Debugging: Print each row
-            if 'Name' in row and 'Price' in row and 'StockQuantity' in row:
-                try:
-                    # Insert product details
-                    cursor.execute("""
-                        INSERT INTO Product 
-                        (Name, Description, Price, Size, Color, Material, StockQuantity, CategoryID, SubCategoryID)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        row['Name'],
-                        row.get('Description', ''),
-                        float(row['Price']),
-                        row.get('Size', ''),
-                        row.get('Color', ''),
-                        row.get('Material', ''),
-                        int(row['StockQuantity']),
-                        int(row.get('CategoryID', 0)),
-                        int(row.get('SubCategoryID', 0))
-                    ))
-                    product_id = cursor.lastrowid
-                    print(f"Inserted Product ID: {product_id}")  # Debugging: Print inserted Product ID
-
-                    # Process warehouse stock if available
-                    warehouse_stock = row.get('WarehouseStock', '')
-                    for stock_entry in warehouse_stock.split(';'):
-                        if stock_entry.strip():  # Ensure non-empty entries
-                            try:
-                                warehouse_id, quantity = map(int, stock_entry.split(':'))
-                                cursor.execute("""
-                                    INSERT INTO Product_Warehouse (ProductID, WarehouseID, StockQuantity)
-                                    VALUES (?, ?, ?)
-                                """, (product_id, warehouse_id, quantity))
-                                print(f"Inserted Warehouse stock for Product ID {product_id} with Warehouse ID {warehouse_id} and Quantity {quantity}")
-                            except ValueError as stock_error:
-                                print(f"Error parsing warehouse stock entry '{stock_entry}': {stock_error}")
-                except Exception as row_error:
-                    print(f"Error inserting row {row}: {row_error}")
-                    continue  # Skip to the next row if there's an error with this one
-
-        # Commit the transaction
-        conn.commit()
-        print("Bulk upload completed successfully")
-        return jsonify({"message": "Bulk upload completed successfully."}), 201
-
+        # Import in the background so large catalogs don't hold up a worker
+        job_id = import_jobs.submit(file)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"error": f"Invalid CSV file: {e}"}), 400
     except Exception as e:
-        print(f"General error during file processing: {e}")  # General error logging
+        logging.exception("Error queuing bulk upload")
         return jsonify({"error": f"An error occurred during upload: {str(e)}"}), 500
+
+    return jsonify({
+        "message": "Bulk upload queued.",
+        "job_id": job_id,
+        "status_url": url_for("product.get_bulk_upload_status", job_id=job_id)
+    }), 202
+
+# Route to follow the progress of a bulk upload
+@product_bp.route('/bulk-upload/<job_id>', methods=['GET'])
+@role_required(["Product Manager", "Super Admin"])
+def get_bulk_upload_status(job_id):
+    conn = get_db_connection()
+    try:
+        job = get_import_job(conn.cursor(), job_id)
     finally:
         conn.close()
 
+    if not job:
+        return jsonify({"error": "Import job not found"}), 404
+    return jsonify(job), 200
 
 
 @product_bp.route('/categories', methods=['GET'])
@@ -354,83 +489,46 @@ def get_product_details(product_id):
     cursor = conn.cursor()
 
     try:
-        # Print entry into the function
-        print(f"Fetching details for Product ID: {product_id}")
-
-        # Fetch the main product details
-        cursor.execute("""
-            SELECT ProductID, Name, Description, Price, Size, Color, Material, StockQuantity, CategoryID, SubCategoryID, Featured
-            FROM Product
-            WHERE ProductID = ?
-        """, (product_id,))
-        
-        product = cursor.fetchone()
-        if not product:
-            print(f"Product ID {product_id} not found in the database.")
+        # Product, warehouse stock, images and category names in one query
+        product_details = load_product_details(cursor, product_id)
+        if not product_details:
             return jsonify({"error": "Product not found"}), 404
 
-        # Print product data fetched from the database
-        print(f"Main product details for Product ID {product_id}: {product}")
-
-        # Format the main product details
-        product_details = {
-            "product_id": product["ProductID"],
-            "name": product["Name"],
-            "description": product["Description"],
-            "price": product["Price"],
-            "size": product["Size"],
-            "color": product["Color"],
-            "material": product["Material"],
-            "stock_quantity": product["StockQuantity"],
-            "category_id": product["CategoryID"],
-            "sub_category_id": product["SubCategoryID"],
-            "featured": bool(product["Featured"]),
-        }
-
-        # Fetch related warehouse stock information
-        cursor.execute("""
-            SELECT WarehouseID, StockQuantity
-            FROM Product_Warehouse
-            WHERE ProductID = ?
-        """, (product_id,))
-        warehouse_stock = [{"warehouse_id": row["WarehouseID"], "quantity": row["StockQuantity"]} for row in cursor.fetchall()]
-        
-        # Print warehouse stock information
-        print(f"Warehouse stock for Product ID {product_id}: {warehouse_stock}")
-        product_details["warehouse_stock"] = warehouse_stock
-
-        # Fetch image paths if available
-        cursor.execute("""
-            SELECT ImageURL FROM Product_Image
-            WHERE ProductID = ?
-        """, (product_id,))
-        images = [row["ImageURL"] for row in cursor.fetchall()]
-        
-        # Print images fetched
-        print(f"Images for Product ID {product_id}: {images}")
-        product_details["images"] = images
-
-        # Fetch category name if available
-        cursor.execute("SELECT Name FROM Category WHERE CategoryID = ?", (product["CategoryID"],))
-        category = cursor.fetchone()
-        if category:
-            product_details["category_name"] = category["Name"]
-            print(f"Category name for Product ID {product_id}: {category['Name']}")
-
-        # Fetch subcategory name if available
-        cursor.execute("SELECT Name FROM SubCategory WHERE SubCategoryID = ?", (product["SubCategoryID"],))
-        subcategory = cursor.fetchone()
-        if subcategory:
-            product_details["sub_category_name"] = subcategory["Name"]
-            print(f"Subcategory name for Product ID {product_id}: {subcategory['Name']}")
-
-        # Final response print
-        print(f"Final product details for Product ID {product_id}: {product_details}")
-        
         return jsonify({"product": product_details}), 200
 
     except Exception as e:
-        print(f"Error fetching product details for Product ID {product_id}: {e}")
+        logging.exception(f"Error fetching product details for Product ID {product_id}")
+        return jsonify({"error": str(e)}), 500
+    finally:
+        conn.close()
+
+
+@product_bp.route('/batch', methods=['GET'])
+@role_required(["Product Manager", "Super Admin"])
+def get_products_batch():
+    """Details for many products at once: /product/batch?ids=1,2,3"""
+    try:
+        product_ids = [int(value) for value in request.args.get("ids", "").split(",") if value.strip()]
+    except ValueError:
+        return jsonify({"error": "ids must be a comma-separated list of product IDs"}), 400
+
+    if not product_ids or not all(is_valid_id(product_id) for product_id in product_ids):
+        return jsonify({"error": "ids must be a comma-separated list of product IDs"}), 400
+    if len(product_ids) > MAX_PAGE_SIZE:
+        return jsonify({"error": f"At most {MAX_PAGE_SIZE} products can be requested at once"}), 400
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        details = load_products_details(cursor, product_ids)
+        ordered_ids = list(dict.fromkeys(product_ids))
+        return jsonify({
+            "products": [details[product_id] for product_id in ordered_ids if product_id in details],
+            "missing": [product_id for product_id in ordered_ids if product_id not in details]
+        }), 200
+
+    except Exception as e:
+        logging.exception("Error fetching product details batch")
         return jsonify({"error": str(e)}), 500
     finally:
         conn.close()
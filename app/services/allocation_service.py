@@ -0,0 +1,83 @@
+import math
+
+ALLOCATION_STRATEGIES = ('nearest', 'most_stocked', 'split')
+EARTH_RADIUS_KM = 6371.0
+
+
+def distance_km(origin, destination):
+    """Great-circle distance between two (latitude, longitude) points, in kilometres."""
+    lat1, lon1 = map(math.radians, origin)
+    lat2, lon2 = map(math.radians, destination)
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _fill(quantity, stock, warehouse_ids):
+    """Take units from the warehouses in the given order until the line is covered."""
+    allocation = {}
+    for warehouse_id in warehouse_ids:
+        units = min(quantity, stock[warehouse_id])
+        if units > 0:
+            allocation[warehouse_id] = units
+            quantity -= units
+        if not quantity:
+            break
+    return allocation
+
+
+def _split(quantity, stock, total):
+    """Take units in proportion to each warehouse's stock, so their levels fall evenly."""
+    shares = {warehouse_id: quantity * units // total for warehouse_id, units in stock.items()}
+    # Hand out the units lost to rounding by largest remainder (then most stock)
+    remainder = quantity - sum(shares.values())
+    by_remainder = sorted(stock, key=lambda w: (-(quantity * stock[w] % total), -stock[w], w))
+    for warehouse_id in by_remainder[:remainder]:
+        shares[warehouse_id] += 1
+    return {warehouse_id: units for warehouse_id, units in shares.items() if units}
+
+
+def allocate_line(quantity, stock, strategy='nearest', distances=None):
+    """Choose the warehouses that ship ``quantity`` units of one product.
+
+    ``stock`` maps warehouse ID to units on hand there, ``distances`` maps
+    warehouse ID to its distance from the delivery address. Returns
+    {warehouse_id: units}, or None if the warehouses together hold too
+    little. Strategies:
+
+    - nearest: the closest warehouse that can ship the whole line, else the
+      closest ones in turn. Warehouses without a known distance come last.
+    - most_stocked: the warehouse with the most units, topped up from the
+      next best stocked if even it falls short.
+    - split: every warehouse in proportion to its stock.
+    """
+    if strategy not in ALLOCATION_STRATEGIES:
+        raise ValueError(f"Unsupported allocation strategy '{strategy}'")
+    stock = {warehouse_id: units for warehouse_id, units in stock.items() if units > 0}
+    total = sum(stock.values())
+    if total < quantity:
+        return None
+
+    if strategy == 'split':
+        return _split(quantity, stock, total)
+
+    if strategy == 'nearest':
+        distances = distances or {}
+        rank = lambda w: (w not in distances, distances.get(w, 0), w)
+    else:
+        rank = lambda w: (-stock[w], w)
+    whole = [warehouse_id for warehouse_id, units in stock.items() if units >= quantity]
+    if whole:
+        return {min(whole, key=rank): quantity}
+    return _fill(quantity, stock, sorted(stock, key=rank))
+
+
+def restock_warehouse(stock):
+    """Choose the warehouse that takes back returned units of one product.
+
+    ``stock`` maps warehouse ID to units on hand there. Returns go to the
+    warehouse holding the fewest (lowest ID on ties), so they refill the one
+    running lowest, or None if the product is not stocked per warehouse.
+    """
+    if not stock:
+        return None
+    return min(stock, key=lambda w: (stock[w], w))
@@ -0,0 +1,88 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from db import get_db_connection, begin_write
+from app.utils.image_processing import render_image_variants
+
+
+def record_image_variants(cursor, image_id, variants):
+    cursor.executemany("""
+        INSERT OR REPLACE INTO Product_Image_Variant (ImageID, Variant, Format, Width, Height, FilePath, FileSize)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (image_id, v["variant"], v["format"], v["width"], v["height"], v["file_path"], v["file_size"])
+        for v in variants
+    ])
+
+
+
+def copy_image_variants(cursor, image_id, image_path):
+    """Point a new image at the variants already rendered for the same stored file."""
+    cursor.execute("""
+        INSERT OR IGNORE INTO Product_Image_Variant (ImageID, Variant, Format, Width, Height, FilePath, FileSize)
+        SELECT ?, v.Variant, v.Format, v.Width, v.Height, v.FilePath, v.FileSize
+        FROM Product_Image_Variant v
+        JOIN Product_Image pi ON pi.ImageID = v.ImageID
+        WHERE pi.ImageURL = ? AND pi.ImageID != ?
+    """, (image_id, image_path, image_id))
+    return cursor.rowcount
+
+
+class ImageProcessor:
+    """Renders product image variants on a process pool.
+
+    Uploads return as soon as the original is stored; serve_uploads falls
+    back to the original until a variant has been written.
+    """
+
+    def __init__(self, max_workers=2):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers=None):
+        with self._lock:
+            if max_workers is not None:
+                self.max_workers = max_workers
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def process(self, app, image_id, image_path):
+        """Reuse the variants of an identical earlier upload, or render them."""
+        conn = get_db_connection()
+        begin_write(conn)
+        copied = copy_image_variants(conn.cursor(), image_id, image_path)
+        conn.commit()
+        if not copied:
+            return self.submit(app, image_id, image_path)
+        return None
+
+    def submit(self, app, image_id, image_path):
+        """Queue variant rendering for a stored upload; returns the future."""
+        future = self.executor.submit(render_image_variants, app.config['UPLOAD_FOLDER'], image_path)
+        future.add_done_callback(lambda done: self._finish(app, image_id, image_path, done))
+        return future
+
+    def _finish(self, app, image_id, image_path, future):
+        # Runs on the executor's callback thread once the worker is done
+        try:
+            variants = future.result()
+            with app.app_context():
+                conn = get_db_connection()
+                begin_write(conn)
+                record_image_variants(conn.cursor(), image_id, variants)
+                conn.commit()
+        except Exception as e:
+            app.logger.error(f"Failed to process image {image_path}: {e}")
+
+
+image_processor = ImageProcessor()
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from db import get_db_connection, begin_write
+from app.services.product_import_service import import_products_csv, open_csv
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def _now():
+    return datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+
+
+def _update_job(conn, job_id, **columns):
+    assignments = ", ".join(f"{column} = ?" for column in columns)
+    begin_write(conn)
+    conn.execute(f"UPDATE Import_Job SET {assignments} WHERE JobID = ?", (*columns.values(), job_id))
+    conn.commit()
+
+
+class ImportJobRunner:
+    """Runs CSV product imports on background threads.
+
+    Job state lives in the Import_Job table, so any worker process can answer
+    status requests. Threads are enough here: the import is bound by SQLite
+    writes, which are serialised anyway.
+    """
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers=None):
+        with self._lock:
+            if max_workers is not None:
+                self.max_workers = max_workers
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='product-import'
+                )
+            return self._executor
+
+    def submit(self, file):
+        """Save an uploaded CSV, record the job and queue it; returns the job ID."""
+        job_id = uuid.uuid4().hex
+        imports_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'imports')
+        os.makedirs(imports_dir, exist_ok=True)
+        file_path = os.path.join(imports_dir, f"{job_id}.csv")
+        file.save(file_path)
+
+        # Reject a file with a bad header now rather than in the background
+        try:
+            with open(file_path, 'rb') as csv_file:
+                open_csv(csv_file)
+        except Exception:
+            os.remove(file_path)
+            raise
+
+        conn = get_db_connection()
+        begin_write(conn)
+        conn.execute(
+            "INSERT INTO Import_Job (JobID, Status, FileName, FilePath, CreatedAt) VALUES (?, 'queued', ?, ?, ?)",
+            (job_id, file.filename, file_path, _now())
+        )
+        conn.commit()
+
+        self.executor.submit(self._run, current_app._get_current_object(), job_id, file_path)
+        return job_id
+
+    def _run(self, app, job_id, file_path):
+        with app.app_context():
+            conn = get_db_connection()
+            _update_job(conn, job_id, Status='running', StartedAt=_now())
+
+            def progress(report):
+                _update_job(
+                    conn, job_id,
+                    RowsProcessed=report.rows, RowsImported=report.imported, RowsFailed=report.failed
+                )
+
+            try:
+                with open(file_path, 'rb') as csv_file:
+                    report = import_products_csv(
+                        conn, csv_file, chunk_size=app.config['PRODUCT_IMPORT_CHUNK_SIZE'], progress=progress
+                    )
+                _update_job(
+                    conn, job_id,
+                    Status='done',
+                    RowsProcessed=report.rows,
+                    RowsImported=report.imported,
+                    RowsFailed=report.failed,
+                    Errors=json.dumps(report.errors),
+                    FinishedAt=_now()
+                )
+            except Exception as e:
+                app.logger.error(f"Product import {job_id} failed: {e}")
+                if conn.in_transaction:
+                    conn.rollback()
+                _update_job(conn, job_id, Status='failed', Message=str(e), FinishedAt=_now())
+            finally:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+
+import_jobs = ImportJobRunner()
+
+
+# Read a job's progress for the status endpoint
+def get_import_job(cursor, job_id):
+    """Return a job's progress and throughput, or None if it does not exist."""
+    cursor.execute("SELECT * FROM Import_Job WHERE JobID = ?", (job_id,))
+    job = cursor.fetchone()
+    if not job:
+        return None
+
+    rows_per_second = None
+    if job["StartedAt"]:
+        started = datetime.strptime(job["StartedAt"], TIMESTAMP_FORMAT)
+        finished = datetime.strptime(job["FinishedAt"], TIMESTAMP_FORMAT) if job["FinishedAt"] else datetime.utcnow()
+        elapsed = (finished - started).total_seconds()
+        if elapsed > 0:
+            rows_per_second = round(job["RowsProcessed"] / elapsed, 1)
+
+    return {
+        "job_id": job["JobID"],
+        "status": job["Status"],
+        "file_name": job["FileName"],
+        "rows_processed": job["RowsProcessed"],
+        "rows_imported": job["RowsImported"],
+        "rows_failed": job["RowsFailed"],
+        "rows_per_second": rows_per_second,
+        "errors": json.loads(job["Errors"]) if job["Errors"] else [],
+        "message": job["Message"],
+        "created_at": job["CreatedAt"],
+        "started_at": job["StartedAt"],
+        "finished_at": job["FinishedAt"],
+    }
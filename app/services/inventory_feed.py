@@ -0,0 +1,163 @@
+import queue
+import threading
+from collections import deque
+
+from db import get_db_connection
+
+LOW_STOCK_CHANGE_TYPE = 'Low Stock Alert'
+
+
+def inventory_event(row):
+    """Feed event for an Inventory_Log row; its LogID is the event ID."""
+    return {
+        "id": row["LogID"],
+        "event": "low_stock" if row["ChangeType"] == LOW_STOCK_CHANGE_TYPE else "stock",
+        "data": {
+            "log_id": row["LogID"],
+            "product_id": row["ProductID"],
+            "product_name": row["ProductName"],
+            "warehouse_id": row["WarehouseID"],
+            "change_amount": row["ChangeAmount"],
+            "change_type": row["ChangeType"],
+            "stock_level": row["StockLevel"],
+            "product_stock": row["ProductStock"],
+            "timestamp": row["Timestamp"],
+        },
+    }
+
+
+class Subscription:
+    """One connected client: its pending events and whether it fell too far behind."""
+
+    def __init__(self, max_events):
+        self.events = queue.Queue(maxsize=max_events)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # The client is not keeping up; it gets a resync event instead
+            self.overflowed = True
+
+    def take_overflow(self):
+        """True (once) if events were dropped; the pending ones are discarded too."""
+        if not self.overflowed:
+            return False
+        self.overflowed = False
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                return True
+
+    def get(self, timeout):
+        """Next event, or None once ``timeout`` seconds pass without one."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class InventoryFeed:
+    """Fans new Inventory_Log rows out to Server-Sent Events subscribers.
+
+    A single background thread tails Inventory_Log by LogID and copies each
+    new row to every subscriber, so the table is read once per batch of
+    changes however many dashboards are connected. Writers call notify()
+    after committing to wake the thread straight away; otherwise it polls
+    every ``poll_interval`` seconds, which also picks up rows written by
+    other worker processes. The last ``history_size`` events are kept so a
+    reconnecting client can resume from its Last-Event-ID.
+    """
+
+    def __init__(self, poll_interval=1.0, queue_size=1000, history_size=1000, batch_size=500):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._last_log_id = None
+        self._thread = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def configure(self, poll_interval=None, queue_size=None, history_size=None):
+        with self._lock:
+            if poll_interval is not None:
+                self.poll_interval = poll_interval
+            if queue_size is not None:
+                self.queue_size = queue_size
+            if history_size is not None:
+                self._history = deque(self._history, maxlen=history_size)
+
+    def notify(self):
+        """Tell the feed that Inventory_Log rows were just committed."""
+        self._wake.set()
+
+    def subscribe(self, app, last_event_id=None):
+        """Register a client; returns (subscription, replayed events or None if a resync is needed)."""
+        self._start(app)
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if last_event_id is None or last_event_id >= self._last_log_id:
+                return subscription, []
+            if not self._history or self._history[0]["id"] > last_event_id + 1:
+                return subscription, None
+            return subscription, [event for event in self._history if event["id"] > last_event_id]
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _start(self, app):
+        with self._lock:
+            if self._thread is not None:
+                return
+            with app.app_context():
+                cursor = get_db_connection().cursor()
+                cursor.execute("SELECT COALESCE(MAX(LogID), 0) FROM Inventory_Log")
+                self._last_log_id = cursor.fetchone()[0]
+            self._thread = threading.Thread(
+                target=self._run, args=(app,), name='inventory-feed', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, app):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                with app.app_context():
+                    self._poll(get_db_connection().cursor())
+            except Exception as e:
+                app.logger.error(f"Inventory feed poll failed: {e}")
+
+    def _poll(self, cursor):
+        while True:
+            cursor.execute("""
+                SELECT il.LogID, il.ProductID, p.Name AS ProductName, il.WarehouseID, il.ChangeAmount,
+                    il.ChangeType, il.StockLevel, p.StockQuantity AS ProductStock, il.Timestamp
+                FROM Inventory_Log il
+                LEFT JOIN Product p ON p.ProductID = il.ProductID
+                WHERE il.LogID > ?
+                ORDER BY il.LogID
+                LIMIT ?
+            """, (self._last_log_id, self.batch_size))
+            events = [inventory_event(row) for row in cursor.fetchall()]
+            if not events:
+                return
+
+            with self._lock:
+                self._last_log_id = events[-1]["id"]
+                self._history.extend(events)
+                subscribers = list(self._subscribers)
+            for subscription in subscribers:
+                for event in events:
+                    subscription.put(event)
+            if len(events) < self.batch_size:
+                return
+
+
+inventory_feed = InventoryFeed()
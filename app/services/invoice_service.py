@@ -0,0 +1,273 @@
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from flask import current_app
+from db import get_db_connection, begin_write
+from app.utils.invoice import (
+    fetch_invoice_data, invoice_content_hash, invoice_file_path, invoices_directory,
+    logo_file_path, next_invoice_number, next_invoice_numbers, record_invoice,
+    record_invoices, render_invoice_pdf
+)
+from app.utils.streaming import iter_zip
+
+
+class InvoiceRenderer:
+    """Renders invoice PDFs on a process pool and tracks the jobs.
+
+    A job is finished once its PDF exists and its Invoice row is recorded.
+    Only the most recent ``max_jobs`` jobs are remembered for status lookups.
+    """
+
+    def __init__(self, max_workers=2, max_jobs=1000):
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._jobs_by_path = {}
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers=None, max_jobs=None):
+        with self._lock:
+            if max_workers is not None:
+                self.max_workers = max_workers
+            if max_jobs is not None:
+                self.max_jobs = max_jobs
+
+    @property
+    def executor(self):
+        # Created on first use; spawned workers never inherit the server's
+        # threads or open database connections. The lock keeps concurrent
+        # first requests from each starting a pool
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def submit(self, order_id, invoice_data, invoice_path):
+        """Queue a render unless the same PDF is already being rendered."""
+        app = current_app._get_current_object()
+        # Allocated outside the lock, as in submit_batch; a render that turns
+        # out to be in flight already leaves a gap in the numbering
+        invoice_number = next_invoice_number()
+        with self._lock:
+            job = self._jobs_by_path.get(invoice_path)
+            if job and job["status"] in ("queued", "running"):
+                return job
+
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "order_id": order_id,
+                "status": "queued",
+                "invoice_number": invoice_number,
+                "invoice_path": invoice_path,
+                "error": None,
+            }
+            self._remember(job)
+
+        future = self.executor.submit(
+            render_invoice_pdf, invoice_data, job["invoice_number"], invoice_path, logo_file_path()
+        )
+        job["future"] = future
+        future.add_done_callback(lambda done: self._finish(app, job, invoice_data, done))
+        return job
+
+    def submit_batch(self, invoices, archive_path=None):
+        """Start rendering many invoices; invoices maps order_id -> invoice_data.
+
+        PDFs that are already cached are not rendered again. The returned
+        batch job is consumed with iter_batch(), which also keeps its progress
+        counters up to date. With an archive_path the job is only done once
+        write_batch_archive() has moved the ZIP there.
+        """
+        logo_path = logo_file_path()
+        invoices_dir = invoices_directory()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "running",
+            "total": len(invoices),
+            "completed": 0,
+            "failed": 0,
+            "errors": {},
+            "archive_path": None,
+            "archive_target": archive_path,
+            "cached": [],
+            "pending": {},
+        }
+
+        to_render = []
+        for order_id, invoice_data in invoices.items():
+            invoice_path = invoice_file_path(invoices_dir, order_id, invoice_content_hash(invoice_data))
+            if os.path.exists(invoice_path):
+                job["cached"].append((order_id, invoice_path))
+            else:
+                to_render.append((order_id, invoice_data, invoice_path))
+
+        invoice_numbers = next_invoice_numbers(len(to_render))
+        with self._lock:
+            self._remember(job)
+
+        for (order_id, invoice_data, invoice_path), invoice_number in zip(to_render, invoice_numbers):
+            future = self.executor.submit(render_invoice_pdf, invoice_data, invoice_number, invoice_path, logo_path)
+            job["pending"][future] = (order_id, invoice_number, invoice_data, invoice_path)
+        return job
+
+    def iter_batch(self, job):
+        """Yield (order_id, invoice_path) for a batch job as its PDFs become ready.
+
+        Needs an app context: the Invoice rows for newly rendered PDFs are
+        recorded in one statement once the batch is drained (or abandoned).
+        """
+        rendered = []
+        try:
+            for order_id, invoice_path in job["cached"]:
+                job["completed"] += 1
+                yield order_id, invoice_path
+
+            for future in as_completed(job["pending"]):
+                order_id, invoice_number, invoice_data, invoice_path = job["pending"][future]
+                try:
+                    future.result()
+                except Exception as e:
+                    current_app.logger.error(f"Failed to render invoice for Order ID {order_id}: {e}")
+                    job["errors"][order_id] = str(e)
+                    job["failed"] += 1
+                    continue
+                rendered.append((order_id, invoice_number, invoice_data, invoice_path))
+                job["completed"] += 1
+                yield order_id, invoice_path
+        finally:
+            if rendered:
+                conn = get_db_connection()
+                begin_write(conn)
+                record_invoices(conn.cursor(), rendered)
+                conn.commit()
+            if job["completed"] + job["failed"] != job["total"]:
+                job["status"] = "failed"
+            elif not job["archive_target"]:
+                job["status"] = "done"
+            job["cached"], job["pending"] = [], {}
+
+    def iter_batch_entries(self, job, manifest=None):
+        """ZIP entries for a batch: one PDF per order plus a manifest.json."""
+        for order_id, invoice_path in self.iter_batch(job):
+            yield f"invoice_{order_id}.pdf", invoice_path
+
+        summary = dict(manifest or {})
+        summary.update(self.describe(job))
+        del summary["status"]
+        yield "manifest.json", json.dumps(summary, indent=2).encode('utf-8')
+
+    def write_batch_archive(self, app, job, manifest=None):
+        """Drain a batch into its ZIP file on disk; meant to run on a background thread."""
+        archive_path = job["archive_target"]
+        with app.app_context():
+            try:
+                os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+                temp_path = f"{archive_path}.tmp"
+                with open(temp_path, 'wb') as archive:
+                    for chunk in iter_zip(self.iter_batch_entries(job, manifest)):
+                        archive.write(chunk)
+                os.replace(temp_path, archive_path)
+                job["archive_path"] = archive_path
+                if job["status"] == "running":
+                    job["status"] = "done"
+            except Exception as e:
+                app.logger.error(f"Failed to write invoice batch {job['job_id']}: {e}")
+                job["errors"]["archive"] = str(e)
+                job["status"] = "failed"
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def describe(self, job):
+        """Public view of a job for the status endpoint."""
+        if "total" in job:
+            return {
+                "job_id": job["job_id"],
+                "status": job["status"],
+                "total": job["total"],
+                "completed": job["completed"],
+                "failed": job["failed"],
+                "errors": {str(key): error for key, error in job["errors"].items()},
+            }
+
+        status = job["status"]
+        future = job.get("future")
+        if status == "queued" and future is not None and future.running():
+            status = "running"
+        return {
+            "job_id": job["job_id"],
+            "order_id": job["order_id"],
+            "status": status,
+            "invoice_number": job["invoice_number"],
+            "error": job["error"],
+        }
+
+    def _remember(self, job):
+        self._jobs[job["job_id"]] = job
+        if job.get("invoice_path"):
+            self._jobs_by_path[job["invoice_path"]] = job
+        while len(self._jobs) > self.max_jobs:
+            _, old_job = self._jobs.popitem(last=False)
+            if old_job.get("invoice_path") and self._jobs_by_path.get(old_job["invoice_path"]) is old_job:
+                del self._jobs_by_path[old_job["invoice_path"]]
+
+    def _finish(self, app, job, invoice_data, future):
+        # Runs on the executor's callback thread once the worker is done
+        try:
+            future.result()
+            with app.app_context():
+                conn = get_db_connection()
+                begin_write(conn)
+                record_invoice(conn.cursor(), job["order_id"], job["invoice_number"], invoice_data, job["invoice_path"])
+                conn.commit()
+            job["status"] = "done"
+        except Exception as e:
+            app.logger.error(f"Failed to render invoice for Order ID {job['order_id']}: {e}")
+            job["error"] = str(e)
+            job["status"] = "failed"
+
+
+invoice_renderer = InvoiceRenderer()
+
+
+# Return a cached invoice or start rendering it in the background
+def request_invoice(order_id):
+    """Look up the invoice for an order's current content.
+
+    Returns None when the order does not exist, {"status": "done",
+    "invoice_path": ...} when the PDF is already on disk, and otherwise the
+    (new or already running) render job.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    invoice_data = fetch_invoice_data(cursor, order_id)
+    if not invoice_data:
+        return None
+
+    invoice_path = invoice_file_path(invoices_directory(), order_id, invoice_content_hash(invoice_data))
+    if os.path.exists(invoice_path):
+        return {"status": "done", "invoice_path": invoice_path}
+
+    return invoice_renderer.submit(order_id, invoice_data, invoice_path)
+
+
+# Find the orders a bulk invoice request covers by date range
+def order_ids_in_range(cursor, start_date, end_date, status=None):
+    """IDs of orders placed from start_date up to and including end_date (YYYY-MM-DD)."""
+    query = 'SELECT OrderID FROM "Order" WHERE OrderDate >= ? AND OrderDate < date(?, \'+1 day\')'
+    params = [start_date, end_date]
+    if status:
+        query += " AND OrderStatus = ?"
+        params.append(status)
+    cursor.execute(query + " ORDER BY OrderID", params)
+    return [row["OrderID"] for row in cursor.fetchall()]
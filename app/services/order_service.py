@@ -0,0 +1,282 @@
+from datetime import datetime
+from db import begin_write
+from app.utils.validators import is_valid_id
+from app.services.allocation_service import allocate_line, distance_km, restock_warehouse
+
+
+class OrderError(ValueError):
+    """An order that cannot be placed; carries the HTTP status to answer with."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# Merge the requested lines by product and validate quantities
+def normalize_order_lines(products):
+    """Return {product_id: quantity} for a list of {"product_id", "quantity"} items."""
+    lines = {}
+    for item in products:
+        try:
+            product_id = item["product_id"]
+            quantity = item["quantity"]
+        except (KeyError, TypeError):
+            raise OrderError("Each product needs a product_id and a quantity")
+
+        if not is_valid_id(product_id):
+            raise OrderError("Product ID must be a positive integer")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            raise OrderError("Quantity must be a positive integer")
+        lines[product_id] = lines.get(product_id, 0) + quantity
+    return lines
+
+
+# Read prices and unreserved stock for an order
+def check_stock(cursor, lines):
+    """Return ({product_id: Product row}, total amount) for {product_id: quantity}.
+
+    Stock held by reservations (ReservedQuantity) is not available. Raises
+    OrderError for unknown products or lines the stock cannot cover.
+    """
+    product_ids = list(lines)
+    placeholders = ", ".join("?" for _ in product_ids)
+    cursor.execute(
+        f"SELECT ProductID, Price, StockQuantity, ReservedQuantity FROM Product WHERE ProductID IN ({placeholders})",
+        product_ids
+    )
+    stock = {row["ProductID"]: row for row in cursor.fetchall()}
+
+    total_amount = 0
+    for product_id, quantity in lines.items():
+        product = stock.get(product_id)
+        if not product:
+            raise OrderError(f"Product with ID {product_id} does not exist", 404)
+        if product["StockQuantity"] - product["ReservedQuantity"] < quantity:
+            raise OrderError(f"Insufficient stock for product ID {product_id}")
+        total_amount += product["Price"] * quantity
+    return stock, total_amount
+
+
+# Pick the warehouses each line ships from
+def allocate_warehouses(cursor, lines, strategy='nearest', ship_to=None):
+    """Return {product_id: {warehouse_id: (units, stock on hand)}} for an order.
+
+    Reads Product_Warehouse for all lines with one IN query and allocates
+    from unreserved stock. Products with no Product_Warehouse rows are not
+    tracked per warehouse and are left out. Raises OrderError if the
+    warehouses cannot cover a line.
+    """
+    product_ids = list(lines)
+    placeholders = ", ".join("?" for _ in product_ids)
+    cursor.execute(
+        f"""
+        SELECT pw.ProductID, pw.WarehouseID, pw.StockQuantity, pw.ReservedQuantity, w.Latitude, w.Longitude
+        FROM Product_Warehouse pw
+        LEFT JOIN Warehouse w ON w.WarehouseID = pw.WarehouseID
+        WHERE pw.ProductID IN ({placeholders})
+        """,
+        product_ids
+    )
+    warehouse_stock, on_hand, distances = {}, {}, {}
+    for row in cursor.fetchall():
+        warehouse_stock.setdefault(row["ProductID"], {})[row["WarehouseID"]] = row["StockQuantity"] - row["ReservedQuantity"]
+        on_hand[row["ProductID"], row["WarehouseID"]] = row["StockQuantity"]
+        if strategy == 'nearest' and ship_to is not None and row["Latitude"] is not None \
+                and row["WarehouseID"] not in distances:
+            distances[row["WarehouseID"]] = distance_km(ship_to, (row["Latitude"], row["Longitude"]))
+
+    allocations = {}
+    for product_id, stock in warehouse_stock.items():
+        allocation = allocate_line(lines[product_id], stock, strategy, distances)
+        if allocation is None:
+            raise OrderError(f"Insufficient stock for product ID {product_id}")
+        allocations[product_id] = {
+            warehouse_id: (units, on_hand[product_id, warehouse_id]) for warehouse_id, units in allocation.items()
+        }
+    return allocations
+
+
+# Guarded claim on unreserved stock: a row only changes if enough is still there
+def claim_stock(cursor, lines, allocations, assignment):
+    """Apply ``assignment`` (e.g. "StockQuantity = StockQuantity - ?") to every line and allocated warehouse.
+
+    Raises OrderError if any Product or Product_Warehouse row no longer has
+    the units unreserved.
+    """
+    cursor.executemany(
+        f"UPDATE Product SET {assignment} WHERE ProductID = ? AND StockQuantity - ReservedQuantity >= ?",
+        [(quantity, product_id, quantity) for product_id, quantity in lines.items()]
+    )
+    if cursor.rowcount != len(lines):
+        raise OrderError("Insufficient stock for one or more products")
+    warehouse_updates = [
+        (units, warehouse_id, product_id, units)
+        for product_id, allocation in allocations.items()
+        for warehouse_id, (units, _) in allocation.items()
+    ]
+    cursor.executemany(
+        f"""
+        UPDATE Product_Warehouse SET {assignment}
+        WHERE WarehouseID = ? AND ProductID = ? AND StockQuantity - ReservedQuantity >= ?
+        """,
+        warehouse_updates
+    )
+    if cursor.rowcount != len(warehouse_updates):
+        raise OrderError("Insufficient stock for one or more products")
+
+
+# Write the order, its lines and the stock movements
+def record_order(cursor, user_id, lines, stock, allocations, total_amount, order_date):
+    """Insert the Order, Order_Product and Inventory_Log rows; returns the order ID.
+
+    ``stock`` and ``allocations`` hold the stock on hand before the
+    decrement, as returned by check_stock and allocate_warehouses.
+    """
+    cursor.execute(
+        "INSERT INTO 'Order' (OrderDate, OrderStatus, TotalAmount, UserID) VALUES (?, 'Pending', ?, ?)",
+        (order_date, total_amount, user_id)
+    )
+    order_id = cursor.lastrowid
+
+    cursor.executemany(
+        "INSERT INTO Order_Product (OrderID, ProductID, Quantity) VALUES (?, ?, ?)",
+        [(order_id, product_id, quantity) for product_id, quantity in lines.items()]
+    )
+    log_stock_changes(cursor, lines, stock, allocations, 'Order Created', order_date)
+    return order_id
+
+
+def log_stock_changes(cursor, lines, stock, allocations, change_type, timestamp, sign=-1):
+    """Insert the Inventory_Log rows for units taken (sign -1) or put back (+1).
+
+    One row per warehouse moved, with that warehouse's new level; products
+    not stocked per warehouse log the aggregate. ``stock`` and
+    ``allocations`` hold the levels before the change.
+    """
+    log_rows = []
+    for product_id, quantity in lines.items():
+        if product_id in allocations:
+            log_rows.extend(
+                (product_id, warehouse_id, sign * units, change_type, timestamp, level + sign * units)
+                for warehouse_id, (units, level) in allocations[product_id].items()
+            )
+        else:
+            log_rows.append((
+                product_id, None, sign * quantity, change_type, timestamp,
+                stock[product_id]["StockQuantity"] + sign * quantity
+            ))
+    cursor.executemany(
+        """
+        INSERT INTO Inventory_Log (ProductID, WarehouseID, ChangeAmount, ChangeType, Timestamp, StockLevel)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        log_rows
+    )
+
+
+# Stock movements outside checkout (replacements and returns). Callers hold
+# the write lock and commit together with their own changes
+def take_stock(cursor, lines, change_type, timestamp, strategy='nearest', ship_to=None):
+    """Ship {product_id: quantity} from the warehouses, as an order would.
+
+    Lines are allocated with ``strategy`` and decremented with the same
+    guarded UPDATEs as place_order, on Product and Product_Warehouse alike,
+    and logged as ``change_type``. Raises OrderError if the stock cannot
+    cover them.
+    """
+    stock, _ = check_stock(cursor, lines)
+    allocations = allocate_warehouses(cursor, lines, strategy, ship_to)
+    claim_stock(cursor, lines, allocations, "StockQuantity = StockQuantity - ?")
+    log_stock_changes(cursor, lines, stock, allocations, change_type, timestamp)
+
+
+def return_stock(cursor, lines, change_type, timestamp):
+    """Put {product_id: quantity} back into stock.
+
+    Each product's units go to one warehouse (see restock_warehouse) and to
+    Product.StockQuantity together, logged as ``change_type``. Products that
+    no longer exist are skipped; returns the lines that were put back.
+    """
+    product_ids = list(lines)
+    placeholders = ", ".join("?" for _ in product_ids)
+    cursor.execute(
+        f"SELECT ProductID, StockQuantity FROM Product WHERE ProductID IN ({placeholders})",
+        product_ids
+    )
+    stock = {row["ProductID"]: row for row in cursor.fetchall()}
+    lines = {product_id: quantity for product_id, quantity in lines.items() if product_id in stock}
+    if not lines:
+        return lines
+
+    cursor.execute(
+        f"SELECT ProductID, WarehouseID, StockQuantity FROM Product_Warehouse WHERE ProductID IN ({placeholders})",
+        product_ids
+    )
+    warehouse_stock = {}
+    for row in cursor.fetchall():
+        warehouse_stock.setdefault(row["ProductID"], {})[row["WarehouseID"]] = row["StockQuantity"]
+    allocations = {}
+    for product_id, quantity in lines.items():
+        warehouse_id = restock_warehouse(warehouse_stock.get(product_id))
+        if warehouse_id is not None:
+            allocations[product_id] = {warehouse_id: (quantity, warehouse_stock[product_id][warehouse_id])}
+
+    cursor.executemany(
+        "UPDATE Product SET StockQuantity = StockQuantity + ? WHERE ProductID = ?",
+        [(quantity, product_id) for product_id, quantity in lines.items()]
+    )
+    cursor.executemany(
+        "UPDATE Product_Warehouse SET StockQuantity = StockQuantity + ? WHERE WarehouseID = ? AND ProductID = ?",
+        [
+            (units, warehouse_id, product_id)
+            for product_id, allocation in allocations.items()
+            for warehouse_id, (units, _) in allocation.items()
+        ]
+    )
+    log_stock_changes(cursor, lines, stock, allocations, change_type, timestamp, sign=1)
+    return lines
+
+
+def check_user(cursor, user_id):
+    cursor.execute("SELECT 1 FROM User WHERE UserID = ?", (user_id,))
+    if not cursor.fetchone():
+        raise OrderError("Invalid user ID")
+
+
+# Place an order in a single write transaction
+def place_order(conn, user_id, products, order_date=None, strategy='nearest', ship_to=None):
+    """Validate, price and record an order; returns (order_id, lines).
+
+    All products are read with one IN query and stock is decremented with a
+    guarded UPDATE (unreserved stock >= quantity), so the order either goes
+    through completely or not at all. Lines of products stocked in
+    Product_Warehouse are allocated to warehouses with ``strategy`` (see
+    allocation_service; ``ship_to`` is the delivery (latitude, longitude)
+    for "nearest"), and those warehouses are decremented in the same
+    transaction, with one Inventory_Log row per warehouse. Order lines and
+    Inventory_Log rows are written with executemany. The transaction is
+    committed before returning, so follow-up work such as low-stock alerts
+    runs outside the write lock.
+    """
+    lines = normalize_order_lines(products)
+    if not lines:
+        raise OrderError("User ID and product list are required")
+    order_date = order_date or datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+
+    cursor = conn.cursor()
+    check_user(cursor, user_id)
+
+    # Take the write lock before reading stock so concurrent checkouts
+    # queue up here instead of failing with "database is locked" later
+    begin_write(conn)
+    try:
+        stock, total_amount = check_stock(cursor, lines)
+        allocations = allocate_warehouses(cursor, lines, strategy, ship_to)
+        claim_stock(cursor, lines, allocations, "StockQuantity = StockQuantity - ?")
+        order_id = record_order(cursor, user_id, lines, stock, allocations, total_amount, order_date)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return order_id, lines
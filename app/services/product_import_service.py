@@ -0,0 +1,194 @@
+import csv
+import io
+import sqlite3
+from db import begin_write
+from app.utils.validators import (
+    is_valid_string, is_valid_price, is_valid_quantity, is_valid_id,
+    sanitize_string, validate_warehouse_stock
+)
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+REQUIRED_COLUMNS = ('Name', 'Price', 'StockQuantity')
+
+PRODUCT_INSERT = """
+    INSERT INTO Product
+    (ProductID, Name, Description, Price, Size, Color, Material, StockQuantity, CategoryID, SubCategoryID)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+WAREHOUSE_INSERT = """
+    INSERT INTO Product_Warehouse (ProductID, WarehouseID, StockQuantity)
+    VALUES (?, ?, ?)
+"""
+
+
+def _optional_id(row, column):
+    value = (row.get(column) or '').strip()
+    if not value:
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"{column} must be a positive integer")
+    if not is_valid_id(value):
+        raise ValueError(f"{column} must be a positive integer")
+    return value
+
+
+def parse_warehouse_stock(value):
+    """Parse "warehouse_id:quantity;..." into validated warehouse stock entries."""
+    entries = []
+    for stock_entry in (value or '').split(';'):
+        if not stock_entry.strip():
+            continue
+        try:
+            warehouse_id, quantity = map(int, stock_entry.split(':'))
+        except ValueError:
+            raise ValueError(f"Invalid warehouse stock entry '{stock_entry.strip()}'")
+        entries.append({"warehouse_id": warehouse_id, "quantity": quantity})
+    return validate_warehouse_stock(entries)
+
+
+def parse_product_row(row):
+    """Validate one CSV row; returns (product values, warehouse stock) or raises ValueError."""
+    name = sanitize_string(row.get('Name'))
+    if not is_valid_string(name):
+        raise ValueError("Name is required and must be at most 255 characters")
+
+    try:
+        price = float(row.get('Price'))
+    except (TypeError, ValueError):
+        raise ValueError("Price must be a valid number")
+    if not is_valid_price(price):
+        raise ValueError("Price must not be negative")
+
+    try:
+        stock_quantity = int(row.get('StockQuantity'))
+    except (TypeError, ValueError):
+        raise ValueError("StockQuantity must be a valid integer")
+    if not is_valid_quantity(stock_quantity):
+        raise ValueError("StockQuantity must not be negative")
+
+    product = (
+        name,
+        sanitize_string(row.get('Description')),
+        price,
+        sanitize_string(row.get('Size')),
+        sanitize_string(row.get('Color')),
+        sanitize_string(row.get('Material')),
+        stock_quantity,
+        _optional_id(row, 'CategoryID'),
+        _optional_id(row, 'SubCategoryID'),
+    )
+    return product, parse_warehouse_stock(row.get('WarehouseStock'))
+
+
+def open_csv(binary_stream):
+    """Read a CSV upload incrementally; fails fast if required columns are missing."""
+    text_stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text_stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+    return reader
+
+
+class ImportReport:
+    """Counts and per-row errors for one import."""
+
+    def __init__(self, max_errors=MAX_REPORTED_ERRORS):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def add_error(self, row_number, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row_number, "error": message})
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _insert_chunk(cursor, chunk):
+    # Explicit ProductIDs, taken under the write lock, tie each product to its
+    # warehouse rows without needing lastrowid for every executemany row
+    cursor.execute("SELECT COALESCE(MAX(ProductID), 0) FROM Product")
+    next_id = cursor.fetchone()[0] + 1
+
+    products, warehouse_rows = [], []
+    for offset, (_, product, warehouse_stock) in enumerate(chunk):
+        product_id = next_id + offset
+        products.append((product_id,) + product)
+        warehouse_rows.extend(
+            (product_id, stock["warehouse_id"], stock["quantity"]) for stock in warehouse_stock
+        )
+
+    cursor.executemany(PRODUCT_INSERT, products)
+    cursor.executemany(WAREHOUSE_INSERT, warehouse_rows)
+
+
+def _write_chunk(conn, chunk, report):
+    """Insert a chunk in one transaction; a chunk the database rejects is retried row by row."""
+    cursor = conn.cursor()
+    begin_write(conn)
+    try:
+        _insert_chunk(cursor, chunk)
+        conn.commit()
+        report.imported += len(chunk)
+        return
+    except sqlite3.IntegrityError:
+        conn.rollback()
+
+    # Find the offending rows so the rest of the chunk still gets in
+    for entry in chunk:
+        begin_write(conn)
+        try:
+            _insert_chunk(cursor, [entry])
+            conn.commit()
+            report.imported += 1
+        except sqlite3.IntegrityError as e:
+            conn.rollback()
+            report.add_error(entry[0], str(e))
+
+
+def import_products_csv(conn, binary_stream, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Stream products from a CSV file into the database.
+
+    Rows are validated as they are read and written in chunks of
+    ``chunk_size`` with executemany, one committed transaction per chunk.
+    Invalid rows are skipped and listed in the report by their line number.
+    ``progress``, if given, is called with the report after every chunk.
+    """
+    reader = open_csv(binary_stream)
+    report = ImportReport()
+    chunk = []
+
+    for row in reader:
+        report.rows += 1
+        try:
+            product, warehouse_stock = parse_product_row(row)
+        except ValueError as e:
+            report.add_error(reader.line_num, str(e))
+            continue
+
+        chunk.append((reader.line_num, product, warehouse_stock))
+        if len(chunk) >= chunk_size:
+            _write_chunk(conn, chunk, report)
+            chunk = []
+            if progress:
+                progress(report)
+
+    if chunk:
+        _write_chunk(conn, chunk, report)
+    if progress:
+        progress(report)
+    return report
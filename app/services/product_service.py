@@ -0,0 +1,66 @@
+import json
+
+# Product row plus its warehouse stock, images and category names in a single
+# statement; the one-to-many parts are folded into JSON arrays by SQLite.
+PRODUCT_DETAILS_QUERY = """
+    SELECT
+        p.ProductID, p.Name, p.Description, p.Price, p.Size, p.Color, p.Material,
+        p.StockQuantity, p.CategoryID, p.SubCategoryID, p.Featured,
+        c.Name AS CategoryName,
+        sc.Name AS SubCategoryName,
+        (
+            SELECT json_group_array(json_object('warehouse_id', pw.WarehouseID, 'quantity', pw.StockQuantity))
+            FROM Product_Warehouse pw
+            WHERE pw.ProductID = p.ProductID
+        ) AS WarehouseStock,
+        (
+            SELECT json_group_array(pi.ImageURL)
+            FROM Product_Image pi
+            WHERE pi.ProductID = p.ProductID
+        ) AS Images
+    FROM Product p
+    LEFT JOIN Category c ON c.CategoryID = p.CategoryID
+    LEFT JOIN SubCategory sc ON sc.SubCategoryID = p.SubCategoryID
+    WHERE p.ProductID IN ({placeholders})
+"""
+
+
+def _format_product_details(row):
+    product_details = {
+        "product_id": row["ProductID"],
+        "name": row["Name"],
+        "description": row["Description"],
+        "price": row["Price"],
+        "size": row["Size"],
+        "color": row["Color"],
+        "material": row["Material"],
+        "stock_quantity": row["StockQuantity"],
+        "category_id": row["CategoryID"],
+        "sub_category_id": row["SubCategoryID"],
+        "featured": bool(row["Featured"]),
+        "warehouse_stock": json.loads(row["WarehouseStock"]),
+        "images": json.loads(row["Images"]),
+    }
+    if row["CategoryName"] is not None:
+        product_details["category_name"] = row["CategoryName"]
+    if row["SubCategoryName"] is not None:
+        product_details["sub_category_name"] = row["SubCategoryName"]
+    return product_details
+
+
+# Fetch full details for many products in one query
+def load_products_details(cursor, product_ids):
+    """Return {product_id: details} for the given IDs; unknown IDs are left out."""
+    product_ids = list(dict.fromkeys(product_ids))  # Drop duplicates, keep order
+    if not product_ids:
+        return {}
+
+    placeholders = ", ".join("?" for _ in product_ids)
+    cursor.execute(PRODUCT_DETAILS_QUERY.format(placeholders=placeholders), product_ids)
+    return {row["ProductID"]: _format_product_details(row) for row in cursor.fetchall()}
+
+
+# Fetch full details for a single product
+def load_product_details(cursor, product_id):
+    """Return the details for one product, or None if it does not exist."""
+    return load_products_details(cursor, [product_id]).get(product_id)
@@ -0,0 +1,287 @@
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+from db import begin_write, get_db_connection
+from app.services.order_service import (
+    OrderError, allocate_warehouses, check_stock, check_user, claim_stock,
+    normalize_order_lines, record_order
+)
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _now():
+    return datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+
+
+def reserve_stock(conn, user_id, products, ttl, strategy='nearest', ship_to=None, now=None):
+    """Hold stock for a checkout; returns (reservation_id, expires_at).
+
+    The units are allocated to warehouses like an order and added to
+    ReservedQuantity on Product and Product_Warehouse with guarded UPDATEs
+    (unreserved stock >= quantity), so concurrent holds can never promise
+    the same units twice. Nothing leaves stock until commit_reservation;
+    holds not committed within ``ttl`` seconds are returned by
+    release_expired.
+    """
+    lines = normalize_order_lines(products)
+    if not lines:
+        raise OrderError("User ID and product list are required")
+    now = now or datetime.utcnow()
+    created_at = now.strftime(TIMESTAMP_FORMAT)
+    expires_at = (now + timedelta(seconds=ttl)).strftime(TIMESTAMP_FORMAT)
+    reservation_id = uuid.uuid4().hex
+
+    cursor = conn.cursor()
+    check_user(cursor, user_id)
+
+    begin_write(conn)
+    try:
+        check_stock(cursor, lines)
+        allocations = allocate_warehouses(cursor, lines, strategy, ship_to)
+        claim_stock(cursor, lines, allocations, "ReservedQuantity = ReservedQuantity + ?")
+
+        cursor.execute(
+            "INSERT INTO Stock_Reservation (ReservationID, UserID, Status, CreatedAt, ExpiresAt) VALUES (?, ?, 'Held', ?, ?)",
+            (reservation_id, user_id, created_at, expires_at)
+        )
+        # One line per warehouse; products not stocked per warehouse get a
+        # single line without one
+        reserved = []
+        for product_id, quantity in lines.items():
+            if product_id in allocations:
+                reserved.extend(
+                    (reservation_id, product_id, warehouse_id, units)
+                    for warehouse_id, (units, _) in allocations[product_id].items()
+                )
+            else:
+                reserved.append((reservation_id, product_id, None, quantity))
+        cursor.executemany(
+            "INSERT INTO Stock_Reservation_Line (ReservationID, ProductID, WarehouseID, Quantity) VALUES (?, ?, ?, ?)",
+            reserved
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return reservation_id, expires_at
+
+
+def _held_reservation(cursor, reservation_id):
+    cursor.execute(
+        "SELECT UserID, Status, ExpiresAt FROM Stock_Reservation WHERE ReservationID = ?",
+        (reservation_id,)
+    )
+    reservation = cursor.fetchone()
+    if not reservation:
+        raise OrderError("Reservation not found", 404)
+    if reservation["Status"] != 'Held':
+        raise OrderError(f"Reservation is already {reservation['Status'].lower()}", 409)
+    return reservation
+
+
+def _reserved_lines(cursor, reservation_ids):
+    placeholders = ", ".join("?" for _ in reservation_ids)
+    cursor.execute(
+        f"SELECT ProductID, WarehouseID, Quantity FROM Stock_Reservation_Line WHERE ReservationID IN ({placeholders})",
+        list(reservation_ids)
+    )
+    return cursor.fetchall()
+
+
+def _release(cursor, reservation_ids, status):
+    """Give the units of Held reservations back and mark them ``status``."""
+    products, warehouses = Counter(), Counter()
+    for line in _reserved_lines(cursor, reservation_ids):
+        products[line["ProductID"]] += line["Quantity"]
+        if line["WarehouseID"] is not None:
+            warehouses[line["WarehouseID"], line["ProductID"]] += line["Quantity"]
+
+    cursor.executemany(
+        "UPDATE Product SET ReservedQuantity = ReservedQuantity - ? WHERE ProductID = ?",
+        [(quantity, product_id) for product_id, quantity in products.items()]
+    )
+    cursor.executemany(
+        "UPDATE Product_Warehouse SET ReservedQuantity = ReservedQuantity - ? WHERE WarehouseID = ? AND ProductID = ?",
+        [(quantity, warehouse_id, product_id) for (warehouse_id, product_id), quantity in warehouses.items()]
+    )
+    placeholders = ", ".join("?" for _ in reservation_ids)
+    cursor.execute(
+        f"UPDATE Stock_Reservation SET Status = ? WHERE ReservationID IN ({placeholders}) AND Status = 'Held'",
+        [status, *reservation_ids]
+    )
+
+
+def commit_reservation(conn, reservation_id, order_date=None):
+    """Turn a held reservation into an order; returns (order_id, lines).
+
+    The reserved units leave StockQuantity and ReservedQuantity together,
+    at the warehouses chosen when they were reserved, and the order is
+    priced and logged like place_order. An expired hold, or one for a
+    product deleted since, is released and refused with a 410.
+    """
+    order_date = order_date or _now()
+    cursor = conn.cursor()
+
+    begin_write(conn)
+    try:
+        reservation = _held_reservation(cursor, reservation_id)
+        if reservation["ExpiresAt"] <= order_date:
+            _release(cursor, [reservation_id], 'Expired')
+            conn.commit()
+            raise OrderError("Reservation has expired", 410)
+
+        reserved = _reserved_lines(cursor, [reservation_id])
+        lines = Counter()
+        for line in reserved:
+            lines[line["ProductID"]] += line["Quantity"]
+        lines = dict(lines)
+
+        # Stock on hand before the decrement, for the Inventory_Log levels
+        placeholders = ", ".join("?" for _ in lines)
+        cursor.execute(
+            f"SELECT ProductID, Price, StockQuantity FROM Product WHERE ProductID IN ({placeholders})",
+            list(lines)
+        )
+        stock = {row["ProductID"]: row for row in cursor.fetchall()}
+        cursor.execute(
+            f"SELECT ProductID, WarehouseID, StockQuantity FROM Product_Warehouse WHERE ProductID IN ({placeholders})",
+            list(lines)
+        )
+        on_hand = {(row["ProductID"], row["WarehouseID"]): row["StockQuantity"] for row in cursor.fetchall()}
+
+        # A product (or its stock at a held warehouse) deleted while the hold
+        # was open cannot be sold; give the rest back like an expired hold
+        missing = {
+            line["ProductID"] for line in reserved
+            if line["ProductID"] not in stock
+            or (line["WarehouseID"] is not None and (line["ProductID"], line["WarehouseID"]) not in on_hand)
+        }
+        if missing:
+            _release(cursor, [reservation_id], 'Released')
+            conn.commit()
+            raise OrderError(f"Products no longer available: {', '.join(map(str, sorted(missing)))}", 410)
+
+        total_amount = sum(stock[product_id]["Price"] * quantity for product_id, quantity in lines.items())
+        allocations = {}
+        for line in reserved:
+            if line["WarehouseID"] is not None:
+                allocations.setdefault(line["ProductID"], {})[line["WarehouseID"]] = (
+                    line["Quantity"], on_hand[line["ProductID"], line["WarehouseID"]]
+                )
+
+        cursor.executemany(
+            """
+            UPDATE Product SET StockQuantity = StockQuantity - ?, ReservedQuantity = ReservedQuantity - ?
+            WHERE ProductID = ?
+            """,
+            [(quantity, quantity, product_id) for product_id, quantity in lines.items()]
+        )
+        cursor.executemany(
+            """
+            UPDATE Product_Warehouse SET StockQuantity = StockQuantity - ?, ReservedQuantity = ReservedQuantity - ?
+            WHERE WarehouseID = ? AND ProductID = ?
+            """,
+            [
+                (units, units, warehouse_id, product_id)
+                for product_id, allocation in allocations.items()
+                for warehouse_id, (units, _) in allocation.items()
+            ]
+        )
+
+        order_id = record_order(
+            cursor, reservation["UserID"], lines, stock, allocations, total_amount, order_date
+        )
+        cursor.execute(
+            "UPDATE Stock_Reservation SET Status = 'Committed', OrderID = ? WHERE ReservationID = ?",
+            (order_id, reservation_id)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return order_id, lines
+
+
+def release_reservation(conn, reservation_id):
+    """Cancel a held reservation and give its units back."""
+    cursor = conn.cursor()
+    begin_write(conn)
+    try:
+        _held_reservation(cursor, reservation_id)
+        _release(cursor, [reservation_id], 'Released')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def release_expired(conn, now=None, limit=500):
+    """Release up to ``limit`` holds past their expiry in one transaction; returns how many."""
+    now = now or _now()
+    cursor = conn.cursor()
+    begin_write(conn)
+    try:
+        cursor.execute(
+            "SELECT ReservationID FROM Stock_Reservation WHERE Status = 'Held' AND ExpiresAt <= ? LIMIT ?",
+            (now, limit)
+        )
+        expired = [row["ReservationID"] for row in cursor.fetchall()]
+        if expired:
+            _release(cursor, expired, 'Expired')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(expired)
+
+
+class ReservationSweeper:
+    """Background thread that releases expired stock reservations.
+
+    Started by create_app unless RESERVATION_SWEEPER_ENABLED is off, so
+    holds abandoned before a restart are released even if no new
+    reservation is made. Every ``interval`` seconds it releases expired
+    holds in batches of ``batch_size``, each batch in its own short write
+    transaction so checkouts are never kept waiting behind a long sweep.
+    """
+
+    def __init__(self, interval=30, batch_size=500):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def configure(self, interval=None, batch_size=None):
+        if interval is not None:
+            self.interval = interval
+        if batch_size is not None:
+            self.batch_size = batch_size
+
+    def start(self, app):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(app,), name='reservation-sweeper', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self, app):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with app.app_context():
+                    conn = get_db_connection()
+                    while release_expired(conn, limit=self.batch_size) == self.batch_size:
+                        pass
+            except Exception as e:
+                app.logger.error(f"Reservation sweep failed: {e}")
+
+
+reservation_sweeper = ReservationSweeper()
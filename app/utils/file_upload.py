@@ -1,8 +1,12 @@
 import os
+import re
+import hashlib
+import uuid
 from werkzeug.utils import secure_filename
 from flask import current_app
 import sqlite3
-from db import get_db_connection
+from db import get_db_connection, begin_write
+from app.utils.image_processing import IMAGE_VARIANTS, IMAGE_FORMATS, variant_path
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'csv'}
 
@@ -19,40 +23,152 @@ def save_uploaded_image(file):
         return upload_path
     return None
 
+# Product images are stored once per distinct content, under their SHA-256:
+# images/ab/cd/abcd....jpg. A stored file never changes, and Image_Blob
+# counts the Product_Image rows that point at it.
+IMAGE_STORE = 'images'
+HASH_CHUNK_SIZE = 64 * 1024
+STORED_IMAGE_PATTERN = re.compile(rf'^{IMAGE_STORE}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/([0-9a-f]{{64}})\.\w+$')
+
+
+def content_addressed_path(digest, extension):
+    return f"{IMAGE_STORE}/{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+
+def stored_image_hash(file_path):
+    """The SHA-256 in a content-addressed image path, or None for any other path."""
+    match = STORED_IMAGE_PATTERN.match(file_path)
+    return match.group(1) if match else None
+
+
 def save_image_to_server(file, product_id):
+    """Store an uploaded image by content hash; returns its path relative to uploads.
+
+    The upload is hashed while it is copied to a temporary file. If the same
+    content is already stored, the copy is dropped and the existing path is
+    returned, so duplicates cost no extra disk.
+    """
     if file and allowed_file(file.filename):
-        # Generate a secure filename
-        filename = secure_filename(file.filename)
-        
-        # Define the path based on product ID for better organization
-        product_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'products', str(product_id))
-        
-        # Ensure the product-specific upload directory exists
-        os.makedirs(product_folder, exist_ok=True)
-        
-        # Full path where the file will be saved
-        file_path = os.path.join(product_folder, filename)
-        
-        # Save the file to the organized folder
-        file.save(file_path)
-        
-        # Return the relative path from 'uploads' folder to store in the database
-        return f"products/{product_id}/{filename}"
-    return None
+        extension = secure_filename(file.filename).rsplit('.', 1)[1].lower()
+        extension = 'jpg' if extension == 'jpeg' else extension
+        upload_folder = current_app.config['UPLOAD_FOLDER']
 
+        temp_folder = os.path.join(upload_folder, IMAGE_STORE, 'tmp')
+        os.makedirs(temp_folder, exist_ok=True)
+        temp_path = os.path.join(temp_folder, f"{uuid.uuid4().hex}.{extension}")
+
+        digest = hashlib.sha256()
+        with open(temp_path, 'wb') as temp_file:
+            for chunk in iter(lambda: file.stream.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                temp_file.write(chunk)
+
+        file_path = content_addressed_path(digest.hexdigest(), extension)
+        full_path = os.path.join(upload_folder, file_path)
+        if os.path.exists(full_path):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            os.replace(temp_path, full_path)
+        return file_path
+    return None
 
 
 def save_image_path_to_database(product_id, file_path):
-    # Set a longer timeout specifically for this function
+    """Link a stored image to a product and count the reference; returns the ImageID."""
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
+        # Retries with backoff while another request holds the write lock
+        begin_write(conn)
         cursor.execute(
             "INSERT INTO Product_Image (ProductID, ImageURL) VALUES (?, ?)",
             (product_id, file_path)
         )
+        image_id = cursor.lastrowid
+        if file_path.startswith(IMAGE_STORE + '/'):
+            # Checked under the write lock: a product delete may have removed
+            # the last reference and the file since it was stored
+            if not os.path.exists(os.path.join(current_app.config['UPLOAD_FOLDER'], file_path)):
+                raise Exception("Image was removed while uploading, please try again")
+            cursor.execute("""
+                INSERT INTO Image_Blob (FilePath, RefCount) VALUES (?, 1)
+                ON CONFLICT (FilePath) DO UPDATE SET RefCount = RefCount + 1
+            """, (file_path,))
         conn.commit()
+        return image_id
     except sqlite3.OperationalError:
         raise Exception("Database is locked, please try again")
     finally:
         conn.close()
+
+
+def release_product_images(cursor, product_id):
+    """Unlink a product's images inside the caller's write transaction.
+
+    Returns the stored files that are no longer referenced. They are not
+    deleted here: pass them to remove_unreferenced_images once the
+    transaction has committed, so a rollback never loses a file.
+    """
+    cursor.execute("SELECT ImageID, ImageURL FROM Product_Image WHERE ProductID = ?", (product_id,))
+    images = cursor.fetchall()
+    if not images:
+        return []
+
+    image_ids = [image["ImageID"] for image in images]
+    placeholders = ", ".join("?" for _ in image_ids)
+    cursor.execute(f"DELETE FROM Product_Image_Variant WHERE ImageID IN ({placeholders})", image_ids)
+    cursor.execute(f"DELETE FROM Product_Image WHERE ImageID IN ({placeholders})", image_ids)
+
+    released = [image["ImageURL"] for image in images if image["ImageURL"].startswith(IMAGE_STORE + '/')]
+    cursor.executemany("UPDATE Image_Blob SET RefCount = RefCount - 1 WHERE FilePath = ?", [(path,) for path in released])
+
+    unreferenced = []
+    for file_path in set(released):
+        cursor.execute("SELECT RefCount FROM Image_Blob WHERE FilePath = ?", (file_path,))
+        blob = cursor.fetchone()
+        if blob and blob["RefCount"] <= 0:
+            cursor.execute("DELETE FROM Image_Blob WHERE FilePath = ?", (file_path,))
+            unreferenced.append(file_path)
+
+    return unreferenced
+
+
+def remove_unreferenced_images(conn, file_paths):
+    """Delete files released by release_product_images; returns the deleted paths.
+
+    Call after committing the release. The files are deleted under the
+    write lock, skipping any that an upload of the same content has
+    referenced again since, so a concurrent upload either keeps the file
+    alive or notices it is gone.
+    """
+    if not file_paths:
+        return []
+    cursor = conn.cursor()
+    placeholders = ", ".join("?" for _ in file_paths)
+    begin_write(conn)
+    try:
+        cursor.execute(f"SELECT FilePath FROM Image_Blob WHERE FilePath IN ({placeholders})", list(file_paths))
+        referenced = {row["FilePath"] for row in cursor.fetchall()}
+        unreferenced = [file_path for file_path in file_paths if file_path not in referenced]
+        _remove_image_files(unreferenced)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return unreferenced
+
+
+def _remove_image_files(file_paths):
+    # The stored image plus every resized variant rendered from it
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    for file_path in file_paths:
+        paths = [file_path] + [
+            variant_path(file_path, variant, image_format)
+            for variant in IMAGE_VARIANTS for image_format in IMAGE_FORMATS
+        ]
+        for path in paths:
+            try:
+                os.remove(os.path.join(upload_folder, path))
+            except FileNotFoundError:
+                pass
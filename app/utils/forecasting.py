@@ -0,0 +1,133 @@
+# app/utils/forecasting.py
+import numpy as np
+
+DEFAULT_HORIZON = 1
+MAX_HORIZON = 24
+SEASON_LENGTH = 12  # Months
+
+
+def build_sales_matrix(product_ids, month_indexes, quantities, end_month=None):
+    """Turn (product, month, quantity) sales rows into a dense product x month matrix.
+
+    Month indexes count months (year * 12 + month - 1). The matrix covers
+    every month from the earliest sale up to ``end_month`` (default: the
+    latest sale); months without sales are zero. Returns
+    (products, first_month, matrix) with one row per product in ``products``.
+    """
+    product_ids = np.asarray(product_ids, dtype=np.int64)
+    month_indexes = np.asarray(month_indexes, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    if not len(product_ids):
+        return product_ids, 0, np.zeros((0, 0))
+
+    first_month = int(month_indexes.min())
+    last_month = int(month_indexes.max()) if end_month is None else max(int(end_month), first_month)
+    months = last_month - first_month + 1
+
+    products, rows = np.unique(product_ids, return_inverse=True)
+    columns = month_indexes - first_month
+    in_range = columns < months
+    cells = np.bincount(
+        rows[in_range] * months + columns[in_range],
+        weights=quantities[in_range],
+        minlength=len(products) * months
+    )
+    return products, first_month, cells.reshape(len(products), months)
+
+
+def first_sale_columns(matrix):
+    """Column of each product's first month with sales (0 for products with none)."""
+    return np.argmax(matrix > 0, axis=1)
+
+
+def demand_deviation(matrix):
+    """Standard deviation of each product's monthly sales since its first sale."""
+    products, months = matrix.shape
+    since_first = np.arange(months) >= first_sale_columns(matrix)[:, None]
+    counts = since_first.sum(axis=1)
+    means = np.where(since_first, matrix, 0).sum(axis=1) / np.maximum(counts, 1)
+    squares = np.where(since_first, (matrix - means[:, None]) ** 2, 0).sum(axis=1)
+    return np.sqrt(squares / np.maximum(counts - 1, 1))
+
+
+def moving_average(matrix, horizon=DEFAULT_HORIZON, window=3):
+    """Average of each product's last ``window`` months, held flat over the horizon.
+
+    Products with a shorter history are averaged over the months since their
+    first sale.
+    """
+    products, months = matrix.shape
+    history = months - first_sale_columns(matrix)
+    counts = np.minimum(window, history)
+    totals = np.concatenate([np.zeros((products, 1)), np.cumsum(matrix, axis=1)], axis=1)
+    recent = totals[:, months] - totals[np.arange(products), months - counts]
+    level = recent / np.maximum(counts, 1)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def exponential_smoothing(matrix, horizon=DEFAULT_HORIZON, alpha=0.5):
+    """Simple exponential smoothing from each product's first sale, held flat over the horizon."""
+    products, months = matrix.shape
+    first = first_sale_columns(matrix)
+    level = matrix[np.arange(products), first]
+    for column in range(months):
+        level = np.where(column > first, alpha * matrix[:, column] + (1 - alpha) * level, level)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def holt_winters(matrix, horizon=DEFAULT_HORIZON, alpha=0.4, beta=0.1, gamma=0.3, season_length=SEASON_LENGTH):
+    """Additive Holt-Winters (level, trend and seasonality) for every product at once.
+
+    Each product starts at its first sale: the first season sets the level
+    and seasonal offsets, the second the initial trend. Products with less
+    than two seasons of history fall back to exponential smoothing.
+    Forecasts are never negative.
+    """
+    products, months = matrix.shape
+    rows = np.arange(products)
+    first = first_sale_columns(matrix)
+    seasonal_rows = months - first >= 2 * season_length
+
+    window = matrix[rows[:, None], np.minimum(first[:, None] + np.arange(2 * season_length), months - 1)]
+    first_season = window[:, :season_length].mean(axis=1)
+    level = first_season
+    trend = (window[:, season_length:].mean(axis=1) - first_season) / season_length
+    seasonal = window[:, :season_length] - first_season[:, None]
+
+    for column in range(months):
+        active = seasonal_rows & (column >= first + season_length)
+        if not active.any():
+            continue
+        observed = matrix[:, column]
+        position = (column - first) % season_length
+        season = seasonal[rows, position]
+        new_level = alpha * (observed - season) + (1 - alpha) * (level + trend)
+        trend = np.where(active, beta * (new_level - level) + (1 - beta) * trend, trend)
+        seasonal[rows[active], position[active]] = (
+            gamma * (observed - new_level) + (1 - gamma) * season
+        )[active]
+        level = np.where(active, new_level, level)
+
+    steps = np.arange(1, horizon + 1)
+    positions = (months - first[:, None] + steps - 1) % season_length
+    forecast = level[:, None] + steps * trend[:, None] + seasonal[rows[:, None], positions]
+    forecast = np.where(seasonal_rows[:, None], forecast, exponential_smoothing(matrix, horizon))
+    return np.maximum(forecast, 0)
+
+
+FORECAST_MODELS = {
+    'moving_average': moving_average,
+    'exponential_smoothing': exponential_smoothing,
+    'holt_winters': holt_winters,
+}
+
+
+def forecast_demand(matrix, model='moving_average', horizon=DEFAULT_HORIZON):
+    """Forecast ``horizon`` months for every row of a sales matrix; returns a products x horizon array."""
+    if model not in FORECAST_MODELS:
+        raise ValueError(f"Unsupported forecast model '{model}'")
+    if not 1 <= horizon <= MAX_HORIZON:
+        raise ValueError(f"Forecast horizon must be between 1 and {MAX_HORIZON} months")
+    if not matrix.size:
+        return np.zeros((matrix.shape[0], horizon))
+    return FORECAST_MODELS[model](matrix, horizon)
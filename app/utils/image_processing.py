@@ -0,0 +1,69 @@
+# app/utils/image_processing.py
+import os
+from PIL import Image, ImageOps
+
+# Longest edge in pixels for each responsive variant
+IMAGE_VARIANTS = {
+    "thumbnail": 160,
+    "card": 480,
+    "full": 1200,
+}
+
+# Pillow format name and encoder options for each output format
+IMAGE_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def variant_path(image_path, variant, image_format):
+    """Path of a variant next to its original: products/1/a.png -> products/1/variants/a_png_card.webp
+
+    The original's extension is part of the name, so stored files that only
+    differ by extension (the same bytes uploaded as .png and .jpg) never
+    share variants.
+    """
+    folder, filename = os.path.split(image_path)
+    stem, extension = os.path.splitext(filename)
+    return os.path.join(folder, 'variants', f"{stem}_{extension.lstrip('.')}_{variant}.{image_format}")
+
+
+def render_image_variants(upload_folder, image_path):
+    """Write every variant/format of an uploaded image and describe them.
+
+    Needs no app context, so it can run in a worker process. Images are
+    never upscaled; a variant wider than the original keeps its size.
+    """
+    with Image.open(os.path.join(upload_folder, image_path)) as original:
+        original = ImageOps.exif_transpose(original)
+        has_alpha = original.mode in ('RGBA', 'LA') or 'transparency' in original.info
+        base = original.convert('RGBA' if has_alpha else 'RGB')
+
+    variants = []
+    for variant, max_edge in IMAGE_VARIANTS.items():
+        resized = base.copy()
+        resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        for image_format, (pillow_format, options) in IMAGE_FORMATS.items():
+            image = resized
+            if pillow_format == 'JPEG' and image.mode == 'RGBA':
+                # JPEG has no alpha channel, flatten onto white
+                image = Image.new('RGB', resized.size, (255, 255, 255))
+                image.paste(resized, mask=resized.split()[-1])
+
+            relative_path = variant_path(image_path, variant, image_format)
+            output_path = os.path.join(upload_folder, relative_path)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            temp_path = f"{output_path}.{os.getpid()}.tmp"
+            image.save(temp_path, pillow_format, **options)
+            os.replace(temp_path, output_path)
+
+            variants.append({
+                "variant": variant,
+                "format": image_format,
+                "width": image.width,
+                "height": image.height,
+                "file_path": relative_path,
+                "file_size": os.path.getsize(output_path),
+            })
+    return variants
@@ -1,88 +1,241 @@
+import logging
+from datetime import datetime, timedelta
 
-LOW_STOCK_THRESHOLD = 5  # Customize this threshold as needed
+import numpy as np
+from db import begin_write
+from app.utils.forecasting import DEFAULT_HORIZON, build_sales_matrix, forecast_demand
 
-from db import get_db_connection
+LOW_STOCK_THRESHOLD = 5  # Default for products without their own LowStockThreshold
+LOW_STOCK_ALERT_COOLDOWN = 3600  # Seconds before a warehouse is alerted again for a product
 
-LOW_STOCK_THRESHOLD = 5  # Customize this threshold as needed
 
-from db import get_db_connection
-import logging
+def evaluate_low_stock(conn, product_ids, threshold=LOW_STOCK_THRESHOLD, cooldown=LOW_STOCK_ALERT_COOLDOWN, now=None):
+    """Raise low-stock alerts for every warehouse of the given products; returns the new alerts.
 
-def check_and_alert_low_stock(product_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    All Product_Warehouse rows of the products are checked in one query
+    against each product's LowStockThreshold (``threshold`` when NULL). A
+    warehouse already alerted for the product within the last ``cooldown``
+    seconds is skipped. New alerts are written to Inventory_Log in a single
+    write transaction, so concurrent evaluations cannot alert twice.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return []
+    now = now or datetime.utcnow()
+    timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+    alerted_since = (now - timedelta(seconds=cooldown)).strftime('%Y-%m-%d %H:%M:%S')
+    placeholders = ", ".join("?" for _ in product_ids)
 
-    # Check current stock levels of the product across all warehouses
-    cursor.execute("""
-        SELECT pw.WarehouseID, p.Name AS ProductName, pw.StockQuantity
-        FROM Product_Warehouse pw
-        JOIN Product p ON pw.ProductID = p.ProductID
-        WHERE pw.ProductID = ?
-    """, (product_id,))
-    stock_levels = cursor.fetchall()
-
-    low_stock_alerts = []
-
-    # Identify warehouses with low stock and log alerts
-    for stock in stock_levels:
-        warehouse_id = stock["WarehouseID"]
-        stock_quantity = stock["StockQuantity"]
-
-        if stock_quantity < LOW_STOCK_THRESHOLD:
-            low_stock_alerts.append({
-                "product_id": product_id,
-                "product_name": stock["ProductName"],
-                "warehouse_id": warehouse_id,
-                "stock_quantity": stock_quantity
-            })
-            # Log low stock alert in Inventory_Log
-            cursor.execute("""
-                INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp, WarehouseID, StockLevel)
-                VALUES (?, ?, 'Low Stock Alert', datetime('now'), ?, ?)
-            """, (product_id, stock_quantity, warehouse_id, stock_quantity))
-            conn.commit()
+    cursor = conn.cursor()
+    begin_write(conn)
+    try:
+        cursor.execute(f"""
+            SELECT pw.ProductID, p.Name AS ProductName, pw.WarehouseID, pw.StockQuantity
+            FROM Product_Warehouse pw
+            JOIN Product p ON pw.ProductID = p.ProductID
+            WHERE pw.ProductID IN ({placeholders})
+                AND pw.StockQuantity < COALESCE(p.LowStockThreshold, ?)
+                AND NOT EXISTS (
+                    SELECT 1 FROM Inventory_Log il
+                    WHERE il.ProductID = pw.ProductID AND il.WarehouseID = pw.WarehouseID
+                        AND il.ChangeType = 'Low Stock Alert' AND il.Timestamp >= ?
+                )
+            ORDER BY pw.ProductID, pw.WarehouseID
+        """, [*product_ids, threshold, alerted_since])
+        low_stock_alerts = [
+            {
+                "product_id": row["ProductID"],
+                "product_name": row["ProductName"],
+                "warehouse_id": row["WarehouseID"],
+                "stock_quantity": row["StockQuantity"]
+            }
+            for row in cursor.fetchall()
+        ]
 
-    conn.close()
+        cursor.executemany("""
+            INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp, WarehouseID, StockLevel)
+            VALUES (?, ?, 'Low Stock Alert', ?, ?, ?)
+        """, [
+            (alert["product_id"], alert["stock_quantity"], timestamp, alert["warehouse_id"], alert["stock_quantity"])
+            for alert in low_stock_alerts
+        ])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
 
     # Return low stock alerts for optional notification purposes
     return low_stock_alerts
 
-def calculate_inventory_turnover(cursor):
+# Turnover periods: the label of the period a timestamp falls in. Weeks run
+# Monday to Sunday and are labelled by their Monday.
+TURNOVER_PERIODS = {
+    'month': "strftime('%Y-%m', {column})",
+    'week': "date({column}, 'weekday 0', '-6 days')",
+}
+
+# Breakdowns: the joins (on Product p), group columns, weight and matching
+# key for each grouping. Orders and most log entries are not tied to a
+# warehouse, so a product's COGS and inventory value are split across
+# warehouses by its share of current stock (evenly when it has none).
+TURNOVER_BREAKDOWNS = {
+    None: {
+        'join': "",
+        'columns': "NULL AS GroupKey",
+        'group': "NULL",
+        'weight': "1",
+        'key': None,
+    },
+    'category': {
+        'join': "LEFT JOIN Category c ON c.CategoryID = p.CategoryID",
+        'columns': "p.CategoryID AS CategoryID, c.Name AS CategoryName",
+        'group': "p.CategoryID",
+        'weight': "1",
+        'key': 'CategoryID',
+    },
+    'warehouse': {
+        'join': "LEFT JOIN warehouse_share ws ON ws.ProductID = p.ProductID",
+        'columns': "ws.WarehouseID AS WarehouseID",
+        'group': "ws.WarehouseID",
+        'weight': "COALESCE(ws.Share, 1)",
+        'key': 'WarehouseID',
+    },
+}
+
+WAREHOUSE_SHARE = """
+    warehouse_share AS (
+        SELECT
+            ProductID,
+            WarehouseID,
+            COALESCE(
+                StockQuantity * 1.0 / NULLIF(SUM(StockQuantity) OVER (PARTITION BY ProductID), 0),
+                1.0 / COUNT(*) OVER (PARTITION BY ProductID)
+            ) AS Share
+        FROM Product_Warehouse
+    ),
+"""
+
+
+def _turnover_row(period_key, period, cogs, avg_inventory):
+    cogs = cogs or 0
+    # Periods without inventory logs count as an average of 1, as before
+    if avg_inventory is None:
+        avg_inventory = 1
+    return {
+        period_key: period,
+        'cogs': cogs,
+        'average_inventory': avg_inventory,
+        'turnover_rate': cogs / avg_inventory if avg_inventory else 0,
+    }
+
+
+def _date_filter(column, start_date, end_date, params):
+    conditions = []
+    if start_date:
+        conditions.append(f"{column} >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append(f"{column} < date(?, '+1 day')")
+        params.append(end_date)
+    return "".join(f" AND {condition}" for condition in conditions)
+
+
+def calculate_inventory_turnover(cursor, start_date=None, end_date=None, granularity='month', breakdown=None):
+    """Inventory turnover (COGS / average inventory value) per period.
+
+    Only periods with delivered sales are reported. Dates are inclusive
+    YYYY-MM-DD strings; granularity is 'month' or 'week' and breakdown is
+    None, 'category' or 'warehouse'. The plain monthly report is read from
+    the summary tables that triggers keep current (see
+    migrations/versions/f5a0c3e8b214), and monthly breakdowns without dates
+    take their COGS from Product_Sales_Monthly; anything else is one
+    aggregation over the raw rows, bounded by the date indexes.
+    """
+    if granularity not in TURNOVER_PERIODS:
+        raise ValueError(f"Unsupported granularity '{granularity}'")
+    if breakdown not in TURNOVER_BREAKDOWNS:
+        raise ValueError(f"Unsupported breakdown '{breakdown}'")
+
     try:
-        # Get COGS (Cost of Goods Sold) for each month
-        cursor.execute("""
-            SELECT strftime('%Y-%m', o.OrderDate) AS Month, SUM(op.Quantity * p.CostPrice) AS COGS
-            FROM Order_Product op
-            JOIN Product p ON op.ProductID = p.ProductID
-            JOIN "Order" o ON o.OrderID = op.OrderID
-            WHERE o.OrderStatus = 'Delivered'
-            GROUP BY Month
-            ORDER BY Month
-        """)
-        cogs_data = cursor.fetchall()
-        print(cogs_data)
-        # Get average inventory value for each month
-        cursor.execute("""
-            SELECT strftime('%Y-%m', il.Timestamp) AS Month, AVG(il.StockLevel * p.CostPrice) AS AvgInventory
-            FROM Inventory_Log il
-            JOIN Product p ON il.ProductID = p.ProductID
-            GROUP BY Month
-            ORDER BY Month
-        """)
-        inventory_data = cursor.fetchall()
-        print(inventory_data)
-        # Combine data into a single list
+        if granularity == 'month' and breakdown is None and not start_date and not end_date:
+            cursor.execute("""
+                SELECT m.Month, m.COGS, m.InventoryValueSum / NULLIF(m.InventoryLogCount, 0) AS AvgInventory
+                FROM Inventory_Monthly_Stats m
+                WHERE EXISTS (
+                    SELECT 1 FROM Product_Sales_Monthly s
+                    WHERE s.Month = m.Month AND s.QuantitySold > 0
+                )
+                ORDER BY m.Month
+            """)
+            return [
+                _turnover_row('month', row['Month'], row['COGS'], row['AvgInventory'])
+                for row in cursor.fetchall()
+            ]
+
+        period = TURNOVER_PERIODS[granularity]
+        grouping = TURNOVER_BREAKDOWNS[breakdown]
+        params = []
+        sales_filter = _date_filter("o.OrderDate", start_date, end_date, params)
+        stock_filter = _date_filter("il.Timestamp", start_date, end_date, params)
+        group_key = grouping['key']
+        join_keys = "st.Period = s.Period" + (f" AND st.{group_key} IS s.{group_key}" if group_key else "")
+
+        # COGS per (period, group). Monthly breakdowns without dates start
+        # from the per-product monthly totals of the summary table, so the
+        # warehouse shares and category joins apply once per product and
+        # month instead of once per order line
+        if granularity == 'month' and not start_date and not end_date:
+            sales = f"""
+                SELECT s.Month AS Period, {grouping['columns']}, SUM(s.COGS * {grouping['weight']}) AS COGS
+                FROM Product_Sales_Monthly s
+                JOIN Product p ON p.ProductID = s.ProductID
+                {grouping['join']}
+                WHERE s.QuantitySold > 0
+                GROUP BY Period, {grouping['group']}
+            """
+        else:
+            sales = f"""
+                SELECT {period.format(column='o.OrderDate')} AS Period, {grouping['columns']},
+                    SUM(op.Quantity * p.CostPrice * {grouping['weight']}) AS COGS
+                FROM "Order" o
+                JOIN Order_Product op ON op.OrderID = o.OrderID
+                JOIN Product p ON p.ProductID = op.ProductID
+                {grouping['join']}
+                WHERE o.OrderStatus = 'Delivered'{sales_filter}
+                GROUP BY Period, {grouping['group']}
+            """
+
+        # Average inventory per (period, group), matched to COGS in one join.
+        # CROSS JOIN keeps Inventory_Log as the outer loop: read in table (or
+        # Timestamp index) order it is about twice as fast as the plan SQLite
+        # picks otherwise, which fetches each product's rows by index
+        cursor.execute(f"""
+            WITH {WAREHOUSE_SHARE if breakdown == 'warehouse' else ''}
+            sales AS ({sales}),
+            stock AS (
+                SELECT {period.format(column='il.Timestamp')} AS Period, {grouping['columns']},
+                    AVG(il.StockLevel * p.CostPrice * {grouping['weight']}) AS AvgInventory
+                FROM Inventory_Log il
+                CROSS JOIN Product p ON p.ProductID = il.ProductID
+                {grouping['join']}
+                WHERE 1 = 1{stock_filter}
+                GROUP BY Period, {grouping['group']}
+            )
+            SELECT s.*, st.AvgInventory
+            FROM sales s
+            LEFT JOIN stock st ON {join_keys}
+            ORDER BY s.Period{f", s.{group_key}" if group_key else ""}
+        """, params)
+
         turnover_data = []
-        for cogs_row in cogs_data:
-            month = cogs_row['Month']
-            cogs = cogs_row['COGS'] or 0
-            avg_inventory = next((item['AvgInventory'] for item in inventory_data if item['Month'] == month), 1)
-            turnover_rate = cogs / avg_inventory if avg_inventory else 0
-            turnover_data.append({
-                'month': month,
-                'turnover_rate': turnover_rate
-            })
-        print(turnover_data)
+        for row in cursor.fetchall():
+            entry = _turnover_row(granularity, row['Period'], row['COGS'], row['AvgInventory'])
+            if breakdown == 'category':
+                entry['category_id'] = row['CategoryID']
+                entry['category_name'] = row['CategoryName']
+            elif breakdown == 'warehouse':
+                entry['warehouse_id'] = row['WarehouseID']
+            turnover_data.append(entry)
         return turnover_data
 
     except Exception as e:
@@ -91,12 +244,11 @@ def calculate_inventory_turnover(cursor):
 
 def calculate_popular_products(cursor):
     cursor.execute("""
-        SELECT p.ProductID, p.Name, SUM(op.Quantity) AS TotalSold
-        FROM Order_Product op
-        JOIN Product p ON op.ProductID = p.ProductID
-        JOIN "Order" o ON o.OrderID = op.OrderID
-        WHERE o.OrderStatus = 'Delivered' -- Corrected field name
-        GROUP BY p.ProductID
+        SELECT p.ProductID, p.Name, SUM(s.QuantitySold) AS TotalSold
+        FROM Product_Sales_Monthly s
+        JOIN Product p ON s.ProductID = p.ProductID
+        GROUP BY s.ProductID
+        HAVING TotalSold > 0
         ORDER BY TotalSold DESC
         LIMIT 10
     """)
@@ -104,44 +256,54 @@ def calculate_popular_products(cursor):
 
     return [{"product_id": p["ProductID"], "name": p["Name"], "total_sold": p["TotalSold"]} for p in popular_products]
 
-def predict_future_demand(cursor):
-    # Get monthly sales data for each product
-    cursor.execute("""
-        SELECT p.ProductID, p.Name, strftime('%Y-%m', o.OrderDate) AS Month, SUM(op.Quantity) AS TotalSold
-        FROM Order_Product op
-        JOIN Product p ON op.ProductID = p.ProductID
-        JOIN "Order" o ON o.OrderID = op.OrderID
-        WHERE o.OrderStatus = 'Delivered'
-        GROUP BY p.ProductID, Month
-        ORDER BY p.ProductID, Month
+def fetch_sales_matrix(cursor):
+    """Delivered sales per product and month as (product IDs, product x month matrix).
+
+    Rows are sorted by product ID and months without sales are zero; see
+    app.utils.forecasting.build_sales_matrix.
+    """
+    # Plain tuples instead of sqlite3.Row load straight into one array
+    sales_cursor = cursor.connection.cursor()
+    sales_cursor.row_factory = None
+    # Every row is read, and walking the table is faster than any index
+    # (reading through the primary key or a skip-scan of the month index
+    # both take about twice as long), so the scan is pinned
+    sales_cursor.execute("""
+        SELECT ProductID,
+            CAST(substr(Month, 1, 4) AS INTEGER) * 12 + CAST(substr(Month, 6, 2) AS INTEGER) - 1 AS MonthIndex,
+            QuantitySold
+        FROM Product_Sales_Monthly NOT INDEXED
+        WHERE QuantitySold > 0
     """)
-    sales_data = cursor.fetchall()
-
-    # Organize sales data per product
-    product_sales = {}
-    for row in sales_data:
-        product_id = row['ProductID']
-        if product_id not in product_sales:
-            product_sales[product_id] = {
-                'name': row['Name'],
-                'sales': []
-            }
-        product_sales[product_id]['sales'].append(row)
-
-    # Predict future demand using a simple moving average
-    demand_predictions = []
-    for product_id, data in product_sales.items():
-        sales_quantities = [row['TotalSold'] for row in data['sales']]
-        if len(sales_quantities) >= 3:
-            # Calculate average of last 3 months
-            recent_sales = sales_quantities[-3:]
-            predicted_demand = sum(recent_sales) / len(recent_sales)
-        else:
-            predicted_demand = sum(sales_quantities) / len(sales_quantities)
-        demand_predictions.append({
-            'product_id': product_id,
-            'product_name': data['name'],
-            'predicted_demand': predicted_demand
-        })
+    sales = np.array(sales_cursor.fetchall(), dtype=np.int64).reshape(-1, 3)
+    products, _, matrix = build_sales_matrix(sales[:, 0], sales[:, 1], sales[:, 2])
+    return products, matrix
+
 
-    return demand_predictions
+def predict_future_demand(cursor, model='moving_average', horizon=DEFAULT_HORIZON):
+    """Forecast monthly demand for every product that has delivered sales.
+
+    Sales are read from Product_Sales_Monthly into a dense product x month
+    matrix, with months without sales as zero, and forecast with one of
+    app.utils.forecasting's models for all products at once.
+    predicted_demand is next month's forecast; forecast lists every month of
+    the horizon.
+    """
+    products, matrix = fetch_sales_matrix(cursor)
+    if not len(products):
+        return []
+    forecasts = forecast_demand(matrix, model=model, horizon=horizon)
+
+    cursor.execute("SELECT ProductID, Name FROM Product")
+    names = dict(cursor.fetchall())
+
+    return [
+        {
+            'product_id': product_id,
+            'product_name': names.get(product_id),
+            'predicted_demand': forecast[0],
+            'forecast': forecast,
+            'model': model
+        }
+        for product_id, forecast in zip(products.tolist(), forecasts.tolist())
+    ]
@@ -1,25 +1,44 @@
 # app/utils/invoice.py
 
 import os
+import json
+import hashlib
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
-from db import get_db_connection
+from app.utils.sequence import SequenceAllocator
 from datetime import datetime
 from flask import current_app
 
-def generate_invoice(order_id):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+
+# Invoice numbers come from the 'invoice' row of the Sequence table
+invoice_numbers = SequenceAllocator('invoice')
+
+# SQLite caps the number of bound parameters per statement
+IN_CHUNK_SIZE = 500
+
+
+def fetch_invoices_data(cursor, order_ids):
+    """Load invoice data for many orders as {order_id: invoice_data}.
+
+    Orders and their product lines are read with one query each per chunk of
+    IDs; orders that do not exist are left out. The result only holds plain
+    values, so it can be hashed and handed to a worker process for rendering.
+    """
+    order_ids = list(dict.fromkeys(order_ids))  # Drop duplicates, keep order
+    orders = {}
+    products = {}
+    for i in range(0, len(order_ids), IN_CHUNK_SIZE):
+        chunk = order_ids[i:i + IN_CHUNK_SIZE]
+        placeholders = ", ".join("?" for _ in chunk)
+
         # Fetch order details
-        cursor.execute("""
-            SELECT 
-                o.OrderID, 
-                o.OrderDate, 
-                o.TotalAmount, 
-                o.ShippingCost, 
-                o.TaxRate, 
+        cursor.execute(f"""
+            SELECT
+                o.OrderID,
+                o.OrderDate,
+                o.TotalAmount,
+                o.ShippingCost,
+                o.TaxRate,
                 o.PaymentStatus,
                 COALESCE(c.Name, 'Guest User') AS Name,
                 COALESCE(c.Email, 'guest@example.com') AS Email,
@@ -28,169 +47,218 @@ def generate_invoice(order_id):
             FROM "Order" o
             LEFT JOIN Customer c ON o.UserID = c.UserID
             LEFT JOIN Guest g ON o.UserID = g.GuestID
-            WHERE o.OrderID = ?;
-        """, (order_id,))
-        order = cursor.fetchone()
-        
-        if not order:
-            current_app.logger.error(f"Order ID {order_id} not found.")
-            return None
-        
+            WHERE o.OrderID IN ({placeholders});
+        """, chunk)
+        for order in cursor.fetchall():
+            orders[order['OrderID']] = dict(order)
+            products[order['OrderID']] = []
+
         # Fetch ordered products
-        cursor.execute("""
-            SELECT p.Name, p.Price, op.Quantity
+        cursor.execute(f"""
+            SELECT op.OrderID, p.Name, p.Price, op.Quantity
             FROM Order_Product op
             JOIN Product p ON op.ProductID = p.ProductID
-            WHERE op.OrderID = ?
-        """, (order_id,))
-        products = cursor.fetchall()
-        
-        # Calculate product totals
-        product_totals = [product['Price'] * product['Quantity'] for product in products]
-        subtotal = sum(product_totals)  # Sum of all product totals
-        
-        # Membership discount logic
-        membership_tier = order['MembershipTier']
-        membership_discount = 0
-
-        if membership_tier == 'Premium':
-            membership_discount = 0.05  # 5% discount
-        elif membership_tier == 'Gold':
-            membership_discount = 0.10  # 10% discount
-
-        discount_amount = subtotal * membership_discount
-        
-        # Tax calculation
-        tax_amount = (subtotal - discount_amount + order['ShippingCost']) * order['TaxRate']
-        
-        # Final total amount
-        total_amount = subtotal + order['ShippingCost'] + tax_amount - discount_amount
-        
-        # Generate unique Invoice Number
-        cursor.execute("SELECT COUNT(*) AS count FROM Invoice")
-        count = cursor.fetchone()['count'] + 1
-        invoice_number = f"INV-{1000 + count}"
-        
-        # Define the invoice file path
-        invoices_dir = os.path.join(current_app.root_path, 'invoices')
-        os.makedirs(invoices_dir, exist_ok=True)
-        invoice_filename = f"invoice_{order_id}.pdf"
-        invoice_path = os.path.join(invoices_dir, invoice_filename)
-        
-        # Create the PDF invoice
-        c = canvas.Canvas(invoice_path, pagesize=letter)
-        width, height = letter
-        
-        # Add Company Logo
-        logo_path = os.path.join(current_app.root_path, 'static', 'images', 'logo.png')
-        if os.path.exists(logo_path):
-            c.drawImage(logo_path, 50, height - 80, width=100, height=50)
-        
-        # Invoice Header
-        c.setFont("Helvetica-Bold", 20)
-        c.drawString(200, height - 50, "Invoice")
-        
-        # Invoice Information
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, height - 150, "Invoice Number:")
-        c.drawString(200, height - 150, invoice_number)
-        
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, height - 170, "Order ID:")
-        c.drawString(200, height - 170, str(order['OrderID']))
-        
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, height - 190, "Order Date:")
-        c.drawString(200, height - 190, order['OrderDate'])
-        
-        # Customer Information
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(50, height - 230, "Bill To:")
-        
-        c.setFont("Helvetica", 12)
-        c.drawString(50, height - 250, f"Name: {order['Name']}")
-        c.drawString(50, height - 270, f"Email: {order['Email']}")
-        c.drawString(50, height - 290, f"Address: {order['Address']}")
-        
-        # Table Headers
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, height - 330, "Product")
-        c.drawString(300, height - 330, "Price")
-        c.drawString(400, height - 330, "Quantity")
-        c.drawString(500, height - 330, "Total")
-        
-        # Draw a line below headers
-        c.line(50, height - 335, 550, height - 335)
-        
-        # Table Content
-        c.setFont("Helvetica", 12)
-        y = height - 350
-        for product in products:
-            c.drawString(50, y, product['Name'])
-            c.drawString(300, y, f"${product['Price']:.2f}")
-            c.drawString(400, y, str(product['Quantity']))
-            total = product['Price'] * product['Quantity']
-            c.drawString(500, y, f"${total:.2f}")
-            y -= 20  # Move down for the next product
-        
-        # Draw a line above totals
-        c.line(400, y + 10, 550, y + 10)
-        
-        # Shipping Cost
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(400, y - 10, "Shipping Cost:")
-        c.drawString(500, y - 10, f"${order['ShippingCost']:.2f}")
-        
-        # Tax and Discount
-        c.drawString(400, y - 30, "Tax:")
-        c.drawString(500, y - 30, f"${tax_amount:.2f}")
-        
-        c.drawString(400, y - 50, "Discount:")
-        c.drawString(500, y - 50, f"${discount_amount:.2f}")
-        
-        # Total Amount
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(400, y - 80, "Total Amount:")
-        c.drawString(500, y - 80, f"${total_amount:.2f}")
-        
-        # Footer
-        c.setFont("Helvetica", 10)
-        c.drawString(50, 50, f"Generated on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
-        c.drawString(50, 35, "Thank you for your business!")
-        
-        # Save the PDF
-        c.save()
-        
-        # Insert Invoice Record into Database
-        cursor.execute("""
-            INSERT INTO Invoice (InvoiceNumber, OrderID, PaymentID, InvoiceDate, TotalAmount, TaxAmount, DiscountAmount, FilePath)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+            WHERE op.OrderID IN ({placeholders})
+            ORDER BY op.OrderID, op.ProductID
+        """, chunk)
+        for product in cursor.fetchall():
+            products[product['OrderID']].append(
+                {"Name": product['Name'], "Price": product['Price'], "Quantity": product['Quantity']}
+            )
+
+    return {
+        order_id: build_invoice_data(orders[order_id], products[order_id])
+        for order_id in order_ids if order_id in orders
+    }
+
+
+def fetch_invoice_data(cursor, order_id):
+    """Load everything an invoice shows for one order, or None if it does not exist."""
+    return fetch_invoices_data(cursor, [order_id]).get(order_id)
+
+
+def build_invoice_data(order, products):
+    """Add the invoice totals to an order row and its product lines."""
+    # Calculate product totals
+    product_totals = [product['Price'] * product['Quantity'] for product in products]
+    subtotal = sum(product_totals)  # Sum of all product totals
+
+    # Membership discount logic
+    membership_tier = order['MembershipTier']
+    membership_discount = 0
+
+    if membership_tier == 'Premium':
+        membership_discount = 0.05  # 5% discount
+    elif membership_tier == 'Gold':
+        membership_discount = 0.10  # 10% discount
+
+    discount_amount = subtotal * membership_discount
+
+    # Tax calculation
+    tax_amount = (subtotal - discount_amount + order['ShippingCost']) * order['TaxRate']
+
+    # Final total amount
+    total_amount = subtotal + order['ShippingCost'] + tax_amount - discount_amount
+
+    return {
+        "order": order,
+        "products": products,
+        "subtotal": subtotal,
+        "discount_amount": discount_amount,
+        "tax_amount": tax_amount,
+        "total_amount": total_amount,
+    }
+
+
+def invoice_content_hash(invoice_data):
+    """Stable hash of what the invoice shows; unchanged orders keep the same hash."""
+    canonical = json.dumps(invoice_data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def invoice_file_path(invoices_dir, order_id, content_hash):
+    return os.path.join(invoices_dir, f"invoice_{order_id}_{content_hash[:16]}.pdf")
+
+
+def render_invoice_pdf(invoice_data, invoice_number, invoice_path, logo_path=None):
+    """Draw the invoice PDF. Needs no app context, so it can run in a worker process.
+
+    The PDF is written to a temporary file first and moved into place, so a
+    cached path never points at a half-written file.
+    """
+    order = invoice_data["order"]
+    products = invoice_data["products"]
+    tax_amount = invoice_data["tax_amount"]
+    discount_amount = invoice_data["discount_amount"]
+    total_amount = invoice_data["total_amount"]
+
+    os.makedirs(os.path.dirname(invoice_path), exist_ok=True)
+    temp_path = f"{invoice_path}.{os.getpid()}.tmp"
+
+    # Create the PDF invoice
+    c = canvas.Canvas(temp_path, pagesize=letter)
+    width, height = letter
+
+    # Add Company Logo
+    if logo_path and os.path.exists(logo_path):
+        c.drawImage(logo_path, 50, height - 80, width=100, height=50)
+
+    # Invoice Header
+    c.setFont("Helvetica-Bold", 20)
+    c.drawString(200, height - 50, "Invoice")
+
+    # Invoice Information
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, height - 150, "Invoice Number:")
+    c.drawString(200, height - 150, invoice_number)
+
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, height - 170, "Order ID:")
+    c.drawString(200, height - 170, str(order['OrderID']))
+
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, height - 190, "Order Date:")
+    c.drawString(200, height - 190, order['OrderDate'])
+
+    # Customer Information
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, height - 230, "Bill To:")
+
+    c.setFont("Helvetica", 12)
+    c.drawString(50, height - 250, f"Name: {order['Name']}")
+    c.drawString(50, height - 270, f"Email: {order['Email']}")
+    c.drawString(50, height - 290, f"Address: {order['Address']}")
+
+    # Table Headers
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, height - 330, "Product")
+    c.drawString(300, height - 330, "Price")
+    c.drawString(400, height - 330, "Quantity")
+    c.drawString(500, height - 330, "Total")
+
+    # Draw a line below headers
+    c.line(50, height - 335, 550, height - 335)
+
+    # Table Content
+    c.setFont("Helvetica", 12)
+    y = height - 350
+    for product in products:
+        c.drawString(50, y, product['Name'])
+        c.drawString(300, y, f"${product['Price']:.2f}")
+        c.drawString(400, y, str(product['Quantity']))
+        total = product['Price'] * product['Quantity']
+        c.drawString(500, y, f"${total:.2f}")
+        y -= 20  # Move down for the next product
+
+    # Draw a line above totals
+    c.line(400, y + 10, 550, y + 10)
+
+    # Shipping Cost
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(400, y - 10, "Shipping Cost:")
+    c.drawString(500, y - 10, f"${order['ShippingCost']:.2f}")
+
+    # Tax and Discount
+    c.drawString(400, y - 30, "Tax:")
+    c.drawString(500, y - 30, f"${tax_amount:.2f}")
+
+    c.drawString(400, y - 50, "Discount:")
+    c.drawString(500, y - 50, f"${discount_amount:.2f}")
+
+    # Total Amount
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(400, y - 80, "Total Amount:")
+    c.drawString(500, y - 80, f"${total_amount:.2f}")
+
+    # Footer
+    c.setFont("Helvetica", 10)
+    c.drawString(50, 50, f"Generated on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')} UTC")
+    c.drawString(50, 35, "Thank you for your business!")
+
+    # Save the PDF
+    c.save()
+    os.replace(temp_path, invoice_path)
+    return invoice_path
+
+
+def next_invoice_numbers(count):
+    # Generate unique Invoice Numbers
+    return [f"INV-{number}" for number in invoice_numbers.allocate(count)]
+
+
+def next_invoice_number():
+    return next_invoice_numbers(1)[0]
+
+
+def record_invoices(cursor, invoices):
+    """Insert Invoice rows for (order_id, invoice_number, invoice_data, invoice_path) tuples."""
+    invoice_date = datetime.utcnow().strftime('%Y-%m-%d')
+    cursor.executemany("""
+        INSERT INTO Invoice (InvoiceNumber, OrderID, PaymentID, InvoiceDate, TotalAmount, TaxAmount, DiscountAmount, FilePath)
+        VALUES (?, ?, (SELECT PaymentID FROM Payment WHERE OrderID = ?), ?, ?, ?, ?, ?)
+    """, [
+        (
             invoice_number,
             order_id,
-            get_payment_id_for_order(cursor, order_id),  # Function to fetch PaymentID
-            datetime.utcnow().strftime('%Y-%m-%d'),
-            total_amount,
-            tax_amount,
-            discount_amount,
+            order_id,
+            invoice_date,
+            invoice_data["total_amount"],
+            invoice_data["tax_amount"],
+            invoice_data["discount_amount"],
             invoice_path
-        ))
-        conn.commit()
-        conn.close()
-        
-        return invoice_path
-    
-    except Exception as e:
-        current_app.logger.error(f"Failed to generate invoice for Order ID {order_id}: {e}")
-        return None
-
-def get_payment_id_for_order(cursor, order_id):
-    cursor.execute("""
-        SELECT PaymentID FROM Payment WHERE OrderID = ?
-    """, (order_id,))
-    payment = cursor.fetchone()
-    if payment:
-        return payment['PaymentID']
-    else:
-        # Handle cases where payment record is missing
-        return None
\ No newline at end of file
+        )
+        for order_id, invoice_number, invoice_data, invoice_path in invoices
+    ])
+
+
+def record_invoice(cursor, order_id, invoice_number, invoice_data, invoice_path):
+    # Insert Invoice Record into Database
+    record_invoices(cursor, [(order_id, invoice_number, invoice_data, invoice_path)])
+
+
+def invoices_directory():
+    return os.path.join(current_app.root_path, 'invoices')
+
+
+def logo_file_path():
+    return os.path.join(current_app.root_path, 'static', 'images', 'logo.png')
@@ -0,0 +1,37 @@
+# app/utils/pagination.py
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse a ?limit= value, clamped to the maximum page size."""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Limit must be a positive integer")
+    if limit <= 0:
+        raise ValueError("Limit must be a positive integer")
+    return min(limit, maximum)
+
+
+def encode_cursor(values):
+    """Encode the keyset position of the last row as an opaque token."""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor, raising ValueError if it is malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
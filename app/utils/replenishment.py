@@ -0,0 +1,94 @@
+# app/utils/replenishment.py
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from app.utils.forecasting import MAX_HORIZON, demand_deviation, forecast_demand
+from app.utils.inventory import fetch_sales_matrix
+
+DAYS_PER_MONTH = 365.25 / 12
+
+
+def service_level_factor(service_level):
+    """Safety factor z for the share of replenishment cycles that should not run out."""
+    if not 0.5 <= service_level < 1:
+        raise ValueError("Service level must be at least 0.5 and below 1")
+    return NormalDist().inv_cdf(service_level)
+
+
+def plan_replenishment(cursor, model='moving_average', lead_time_days=14, review_days=30,
+                       service_level=0.95, warehouse_id=None):
+    """Reorder points and suggested order quantities for every product in every warehouse.
+
+    Monthly demand is forecast for the whole catalog at once over the
+    longest lead time plus the review period. Orders are not tied to a
+    warehouse, so each warehouse that stocks a product takes an even share
+    of its demand. For each product and warehouse:
+
+        safety stock  = z * daily demand deviation * sqrt(lead time)
+        reorder point = daily demand * lead time + safety stock
+
+    Stock at or below the reorder point is topped up to the reorder point
+    plus ``review_days`` of demand. Rows with ``LeadTimeDays`` NULL use
+    ``lead_time_days``. The plan is computed up front and returned as an
+    iterator with one entry per Product_Warehouse row, ordered by product
+    and warehouse.
+    """
+    z = service_level_factor(service_level)
+    products, matrix = fetch_sales_matrix(cursor)
+
+    query = """
+        SELECT pw.ProductID, p.Name, pw.WarehouseID, pw.StockQuantity, pw.LeadTimeDays,
+            (SELECT COUNT(*) FROM Product_Warehouse other WHERE other.ProductID = pw.ProductID) AS Warehouses
+        FROM Product_Warehouse pw
+        JOIN Product p ON p.ProductID = pw.ProductID
+    """
+    params = ()
+    if warehouse_id is not None:
+        query += " WHERE pw.WarehouseID = ?"
+        params = (warehouse_id,)
+    cursor.execute(query + " ORDER BY pw.ProductID, pw.WarehouseID", params)
+    stock = cursor.fetchall()
+    if not stock:
+        return iter(())
+
+    product_ids, names, warehouse_ids, quantities, lead_times, warehouses = zip(*stock)
+    product_ids = np.array(product_ids, dtype=np.int64)
+    quantities = np.array(quantities, dtype=np.float64)
+    lead_times = np.array([lead_time_days if days is None else days for days in lead_times], dtype=np.float64)
+    shares = 1 / np.array(warehouses, dtype=np.float64)
+
+    # Monthly demand rate and deviation per product, mapped onto the stock rows
+    daily_demand = np.zeros(len(stock))
+    daily_deviation = np.zeros(len(stock))
+    if len(products):
+        horizon = min(MAX_HORIZON, math.ceil((lead_times.max() + review_days) / DAYS_PER_MONTH))
+        monthly_demand = forecast_demand(matrix, model=model, horizon=horizon).mean(axis=1)
+        monthly_deviation = demand_deviation(matrix)
+        rows = np.minimum(np.searchsorted(products, product_ids), len(products) - 1)
+        has_sales = products[rows] == product_ids
+        daily_demand = np.where(has_sales, monthly_demand[rows], 0) * shares / DAYS_PER_MONTH
+        daily_deviation = np.where(has_sales, monthly_deviation[rows], 0) * shares / math.sqrt(DAYS_PER_MONTH)
+
+    safety_stock = np.ceil(z * daily_deviation * np.sqrt(lead_times))
+    reorder_points = np.ceil(daily_demand * lead_times) + safety_stock
+    order_up_to = reorder_points + np.ceil(daily_demand * review_days)
+    suggested = np.where(quantities <= reorder_points, np.maximum(order_up_to - quantities, 0), 0)
+
+    def entries():
+        for i, product_id in enumerate(product_ids.tolist()):
+            yield {
+                "product_id": product_id,
+                "product_name": names[i],
+                "warehouse_id": warehouse_ids[i],
+                "stock_quantity": int(quantities[i]),
+                "lead_time_days": int(lead_times[i]),
+                "daily_demand": round(float(daily_demand[i]), 3),
+                "safety_stock": int(safety_stock[i]),
+                "reorder_point": int(reorder_points[i]),
+                "suggested_order_quantity": int(suggested[i]),
+                "needs_reorder": bool(suggested[i] > 0),
+            }
+
+    return entries()
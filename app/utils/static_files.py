@@ -0,0 +1,80 @@
+# app/utils/static_files.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from flask import abort, current_app, send_file
+from werkzeug.security import safe_join
+
+IMMUTABLE_MAX_AGE = 31536000  # One year
+ETAG_CACHE_SIZE = 4096
+HASH_CHUNK_SIZE = 64 * 1024
+
+_etag_cache = OrderedDict()
+_etag_lock = threading.Lock()
+
+
+def _content_hash(full_path, stat):
+    key = (full_path, stat.st_mtime_ns, stat.st_size)
+    with _etag_lock:
+        digest = _etag_cache.get(key)
+        if digest is not None:
+            _etag_cache.move_to_end(key)
+            return digest
+
+    sha256 = hashlib.sha256()
+    with open(full_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    digest = sha256.hexdigest()
+
+    with _etag_lock:
+        _etag_cache[key] = digest
+        while len(_etag_cache) > ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+    return digest
+
+
+def file_etag(full_path, stat, content_hash=None):
+    """Strong ETag for a file: its SHA-256, taken from the name when it is content-addressed.
+
+    Other files are hashed once and cached per (path, mtime, size), so a
+    changed file gets a new tag without hashing it on every request.
+    """
+    return (content_hash or _content_hash(full_path, stat))[:32]
+
+
+def send_upload(path, content_hash=None, immutable=False):
+    """Send a file from the uploads folder with conditional and range support.
+
+    If-None-Match, If-Modified-Since and Range are answered by werkzeug's
+    make_conditional. With USE_X_SENDFILE the web server streams the file;
+    with UPLOADS_ACCEL_REDIRECT_PREFIX nginx does, via X-Accel-Redirect,
+    and Python only answers the headers.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    full_path = safe_join(upload_folder, path)
+    if full_path is None or not os.path.isfile(full_path):
+        abort(404)
+
+    stat = os.stat(full_path)
+    response = send_file(
+        full_path,
+        etag=file_etag(full_path, stat, content_hash),
+        max_age=IMMUTABLE_MAX_AGE if immutable else None,
+        conditional=True
+    )
+    if immutable:
+        response.cache_control.immutable = True
+
+    accel_prefix = current_app.config.get('UPLOADS_ACCEL_REDIRECT_PREFIX')
+    if accel_prefix and response.status_code in (200, 206):
+        # nginx serves the body (and any Range) from its internal location
+        response.close()
+        delegated = current_app.response_class(status=200, mimetype=response.mimetype)
+        for header in ('ETag', 'Last-Modified', 'Cache-Control', 'Expires'):
+            if header in response.headers:
+                delegated.headers[header] = response.headers[header]
+        delegated.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{path}"
+        return delegated
+    return response
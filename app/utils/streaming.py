@@ -0,0 +1,146 @@
+# app/utils/streaming.py
+import io
+import zipfile
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+FETCH_BATCH_SIZE = 500
+
+
+def iter_rows(cursor, batch_size=FETCH_BATCH_SIZE):
+    """Iterate over a cursor's result set with fetchmany instead of fetchall."""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield from rows
+
+
+def wants_ndjson():
+    """True when the client's Accept header prefers NDJSON over JSON."""
+    best = request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_json(items, key=None, trailer=None, mapping=False, status=200, batch_size=FETCH_BATCH_SIZE):
+    """Stream items as a JSON array or as NDJSON, depending on the Accept header.
+
+    items   -- iterable of JSON-serializable items, consumed lazily
+    key     -- wrap the array as {key: [...]} instead of returning a bare array
+    trailer -- callable returning extra fields that are only known once the
+               items are consumed (e.g. a next-page cursor); they are added to
+               the JSON object after the array, or written as the last NDJSON line
+    mapping -- items are (key, value) pairs that build a JSON object instead of
+               an array; in NDJSON every pair becomes a one-entry object
+
+    The request's database connection stays checked out until the last chunk
+    has been sent, so views must not really close it before returning.
+    """
+    dumps = current_app.json.dumps
+    ndjson = wants_ndjson()
+
+    def encode(item):
+        if mapping:
+            item_key, value = item
+            if ndjson:
+                return dumps({str(item_key): value})
+            return f"{dumps(str(item_key))}:{dumps(value)}"
+        return dumps(item)
+
+    def generate():
+        if not ndjson:
+            opening = '{' if mapping else '['
+            yield f"{{{dumps(key)}:{opening}" if key else opening
+
+        chunk, first = [], True
+        for item in items:
+            if ndjson:
+                chunk.append(encode(item) + '\n')
+            else:
+                chunk.append(encode(item) if first else ',' + encode(item))
+            first = False
+            if len(chunk) >= batch_size:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+
+        extra = trailer() if trailer else None
+        if ndjson:
+            if extra:
+                yield dumps(extra) + '\n'
+            return
+
+        yield '}' if mapping else ']'
+        if key:
+            for extra_key, value in (extra or {}).items():
+                yield f",{dumps(extra_key)}:{dumps(value)}"
+            yield '}'
+
+    mimetype = NDJSON_MIMETYPE if ndjson else 'application/json'
+    return Response(stream_with_context(generate()), status=status, mimetype=mimetype)
+
+
+def stream_events(events, retry=3000):
+    """Stream Server-Sent Events.
+
+    events yields (event, data, event_id) tuples, or None to send a
+    keep-alive comment. The generator runs without the request context, so
+    the request's pooled connection is released as soon as the view returns
+    and ``events`` must not use it.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield f"retry: {retry}\n\n"
+        for item in events:
+            if item is None:
+                yield ": keepalive\n\n"
+                continue
+            event, data, event_id = item
+            message = f"event: {event}\ndata: {dumps(data)}\n\n"
+            yield message if event_id is None else f"id: {event_id}\n{message}"
+
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Keep nginx from buffering the stream
+    return response
+
+
+class _ChunkWriter(io.RawIOBase):
+    """Write-only, non-seekable sink that collects what zipfile writes."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries):
+    """Build a ZIP archive incrementally and yield it in pieces.
+
+    entries yields (name, content) pairs where content is bytes or the path
+    of a file to add. Each entry is yielded as soon as it is compressed, so
+    the archive never has to be held in memory or written to disk first.
+    """
+    sink = _ChunkWriter()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in entries:
+            if isinstance(content, bytes):
+                archive.writestr(name, content)
+            else:
+                archive.write(content, name)
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
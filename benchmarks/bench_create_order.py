@@ -0,0 +1,93 @@
+"""Throughput of order placement for 1, 10 and 100-line orders.
+
+Compares app.services.order_service.place_order with the previous per-line
+implementation of create_order (one SELECT, UPDATE and INSERT per item).
+
+Usage:
+    python -m benchmarks.bench_create_order [--orders 200] [--products 5000]
+"""
+import argparse
+import random
+from datetime import datetime
+
+from benchmarks.common import create_benchmark_database, ensure_columns, timed
+from app.services.order_service import place_order
+
+
+def seed(conn, products):
+    ensure_columns(conn)
+    conn.execute("INSERT INTO User (UserID, UserType) VALUES (1, 'Customer')")
+    conn.executemany(
+        "INSERT INTO Product (ProductID, Name, Price, StockQuantity) VALUES (?, ?, ?, ?)",
+        [(product_id, f"Product {product_id}", 10.0 + product_id % 90, 10 ** 9) for product_id in range(1, products + 1)]
+    )
+    conn.commit()
+
+
+def place_order_per_line(conn, user_id, products):
+    """The create_order loop this benchmark is measured against."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM User WHERE UserID = ?", (user_id,))
+    cursor.fetchone()
+    total_amount = 0
+    order_date = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    for item in products:
+        cursor.execute("SELECT Price, StockQuantity FROM Product WHERE ProductID = ?", (item["product_id"],))
+        product = cursor.fetchone()
+        total_amount += product["Price"] * item["quantity"]
+        cursor.execute(
+            "UPDATE Product SET StockQuantity = StockQuantity - ? WHERE ProductID = ?",
+            (item["quantity"], item["product_id"])
+        )
+        cursor.execute(
+            "INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp, StockLevel) VALUES (?, ?, ?, ?, ?)",
+            (item["product_id"], -item["quantity"], 'Order Created', order_date, product["StockQuantity"] - item["quantity"])
+        )
+    cursor.execute(
+        "INSERT INTO 'Order' (OrderDate, OrderStatus, TotalAmount, UserID) VALUES (?, 'Pending', ?, ?)",
+        (order_date, total_amount, user_id)
+    )
+    order_id = cursor.lastrowid
+    for item in products:
+        cursor.execute(
+            "INSERT INTO Order_Product (OrderID, ProductID, Quantity) VALUES (?, ?, ?)",
+            (order_id, item["product_id"], item["quantity"])
+        )
+    conn.commit()
+    return order_id
+
+
+def run(place, conn, orders, lines, products):
+    rng = random.Random(lines)
+    baskets = [
+        [{"product_id": product_id, "quantity": rng.randint(1, 3)} for product_id in rng.sample(range(1, products + 1), lines)]
+        for _ in range(orders)
+    ]
+
+    def place_all():
+        for basket in baskets:
+            place(conn, 1, basket)
+
+    # Best of three runs to smooth out filesystem noise
+    return max(orders / timed(place_all)[1] for _ in range(3))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--products', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    conn, path = create_benchmark_database()
+    seed(conn, args.products)
+    print(f"database: {path}")
+    print(f"{'lines':>6} {'per-line orders/s':>18} {'batched orders/s':>17} {'speedup':>8}")
+    for lines in (1, 10, 100):
+        legacy = run(place_order_per_line, conn, args.orders, lines, args.products)
+        batched = run(place_order, conn, args.orders, lines, args.products)
+        print(f"{lines:>6} {legacy:>18.0f} {batched:>17.0f} {batched / legacy:>7.1f}x")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Demand forecasting for many SKUs at once.
+
+Builds the product x month sales matrix from synthetic monthly sales rows
+and times each model in app.utils.forecasting against the previous
+pure-Python moving average, which grouped rows into dicts per product.
+
+Usage:
+    python -m benchmarks.bench_demand_forecast [--products 100000] [--months 36] [--horizon 3]
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.common import timed
+from app.utils.forecasting import FORECAST_MODELS, build_sales_matrix, forecast_demand
+
+
+def synthetic_sales(products, months, seed=0):
+    """Seasonal monthly sales as (product_ids, month_indexes, quantities), months without sales left out."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(1, 50, (products, 1))
+    amplitude = rng.uniform(0, 0.5, (products, 1)) * base
+    noise = rng.normal(0, 2, (products, months))
+    season = np.sin(2 * np.pi * np.arange(months) / 12)
+    quantities = np.maximum(0, base + amplitude * season + noise).round()
+    # Some products only start selling part-way through
+    quantities[rng.random(products) < 0.2, :months // 2] = 0
+
+    product_ids = np.repeat(np.arange(1, products + 1), months)
+    month_indexes = np.tile(2023 * 12 + np.arange(months), products)
+    quantities = quantities.ravel()
+    sold = quantities > 0
+    return product_ids[sold], month_indexes[sold], quantities[sold]
+
+
+def predict_future_demand_legacy(rows):
+    """The moving average this benchmark is measured against."""
+    product_sales = {}
+    for row in rows:
+        product_sales.setdefault(row['ProductID'], []).append(row['TotalSold'])
+    predictions = []
+    for product_id, sales_quantities in product_sales.items():
+        recent_sales = sales_quantities[-3:]
+        predictions.append({'product_id': product_id, 'predicted_demand': sum(recent_sales) / len(recent_sales)})
+    return predictions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--months', type=int, default=36)
+    parser.add_argument('--horizon', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    product_ids, month_indexes, quantities = synthetic_sales(args.products, args.months)
+    rows = [
+        {'ProductID': product_id, 'TotalSold': quantity}
+        for product_id, quantity in zip(product_ids.tolist(), quantities.tolist())
+    ]
+    print(f"{len(rows)} sales rows for {args.products} products over {args.months} months")
+
+    _, legacy_seconds = timed(predict_future_demand_legacy, rows)
+    (products, _, matrix), matrix_seconds = timed(build_sales_matrix, product_ids, month_indexes, quantities)
+    print(f"{'step':<28} {'seconds':>9}")
+    print(f"{'previous moving average':<28} {legacy_seconds:>9.3f}")
+    print(f"{'build sales matrix':<28} {matrix_seconds:>9.3f}")
+    for model in FORECAST_MODELS:
+        forecast, seconds = timed(forecast_demand, matrix, model=model, horizon=args.horizon)
+        assert forecast.shape == (len(products), args.horizon)
+        print(f"{model:<28} {seconds:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Inventory turnover report over several years of synthetic history.
+
+Compares the previous two-query implementation (which matched every COGS
+month against the whole inventory list) with app.utils.inventory's
+calculate_inventory_turnover: the summary-table report, the single raw
+aggregation used for date ranges, and the weekly, category and warehouse
+variants.
+
+Usage:
+    python -m benchmarks.bench_inventory_turnover [--years 3] [--orders-per-day 50] [--products 2000]
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.common import create_benchmark_database, load_migration, timed
+from app.utils.inventory import calculate_inventory_turnover
+
+CATEGORIES = 20
+WAREHOUSES = 5
+
+
+def seed(conn, years, orders_per_day, products):
+    rng = random.Random(years)
+    conn.executemany(
+        "INSERT INTO Category (CategoryID, Name) VALUES (?, ?)",
+        [(category_id, f"Category {category_id}") for category_id in range(1, CATEGORIES + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO Warehouse (WarehouseID, Location, WarehouseName) VALUES (?, ?, ?)",
+        [(warehouse_id, f"Location {warehouse_id}", f"Warehouse {warehouse_id}") for warehouse_id in range(1, WAREHOUSES + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO Product (ProductID, Name, Price, CostPrice, StockQuantity, CategoryID) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (product_id, f"Product {product_id}", 20.0 + product_id % 80, 10.0 + product_id % 40, 500, 1 + product_id % CATEGORIES)
+            for product_id in range(1, products + 1)
+        ]
+    )
+    conn.executemany(
+        "INSERT INTO Product_Warehouse (WarehouseID, ProductID, StockQuantity) VALUES (?, ?, ?)",
+        [
+            (warehouse_id, product_id, rng.randint(0, 200))
+            for product_id in range(1, products + 1)
+            for warehouse_id in rng.sample(range(1, WAREHOUSES + 1), rng.randint(1, 3))
+        ]
+    )
+
+    start = datetime(2026, 1, 1) - timedelta(days=365 * years)
+    order_id = 0
+    for day in range(365 * years):
+        orders, lines, logs = [], [], []
+        for _ in range(orders_per_day):
+            order_id += 1
+            order_date = (start + timedelta(days=day, seconds=rng.randint(0, 86399))).strftime('%Y-%m-%d %H:%M:%S')
+            status = 'Delivered' if rng.random() < 0.9 else 'Pending'
+            orders.append((order_id, order_date, 0, status))
+            for product_id in rng.sample(range(1, products + 1), rng.randint(1, 5)):
+                quantity = rng.randint(1, 3)
+                lines.append((order_id, product_id, quantity))
+                logs.append((product_id, -quantity, 'Order Created', order_date, rng.randint(0, 500)))
+        conn.executemany("INSERT INTO \"Order\" (OrderID, OrderDate, TotalAmount, OrderStatus) VALUES (?, ?, ?, ?)", orders)
+        conn.executemany("INSERT INTO Order_Product (OrderID, ProductID, Quantity) VALUES (?, ?, ?)", lines)
+        conn.executemany(
+            "INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp, StockLevel) VALUES (?, ?, ?, ?, ?)",
+            logs
+        )
+    conn.commit()
+
+
+def prepare_schema(conn):
+    """Add the indexes and summary tables the report relies on, filling the tables from the seeded rows."""
+    summary = load_migration('f5a0c3e8b214')
+    for statement in summary.TABLES + summary.BACKFILL:
+        conn.execute(statement)
+    for name, table, columns in load_migration('3f2a9c1d7b10').INDEXES + summary.INDEXES:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({", ".join(columns)})')
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def inventory_turnover_legacy(cursor):
+    """The calculate_inventory_turnover this benchmark is measured against."""
+    cursor.execute("""
+        SELECT strftime('%Y-%m', o.OrderDate) AS Month, SUM(op.Quantity * p.CostPrice) AS COGS
+        FROM Order_Product op
+        JOIN Product p ON op.ProductID = p.ProductID
+        JOIN "Order" o ON o.OrderID = op.OrderID
+        WHERE o.OrderStatus = 'Delivered'
+        GROUP BY Month
+        ORDER BY Month
+    """)
+    cogs_data = cursor.fetchall()
+    cursor.execute("""
+        SELECT strftime('%Y-%m', il.Timestamp) AS Month, AVG(il.StockLevel * p.CostPrice) AS AvgInventory
+        FROM Inventory_Log il
+        JOIN Product p ON il.ProductID = p.ProductID
+        GROUP BY Month
+        ORDER BY Month
+    """)
+    inventory_data = cursor.fetchall()
+    turnover_data = []
+    for cogs_row in cogs_data:
+        month = cogs_row['Month']
+        cogs = cogs_row['COGS'] or 0
+        avg_inventory = next((item['AvgInventory'] for item in inventory_data if item['Month'] == month), 1)
+        turnover_data.append({'month': month, 'turnover_rate': cogs / avg_inventory if avg_inventory else 0})
+    return turnover_data
+
+
+def best_of(runs, fn, *args, **kwargs):
+    # Best of several runs to smooth out cache and filesystem noise
+    results = [timed(fn, *args, **kwargs) for _ in range(runs)]
+    return results[0][0], min(seconds for _, seconds in results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--orders-per-day', type=int, default=50)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    conn, path = create_benchmark_database()
+    seed(conn, args.years, args.orders_per_day, args.products)
+    prepare_schema(conn)
+    cursor = conn.cursor()
+    last_year = (datetime(2026, 1, 1) - timedelta(days=365)).strftime('%Y-%m-%d')
+
+    legacy, legacy_seconds = best_of(args.runs, inventory_turnover_legacy, cursor)
+    variants = [
+        ("summary tables, monthly", {}),
+        ("raw aggregation, monthly", {"start_date": "1900-01-01"}),
+        ("raw aggregation, last year", {"start_date": last_year}),
+        ("weekly", {"granularity": "week"}),
+        ("monthly by category", {"breakdown": "category"}),
+        ("monthly by warehouse", {"breakdown": "warehouse"}),
+    ]
+
+    print(f"database: {path}")
+    print(f"{'report':<28} {'rows':>6} {'seconds':>9} {'speedup':>8}")
+    print(f"{'previous implementation':<28} {len(legacy):>6} {legacy_seconds:>9.3f} {'1.0x':>8}")
+    for label, options in variants:
+        report, seconds = best_of(args.runs, calculate_inventory_turnover, cursor, **options)
+        print(f"{label:<28} {len(report):>6} {seconds:>9.3f} {legacy_seconds / seconds:>7.1f}x")
+        if label == "summary tables, monthly":
+            assert [row['month'] for row in report] == [row['month'] for row in legacy]
+            assert all(
+                abs(new['turnover_rate'] - old['turnover_rate']) <= 1e-6 * max(1, abs(old['turnover_rate']))
+                for new, old in zip(report, legacy)
+            ), "summary report differs from the previous implementation"
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
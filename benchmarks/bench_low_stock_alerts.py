@@ -0,0 +1,102 @@
+"""Low-stock evaluation after orders, per product versus batched.
+
+Runs the previous check_and_alert_low_stock loop (one query and one
+commit per low warehouse, for every product of an order) and
+app.utils.inventory.evaluate_low_stock (one query and one commit per
+order) over the same orders, and counts the alerts each writes. The
+batched evaluator skips warehouses alerted within the cooldown, so repeat
+orders for low products stop adding Inventory_Log rows.
+
+Usage:
+    python -m benchmarks.bench_low_stock_alerts [--orders 2000] [--products 5000] [--lines 10]
+"""
+import argparse
+import random
+
+from benchmarks.common import create_benchmark_database, ensure_columns, load_migration, timed
+from app.utils.inventory import LOW_STOCK_THRESHOLD, evaluate_low_stock
+
+WAREHOUSES = 10
+
+
+def seed(conn, products, seed=0):
+    """About a fifth of the warehouse rows are below the threshold; some products set their own."""
+    rng = random.Random(seed)
+    ensure_columns(conn)
+    conn.executemany(
+        "INSERT INTO Warehouse (WarehouseID, Location, WarehouseName) VALUES (?, ?, ?)",
+        [(warehouse_id, f"Location {warehouse_id}", f"Warehouse {warehouse_id}") for warehouse_id in range(1, WAREHOUSES + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO Product (ProductID, Name, Price, StockQuantity, LowStockThreshold) VALUES (?, ?, ?, ?, ?)",
+        [
+            (product_id, f"Product {product_id}", 10.0, 1000, rng.choice([None, None, 2, 20]))
+            for product_id in range(1, products + 1)
+        ]
+    )
+    conn.executemany(
+        "INSERT INTO Product_Warehouse (WarehouseID, ProductID, StockQuantity) VALUES (?, ?, ?)",
+        [
+            (warehouse_id, product_id, rng.randint(0, 4) if rng.random() < 0.2 else rng.randint(20, 100))
+            for product_id in range(1, products + 1)
+            for warehouse_id in range(1, WAREHOUSES + 1)
+        ]
+    )
+    for name, table, columns in load_migration('3f2a9c1d7b10').INDEXES:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({", ".join(columns)})')
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def check_and_alert_low_stock_legacy(conn, product_id):
+    """The per-product check this benchmark is measured against."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT pw.WarehouseID, p.Name AS ProductName, pw.StockQuantity
+        FROM Product_Warehouse pw
+        JOIN Product p ON pw.ProductID = p.ProductID
+        WHERE pw.ProductID = ?
+    """, (product_id,))
+    alerts = 0
+    for stock in cursor.fetchall():
+        if stock["StockQuantity"] < LOW_STOCK_THRESHOLD:
+            alerts += 1
+            cursor.execute("""
+                INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp, WarehouseID, StockLevel)
+                VALUES (?, ?, 'Low Stock Alert', datetime('now'), ?, ?)
+            """, (product_id, stock["StockQuantity"], stock["WarehouseID"], stock["StockQuantity"]))
+            conn.commit()
+    return alerts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=2000)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--lines', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    conn, path = create_benchmark_database()
+    seed(conn, args.products)
+    rng = random.Random(args.lines)
+    orders = [rng.sample(range(1, args.products + 1), args.lines) for _ in range(args.orders)]
+    print(f"database: {path}")
+    print(f"{args.orders} orders of {args.lines} products, {args.products} products in {WAREHOUSES} warehouses")
+
+    def legacy():
+        return sum(check_and_alert_low_stock_legacy(conn, product_id) for order in orders for product_id in order)
+
+    def batched():
+        return sum(len(evaluate_low_stock(conn, order)) for order in orders)
+
+    print(f"{'evaluator':<12} {'seconds':>8} {'orders/s':>9} {'alerts':>7}")
+    for name, run in (('per product', legacy), ('batched', batched)):
+        conn.execute("DELETE FROM Inventory_Log")
+        conn.commit()
+        alerts, seconds = timed(run)
+        print(f"{name:<12} {seconds:>8.3f} {args.orders / seconds:>9.0f} {alerts:>7}")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Warehouse allocation throughput with many warehouses and concurrent orders.
+
+Times allocate_line on its own for every strategy, then places the same
+orders through place_order from several threads at once (each with its own
+connection, as separate requests would). Orders for products that are not
+stocked per warehouse go through the same path without allocation, which
+is the baseline.
+
+Usage:
+    python -m benchmarks.bench_order_allocation [--orders 10000] [--warehouses 50] [--products 2000] [--threads 8]
+"""
+import argparse
+import random
+import sqlite3
+import threading
+
+from benchmarks.common import create_benchmark_database, ensure_columns, load_migration, timed
+from app.services.allocation_service import ALLOCATION_STRATEGIES, allocate_line, distance_km
+from app.services.order_service import place_order
+
+
+def seed(conn, warehouses, products, seed=0):
+    """Products 1..products are stocked in a random subset of warehouses; the next ``products`` IDs are not."""
+    rng = random.Random(seed)
+    ensure_columns(conn)
+    conn.execute("INSERT INTO User (UserID, UserType) VALUES (1, 'Customer')")
+    conn.executemany(
+        "INSERT INTO Warehouse (WarehouseID, Location, WarehouseName, Latitude, Longitude) VALUES (?, ?, ?, ?, ?)",
+        [
+            (warehouse_id, f"Location {warehouse_id}", f"Warehouse {warehouse_id}", rng.uniform(25, 49), rng.uniform(-124, -67))
+            for warehouse_id in range(1, warehouses + 1)
+        ]
+    )
+    conn.executemany(
+        "INSERT INTO Product (ProductID, Name, Price, StockQuantity) VALUES (?, ?, ?, ?)",
+        [(product_id, f"Product {product_id}", 10.0 + product_id % 90, 10 ** 9) for product_id in range(1, 2 * products + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO Product_Warehouse (WarehouseID, ProductID, StockQuantity) VALUES (?, ?, ?)",
+        [
+            (warehouse_id, product_id, rng.randint(0, 10 ** 6))
+            for product_id in range(1, products + 1)
+            for warehouse_id in rng.sample(range(1, warehouses + 1), rng.randint(1, warehouses))
+        ]
+    )
+    for name, table, columns in load_migration('3f2a9c1d7b10').INDEXES:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({", ".join(columns)})')
+    conn.commit()
+    conn.execute("ANALYZE")
+
+
+def make_orders(count, products, seed=1):
+    """Baskets of 1-5 lines with a random delivery point in the continental US."""
+    rng = random.Random(seed)
+    return [
+        (
+            [{"product_id": product_id, "quantity": rng.randint(1, 5)} for product_id in rng.sample(range(1, products + 1), rng.randint(1, 5))],
+            (rng.uniform(25, 49), rng.uniform(-124, -67)),
+        )
+        for _ in range(count)
+    ]
+
+
+def allocate_only(conn, orders, strategy):
+    """allocate_line for every line, with warehouse stock and coordinates already in memory."""
+    stock, locations = {}, {}
+    for row in conn.execute("SELECT ProductID, WarehouseID, StockQuantity FROM Product_Warehouse"):
+        stock.setdefault(row["ProductID"], {})[row["WarehouseID"]] = row["StockQuantity"]
+    for row in conn.execute("SELECT WarehouseID, Latitude, Longitude FROM Warehouse"):
+        locations[row["WarehouseID"]] = (row["Latitude"], row["Longitude"])
+
+    def run():
+        for basket, ship_to in orders:
+            distances = None
+            if strategy == 'nearest':
+                distances = {warehouse_id: distance_km(ship_to, location) for warehouse_id, location in locations.items()}
+            for line in basket:
+                allocate_line(line["quantity"], stock[line["product_id"]], strategy, distances)
+
+    return len(orders) / timed(run)[1]
+
+
+def place_concurrently(path, orders, threads, strategy):
+    """Place all orders from ``threads`` threads; returns orders per second."""
+    chunks = [orders[i::threads] for i in range(threads)]
+    errors = []
+
+    def worker(chunk):
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            for basket, ship_to in chunk:
+                place_order(conn, 1, basket, strategy=strategy, ship_to=ship_to)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    def run():
+        workers = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+    seconds = timed(run)[1]
+    if errors:
+        raise errors[0]
+    return len(orders) / seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orders', type=int, default=10000)
+    parser.add_argument('--warehouses', type=int, default=50)
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    conn, path = create_benchmark_database()
+    seed(conn, args.warehouses, args.products)
+    orders = make_orders(args.orders, args.products)
+    # The same baskets, for products that are not stocked per warehouse
+    untracked = [
+        ([{**line, "product_id": line["product_id"] + args.products} for line in basket], ship_to)
+        for basket, ship_to in orders
+    ]
+    print(f"database: {path}")
+    print(f"{args.orders} orders, {args.warehouses} warehouses, {args.products} products, {args.threads} threads")
+
+    print(f"{'strategy':<14} {'allocations/s':>14} {'orders/s':>9}")
+    baseline = place_concurrently(path, untracked, args.threads, 'nearest')
+    print(f"{'(none)':<14} {'':>14} {baseline:>9.0f}")
+    for strategy in ALLOCATION_STRATEGIES:
+        allocations = allocate_only(conn, orders, strategy)
+        placed = place_concurrently(path, orders, args.threads, strategy)
+        print(f"{strategy:<14} {allocations:>14.0f} {placed:>9.0f}")
+
+    # Per-warehouse stock must still add up to what was taken from it
+    shipped = conn.execute(
+        "SELECT COUNT(*), -SUM(ChangeAmount) FROM Inventory_Log WHERE WarehouseID IS NOT NULL"
+    ).fetchone()
+    ordered = sum(line["quantity"] for basket, _ in orders for line in basket) * len(ALLOCATION_STRATEGIES)
+    assert shipped[1] == ordered, (shipped[1], ordered)
+    print(f"{shipped[0]} warehouse log rows, {shipped[1]} units shipped")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
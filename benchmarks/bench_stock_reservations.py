@@ -0,0 +1,155 @@
+"""Checkout bursts through stock reservations, checked for overselling.
+
+Many threads (each with its own connection, as separate requests would)
+reserve baskets of scarce products, then commit most holds, release some
+and abandon the rest to expire. Reports how many operations per second
+went through and checks that no product or warehouse sold more than it
+had and that every unit held was given back or sold.
+
+Usage:
+    python -m benchmarks.bench_stock_reservations [--threads 16] [--checkouts 500] [--products 200] [--stock 40]
+"""
+import argparse
+import random
+import sqlite3
+import threading
+from collections import Counter
+
+from benchmarks.common import create_benchmark_database, ensure_columns, load_migration, timed
+from app.services.order_service import OrderError
+from app.services.reservation_service import (
+    commit_reservation, release_expired, release_reservation, reserve_stock
+)
+
+WAREHOUSES = 5
+
+
+def seed(conn, products, stock):
+    """Every product has ``stock`` units split evenly over the warehouses."""
+    ensure_columns(conn)
+    # Reservation tables as in db.sql, for source databases from before them
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS Stock_Reservation (
+            ReservationID TEXT PRIMARY KEY, UserID INTEGER NOT NULL, Status TEXT NOT NULL DEFAULT 'Held',
+            CreatedAt TEXT NOT NULL, ExpiresAt TEXT NOT NULL, OrderID INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS Stock_Reservation_Line (
+            LineID INTEGER PRIMARY KEY, ReservationID TEXT NOT NULL, ProductID INTEGER NOT NULL,
+            WarehouseID INTEGER, Quantity INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS ix_stock_reservation_status_expires ON Stock_Reservation (Status, ExpiresAt);
+        CREATE INDEX IF NOT EXISTS ix_stock_reservation_line_reservation ON Stock_Reservation_Line (ReservationID);
+    """)
+    for name, table, columns in load_migration('3f2a9c1d7b10').INDEXES:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({", ".join(columns)})')
+
+    conn.execute("INSERT INTO User (UserID, UserType) VALUES (1, 'Customer')")
+    conn.executemany(
+        "INSERT INTO Warehouse (WarehouseID, Location, WarehouseName) VALUES (?, ?, ?)",
+        [(warehouse_id, f"Location {warehouse_id}", f"Warehouse {warehouse_id}") for warehouse_id in range(1, WAREHOUSES + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO Product (ProductID, Name, Price, StockQuantity) VALUES (?, ?, ?, ?)",
+        [(product_id, f"Product {product_id}", 10.0, stock) for product_id in range(1, products + 1)]
+    )
+    conn.executemany(
+        "INSERT INTO Product_Warehouse (WarehouseID, ProductID, StockQuantity) VALUES (?, ?, ?)",
+        [
+            (warehouse_id, product_id, stock // WAREHOUSES + (warehouse_id <= stock % WAREHOUSES))
+            for product_id in range(1, products + 1)
+            for warehouse_id in range(1, WAREHOUSES + 1)
+        ]
+    )
+    conn.commit()
+
+
+def checkout_burst(path, threads, checkouts, products, seed=0):
+    """Run the burst; returns (Counter of outcomes, seconds)."""
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        local = Counter()
+        for _ in range(checkouts):
+            basket = [
+                {"product_id": product_id, "quantity": rng.randint(1, 3)}
+                for product_id in rng.sample(range(1, products + 1), rng.randint(1, 3))
+            ]
+            try:
+                reservation_id, _ = reserve_stock(conn, 1, basket, ttl=600, strategy='split')
+            except OrderError:
+                local['rejected'] += 1
+                continue
+            local['reserved'] += 1
+            roll = rng.random()
+            if roll < 0.7:
+                commit_reservation(conn, reservation_id)
+                local['committed'] += 1
+            elif roll < 0.9:
+                release_reservation(conn, reservation_id)
+                local['released'] += 1
+            else:
+                local['abandoned'] += 1
+        conn.close()
+        with lock:
+            outcomes.update(local)
+
+    def run():
+        workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+    return outcomes, timed(run)[1]
+
+
+def check_stock(conn, stock):
+    """Assert nothing was oversold and sold units match the orders."""
+    sold = dict(conn.execute("SELECT ProductID, SUM(Quantity) FROM Order_Product GROUP BY ProductID").fetchall())
+    for row in conn.execute("SELECT ProductID, StockQuantity, ReservedQuantity FROM Product"):
+        assert row["StockQuantity"] >= 0 and row["ReservedQuantity"] == 0, dict(row)
+        assert stock - row["StockQuantity"] == sold.get(row["ProductID"], 0), dict(row)
+    mismatched = conn.execute("""
+        SELECT COUNT(*) FROM Product p
+        WHERE p.StockQuantity != (SELECT SUM(pw.StockQuantity) FROM Product_Warehouse pw WHERE pw.ProductID = p.ProductID)
+    """).fetchone()[0]
+    negative = conn.execute(
+        "SELECT COUNT(*) FROM Product_Warehouse WHERE StockQuantity < 0 OR ReservedQuantity != 0"
+    ).fetchone()[0]
+    assert not mismatched and not negative, (mismatched, negative)
+    return sum(sold.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--checkouts', type=int, default=500, help='checkouts per thread')
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--stock', type=int, default=40, help='units per product')
+    args = parser.parse_args(argv)
+
+    conn, path = create_benchmark_database()
+    seed(conn, args.products, args.stock)
+    print(f"database: {path}")
+    print(f"{args.threads} threads x {args.checkouts} checkouts, {args.products} products with {args.stock} units each")
+
+    outcomes, seconds = checkout_burst(path, args.threads, args.checkouts, args.products)
+    operations = outcomes['reserved'] + outcomes['rejected'] + outcomes['committed'] + outcomes['released']
+    print(f"{seconds:.2f}s, {operations / seconds:.0f} operations/s")
+    for outcome in ('reserved', 'rejected', 'committed', 'released', 'abandoned'):
+        print(f"{outcome:<10} {outcomes[outcome]:>7}")
+
+    # Abandoned holds: everything still held must come back
+    expired, sweep_seconds = timed(release_expired, conn, now='9999-12-31 00:00:00', limit=10 ** 6)
+    print(f"swept {expired} expired holds in {sweep_seconds:.3f}s")
+    sold = check_stock(conn, args.stock)
+    print(f"{sold} units sold of {args.products * args.stock}; no product or warehouse oversold")
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks never touch the real database: they copy its schema (tables and
+indexes) into a throwaway file and fill it with synthetic data.
+"""
+import glob
+import importlib.util
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+SOURCE_DATABASE = os.path.join(ROOT, 'yourdatabase.db')
+MIGRATIONS_DIR = os.path.join(ROOT, 'migrations', 'versions')
+
+
+def create_benchmark_database(source=SOURCE_DATABASE):
+    """Return (connection, path) for an empty copy of the source schema."""
+    directory = tempfile.mkdtemp(prefix='503m-bench-')
+    path = os.path.join(directory, 'bench.db')
+
+    source_conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    schema = [
+        sql for (sql,) in source_conn.execute(
+            "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY type = 'index'"
+        )
+    ]
+    source_conn.close()
+
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    for sql in schema:
+        conn.execute(sql)
+    conn.commit()
+    return conn, path
+
+
+# Columns added by migrations newer than the source database
+MIGRATED_COLUMNS = {
+    'Warehouse': [('Latitude', 'REAL'), ('Longitude', 'REAL')],
+    'Product': [('ReservedQuantity', 'INTEGER NOT NULL DEFAULT 0'), ('LowStockThreshold', 'INTEGER')],
+    'Product_Warehouse': [('ReservedQuantity', 'INTEGER NOT NULL DEFAULT 0')],
+}
+
+
+def ensure_columns(conn, columns=MIGRATED_COLUMNS):
+    """Add any of ``columns`` ({table: [(name, type)]}) the copied schema is missing."""
+    for table, definitions in columns.items():
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+        for name, definition in definitions:
+            if name not in existing:
+                conn.execute(f'ALTER TABLE "{table}" ADD COLUMN {name} {definition}')
+    conn.commit()
+
+
+def load_migration(revision):
+    """Import a migration module by revision ID, to reuse its table and index definitions."""
+    (path,) = glob.glob(os.path.join(MIGRATIONS_DIR, f"{revision}_*.py"))
+    spec = importlib.util.spec_from_file_location(f"migration_{revision}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def timed(fn, *args, **kwargs):
+    """Run fn once and return (result, seconds)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
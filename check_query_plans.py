@@ -0,0 +1,156 @@
+"""Run EXPLAIN QUERY PLAN over the SQL used by the controllers and utils.
+
+Every string literal passed to ``cursor.execute`` is collected and explained
+against the database. f-strings and ``QUERY.format(...)`` of a module-level
+string are rendered with ``?, ?, ?`` for IN-list placeholders; statements
+built from any other runtime value are listed as SKIP and counted. A statement that filters (WHERE) but still makes SQLite
+scan a whole table is reported as a failure; unfiltered list queries are shown
+for information only, as are statements that ask for a scan with NOT INDEXED.
+With ``--strict`` every full table scan fails.
+
+Usage:
+    python check_query_plans.py [--database yourdatabase.db] [--strict]
+"""
+import argparse
+import ast
+import glob
+import os
+import re
+import sqlite3
+import sys
+
+SOURCE_GLOBS = [
+    'app/auth/*.py',
+    'app/controllers/*.py',
+    'app/services/*.py',
+    'app/utils/*.py',
+]
+
+# "SCAN Product" or "SCAN p" without an index is a full table scan
+FULL_SCAN = re.compile(r'^SCAN (\S+)$')
+
+
+# Stand-in for the "?, ?, ?" lists built for IN (...) at runtime
+PLACEHOLDER_LIST = '?, ?, ?'
+
+
+def render_value(node):
+    """SQL for an interpolated value, or None if it is only known at runtime."""
+    if 'placeholders' in ast.unparse(node):
+        return PLACEHOLDER_LIST
+    return None
+
+
+def render_sql(node, constants):
+    """The SQL text of an execute() argument, or None if it cannot be rendered.
+
+    Handles string literals, module-level string constants, f-strings and
+    ``CONSTANT.format(name=...)``; interpolated values must be IN-list
+    placeholders (see render_value).
+    """
+    if isinstance(node, ast.Constant):
+        return node.value if isinstance(node.value, str) else None
+    if isinstance(node, ast.Name):
+        return constants.get(node.id)
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            part = render_sql(value, constants) if isinstance(value, ast.Constant) else render_value(value.value)
+            if part is None:
+                return None
+            parts.append(part)
+        return ''.join(parts)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'format':
+        template = render_sql(node.func.value, constants)
+        values = {keyword.arg: render_value(keyword.value) for keyword in node.keywords}
+        if template is None or node.args or None in values.values() or None in values:
+            return None
+        return template.format(**values)
+    return None
+
+
+def collect_statements(paths):
+    """Yield (location, sql) for every SQL string given to execute().
+
+    ``sql`` is None for statements that are built from runtime values and
+    cannot be rendered.
+    """
+    for path in paths:
+        with open(path, 'r') as file:
+            tree = ast.parse(file.read(), filename=path)
+
+        # Module-level string constants, e.g. PRODUCT_DETAILS_QUERY
+        constants = {
+            target.id: statement.value.value
+            for statement in tree.body
+            if isinstance(statement, ast.Assign) and isinstance(statement.value, ast.Constant)
+            and isinstance(statement.value.value, str)
+            for target in statement.targets if isinstance(target, ast.Name)
+        }
+
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Call) and node.args):
+                continue
+            func = node.func
+            if not (isinstance(func, ast.Attribute) and func.attr == 'execute'):
+                continue
+            sql = render_sql(node.args[0], constants)
+            yield f"{path}:{node.lineno}", None if sql is None else ' '.join(sql.split())
+
+
+def explain(conn, sql):
+    """Return the plan detail lines for a statement, binding NULL for each '?'."""
+    params = (None,) * sql.count('?')
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[3] for row in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', default='yourdatabase.db')
+    parser.add_argument('--strict', action='store_true', help='fail on any full table scan')
+    args = parser.parse_args(argv)
+
+    # Open read-only so the check never touches the data
+    conn = sqlite3.connect(f"file:{os.path.abspath(args.database)}?mode=ro", uri=True)
+
+    paths = sorted(path for pattern in SOURCE_GLOBS for path in glob.glob(pattern))
+    failures = dynamic = 0
+    for location, sql in collect_statements(paths):
+        if sql is None:
+            dynamic += 1
+            print(f"SKIP {location}: built from runtime values")
+            continue
+        if not sql.upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            continue
+        try:
+            plan = explain(conn, sql)
+        except sqlite3.Error as error:
+            print(f"SKIP {location}: {error}")
+            continue
+
+        scans = [line for line in plan if FULL_SCAN.match(line)]
+        if not scans:
+            continue
+
+        # NOT INDEXED marks a deliberate full read, where walking the table
+        # beats any index (e.g. fetch_sales_matrix loads every sales row)
+        statement = f" {sql.upper()} "
+        hot = args.strict or (' WHERE ' in statement and ' NOT INDEXED ' not in statement)
+        status = 'FAIL' if hot else 'INFO'
+        failures += hot
+        print(f"{status} {location}: {', '.join(scans)}")
+        print(f"     {sql[:160]}")
+
+    conn.close()
+    if dynamic:
+        print(f"{dynamic} statement{'' if dynamic == 1 else 's'} built at runtime not checked")
+    if failures:
+        print(f"{failures} hot quer{'y' if failures == 1 else 'ies'} with a full table scan")
+        return 1
+    print("No full table scans on hot queries")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,9 +6,82 @@ class Config:
     SESSION_PERMANENT = False
     SESSION_USE_SIGNER = True
 
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///yourdatabase.db'
+    DATABASE = os.path.join(os.getcwd(), 'yourdatabase.db')
+
+    # Point Flask-Migrate at the same file (a bare relative sqlite URI resolves
+    # to the instance folder, which holds an empty database)
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + DATABASE
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Pooled sqlite3 connections used by db.get_db_connection()
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_TIMEOUT = 5.0  # Seconds to wait for a free pooled connection
+    DB_JOURNAL_MODE = 'WAL'  # Readers never block on the writer
+    DB_BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+    DB_PRAGMAS = {
+        'busy_timeout': DB_BUSY_TIMEOUT_MS,
+        'synchronous': 'NORMAL',  # Safe with WAL, avoids an fsync per commit
+        'temp_store': 'MEMORY',
+        'cache_size': -8000,  # ~8 MB page cache per connection
+    }
+    # BEGIN IMMEDIATE retry policy for write transactions
+    DB_WRITE_RETRIES = 5
+    DB_WRITE_BACKOFF = 0.05  # Seconds, doubled on every retry
+
+    # Cache of admin roles used by role_required
+    ROLE_CACHE_TTL = int(os.environ.get('ROLE_CACHE_TTL', 60))  # Seconds
+    ROLE_CACHE_SIZE = 1024
+
+    # Worker processes that render invoice PDFs in the background
+    INVOICE_RENDER_WORKERS = int(os.environ.get('INVOICE_RENDER_WORKERS', 2))
+    # Largest number of orders a single bulk invoice request may cover
+    INVOICE_BATCH_MAX_ORDERS = int(os.environ.get('INVOICE_BATCH_MAX_ORDERS', 5000))
+    # Invoice numbers each process reserves at a time; unused ones are
+    # skipped when the process exits
+    INVOICE_NUMBER_BLOCK_SIZE = int(os.environ.get('INVOICE_NUMBER_BLOCK_SIZE', 10))
+
+    # Rows written per transaction by the CSV product import
+    PRODUCT_IMPORT_CHUNK_SIZE = int(os.environ.get('PRODUCT_IMPORT_CHUNK_SIZE', 1000))
+    # Background threads that run queued CSV imports
+    PRODUCT_IMPORT_WORKERS = int(os.environ.get('PRODUCT_IMPORT_WORKERS', 1))
+
+    # Inventory event feed (/inventory/events): how often it checks
+    # Inventory_Log for rows written by other processes, how often idle
+    # streams send a keep-alive, and how many events a slow client may fall
+    # behind before it is told to resync
+    INVENTORY_FEED_POLL_INTERVAL = float(os.environ.get('INVENTORY_FEED_POLL_INTERVAL', 1.0))
+    INVENTORY_FEED_HEARTBEAT = float(os.environ.get('INVENTORY_FEED_HEARTBEAT', 15))
+    INVENTORY_FEED_QUEUE_SIZE = int(os.environ.get('INVENTORY_FEED_QUEUE_SIZE', 1000))
+
+    # Replenishment planning: lead time for stock without its own
+    # LeadTimeDays, days of demand each order should cover, and the share of
+    # replenishment cycles that should not run out (sets the safety stock)
+    REPLENISHMENT_LEAD_TIME_DAYS = int(os.environ.get('REPLENISHMENT_LEAD_TIME_DAYS', 14))
+    REPLENISHMENT_REVIEW_DAYS = int(os.environ.get('REPLENISHMENT_REVIEW_DAYS', 30))
+    REPLENISHMENT_SERVICE_LEVEL = float(os.environ.get('REPLENISHMENT_SERVICE_LEVEL', 0.95))
+
+    # How order lines are split across warehouses: "nearest" (to the
+    # order's ship_to coordinates), "most_stocked" or "split" (in proportion
+    # to each warehouse's stock)
+    ORDER_ALLOCATION_STRATEGY = os.environ.get('ORDER_ALLOCATION_STRATEGY', 'nearest')
+
+    # Low-stock alerts: the level for products without their own
+    # LowStockThreshold, and how long before the same product and warehouse
+    # can be alerted again
+    LOW_STOCK_THRESHOLD = int(os.environ.get('LOW_STOCK_THRESHOLD', 5))
+    LOW_STOCK_ALERT_COOLDOWN = int(os.environ.get('LOW_STOCK_ALERT_COOLDOWN', 3600))
+
+    # Checkout stock reservations: how long a hold lasts before the sweeper
+    # returns its units, and how often the sweeper looks for expired holds
+    RESERVATION_TTL_SECONDS = int(os.environ.get('RESERVATION_TTL_SECONDS', 600))
+    RESERVATION_SWEEP_INTERVAL = float(os.environ.get('RESERVATION_SWEEP_INTERVAL', 30))
+    # Run the sweeper thread in this process; set to 0 for CLI commands
+    # (flask db upgrade, setup scripts) and for all but one server process
+    RESERVATION_SWEEPER_ENABLED = os.environ.get('RESERVATION_SWEEPER_ENABLED', '1') == '1'
+
+    # Worker processes that render resized product image variants
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'your_jwt_secret_key'
     JWT_TOKEN_LOCATION = ['headers']
     JWT_COOKIE_SECURE = False  # Only send cookies over HTTPS in production
@@ -20,4 +93,9 @@ class Config:
     DEBUG = True  # Change to False in production
 
     UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
+    # Hand file bodies for /product/uploads to the web server instead of
+    # streaming them from Python: X-Sendfile (Apache, lighttpd) or an nginx
+    # internal location for X-Accel-Redirect, e.g. '/protected-uploads'
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE') == '1'
+    UPLOADS_ACCEL_REDIRECT_PREFIX = os.environ.get('UPLOADS_ACCEL_REDIRECT_PREFIX')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
@@ -1,19 +1,213 @@
 import sqlite3
-import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context
 
-# Function to create a database connection
+DATABASE_PATH = 'yourdatabase.db'
+
+
+# Connection class handed out by the pool. Handlers still call conn.close()
+# when they are done; for a pooled connection that only discards uncommitted
+# work (like a real close would) and keeps the connection for the rest of the
+# request. The pool returns it on app context teardown.
+class PooledConnection(sqlite3.Connection):
+    pooled = False
+
+    def close(self):
+        if not self.pooled:
+            super().close()
+        elif self.in_transaction:
+            self.rollback()
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by the Flask app."""
+
+    def __init__(self, database, size=10, timeout=5.0, pragmas=None):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = dict(pragmas or {})
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._opened = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.timeout,
+            check_same_thread=False,  # Connections move between request threads
+            factory=PooledConnection
+        )
+        conn.row_factory = sqlite3.Row
+        # PRAGMAs are applied once, when the connection is opened
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        conn.pooled = True
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except sqlite3.Error:
+                    self._opened -= 1
+                    raise
+
+        # Pool is at capacity, wait for a connection to be released
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Database connection pool exhausted")
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            self._discard(conn)
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def _discard(self, conn):
+        sqlite3.Connection.close(conn)
+        with self._lock:
+            self._opened -= 1
+
+
+# Switch the database file to the configured journal mode. WAL is persistent,
+# so this only has to run once per database file.
+def bootstrap_database(database, journal_mode='WAL'):
+    conn = sqlite3.connect(database)
+    try:
+        mode = conn.execute(f"PRAGMA journal_mode = {journal_mode}").fetchone()[0]
+    finally:
+        conn.close()
+    return mode
+
+
+# Register the connection pool on the Flask app
+def init_db(app):
+    database = app.config.get('DATABASE', DATABASE_PATH)
+    if app.config.get('DB_JOURNAL_MODE'):
+        bootstrap_database(database, app.config['DB_JOURNAL_MODE'])
 
+    pool = ConnectionPool(
+        database,
+        size=app.config.get('DB_POOL_SIZE', 10),
+        timeout=app.config.get('DB_TIMEOUT', 5.0),
+        pragmas=app.config.get('DB_PRAGMAS')
+    )
+    app.extensions['sqlite_pool'] = pool
+    app.teardown_appcontext(release_db_connection)
+    return pool
 
+
+# Return the request's connection to the pool once the app context ends
+def release_db_connection(exception=None):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        current_app.extensions['sqlite_pool'].release(conn)
+
+
+# Function to create a database connection
+# Inside a Flask app context every caller (decorators, controllers, utils)
+# shares one pooled connection for the whole request.
 def get_db_connection():
-    db_path = 'yourdatabase.db'
-    print("Connecting to database at:", os.path.abspath(db_path))  # Print the full path
-    conn = sqlite3.connect(db_path)
+    if has_app_context() and 'sqlite_pool' in current_app.extensions:
+        if 'db_conn' not in g:
+            g.db_conn = current_app.extensions['sqlite_pool'].acquire()
+        return g.db_conn
+
+    conn = sqlite3.connect(DATABASE_PATH)
     conn.row_factory = sqlite3.Row  # Enables name-based access to columns
     return conn
 
-# Initial database setup, if not done already
+
+# Borrow a second connection for work that has to commit on its own, even
+# while the request's connection is in the middle of a transaction
+@contextmanager
+def separate_connection():
+    if has_app_context() and 'sqlite_pool' in current_app.extensions:
+        pool = current_app.extensions['sqlite_pool']
+        conn = pool.acquire()
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+        return
+
+    conn = sqlite3.connect(DATABASE_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
 
 
+def _is_locked(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+# Start a write transaction with BEGIN IMMEDIATE so the write lock is taken up
+# front instead of failing halfway through. Lock contention beyond the busy
+# timeout is retried with exponential backoff and jitter. The caller still
+# commits (or closes to roll back) as usual.
+def begin_write(conn):
+    if conn.in_transaction:
+        return conn  # Already inside a transaction, let the caller finish it
+
+    retries, backoff = 5, 0.05
+    if has_app_context():
+        retries = current_app.config.get('DB_WRITE_RETRIES', retries)
+        backoff = current_app.config.get('DB_WRITE_BACKOFF', backoff)
+
+    for attempt in range(retries + 1):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            return conn
+        except sqlite3.OperationalError as error:
+            if not _is_locked(error) or attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt) + random.uniform(0, backoff))
+
+
+def split_sql_statements(sql_script):
+    """Split a SQL script into individual statements.
+
+    Trigger bodies contain semicolons, so pieces are joined until a
+    statement is complete.
+    """
+    sql_statements = []
+    pending = ''
+    for piece in sql_script.split(';'):
+        pending += piece + ';'
+        if sqlite3.complete_statement(pending):
+            sql_statements.append(pending)
+            pending = ''
+    sql_statements.append(pending)
+    return sql_statements
+
+
+# Initial database setup, if not done already
 def setup_database():
     with open('db.sql', 'r') as file:
         sql_script = file.read()
@@ -22,9 +216,7 @@ def setup_database():
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        # Split the SQL script into individual statements
-        sql_statements = sql_script.split(';')
-        
+        sql_statements = split_sql_statements(sql_script)
         for idx, statement in enumerate(sql_statements):
             statement = statement.strip()  # Remove leading/trailing whitespace
             if statement:  # Skip empty statements
@@ -54,10 +54,13 @@ CREATE TABLE IF NOT EXISTS Product (
     Name TEXT NOT NULL,
     Description TEXT,
     Price REAL NOT NULL,
+    CostPrice REAL NOT NULL DEFAULT 0, -- Unit cost, for inventory value and turnover
     Size TEXT,
     Color TEXT,
     Material TEXT,
     StockQuantity INTEGER NOT NULL,
+    ReservedQuantity INTEGER NOT NULL DEFAULT 0, -- Held by open Stock_Reservation rows
+    LowStockThreshold INTEGER, -- Alert below this per warehouse; NULL uses LOW_STOCK_THRESHOLD
     CategoryID INTEGER,
     SubCategoryID INTEGER,
     Featured BOOLEAN DEFAULT 0, -- For featured products on homepage
@@ -73,6 +76,26 @@ CREATE TABLE IF NOT EXISTS Product_Image (
     FOREIGN KEY (ProductID) REFERENCES Product(ProductID)
 );
 
+-- Product_Image_Variant Table (resized copies of each product image)
+CREATE TABLE IF NOT EXISTS Product_Image_Variant (
+    VariantID INTEGER PRIMARY KEY,
+    ImageID INTEGER NOT NULL,
+    Variant TEXT NOT NULL, -- thumbnail, card or full
+    Format TEXT NOT NULL, -- webp or jpeg
+    Width INTEGER NOT NULL,
+    Height INTEGER NOT NULL,
+    FilePath TEXT NOT NULL, -- Relative to the uploads folder
+    FileSize INTEGER NOT NULL,
+    UNIQUE (ImageID, Variant, Format),
+    FOREIGN KEY (ImageID) REFERENCES Product_Image(ImageID)
+);
+
+-- Image_Blob Table (one row per stored image file, images/ab/cd/<sha256>.<ext>)
+CREATE TABLE IF NOT EXISTS Image_Blob (
+    FilePath TEXT PRIMARY KEY, -- Relative to the uploads folder, same as Product_Image.ImageURL
+    RefCount INTEGER NOT NULL DEFAULT 0 -- Product_Image rows pointing at the file
+);
+
 -- Warranty Table for tracking product warranties
 CREATE TABLE IF NOT EXISTS Warranty (
     WarrantyID INTEGER PRIMARY KEY,
@@ -233,6 +256,8 @@ CREATE TABLE IF NOT EXISTS Warehouse (
     WarehouseID INTEGER PRIMARY KEY,
     Location TEXT NOT NULL,
     WarehouseName TEXT NOT NULL,
+    Latitude REAL, -- For "nearest" order allocation; NULL ranks last
+    Longitude REAL
 );
 
 
@@ -260,6 +285,15 @@ CREATE TABLE IF NOT EXISTS Promotion_Association (
     FOREIGN KEY (SubCategoryID) REFERENCES SubCategory(SubCategoryID)
 );
 
+-- Products a promotion applies to
+CREATE TABLE IF NOT EXISTS Product_Promotion (
+    ProductID INTEGER,
+    PromotionID INTEGER,
+    PRIMARY KEY (ProductID, PromotionID),
+    FOREIGN KEY (ProductID) REFERENCES Product(ProductID),
+    FOREIGN KEY (PromotionID) REFERENCES Promotion(PromotionID)
+);
+
 
 CREATE TABLE IF NOT EXISTS Role (
     RoleID INTEGER PRIMARY KEY,
@@ -280,6 +314,8 @@ CREATE TABLE IF NOT EXISTS Product_Warehouse (
     WarehouseID INTEGER,
     ProductID INTEGER,
     StockQuantity INTEGER NOT NULL,
+    ReservedQuantity INTEGER NOT NULL DEFAULT 0, -- Held by open Stock_Reservation rows
+    LeadTimeDays INTEGER, -- Days to restock here; NULL uses REPLENISHMENT_LEAD_TIME_DAYS
     PRIMARY KEY (WarehouseID, ProductID),
     FOREIGN KEY (WarehouseID) REFERENCES Warehouse(WarehouseID),
     FOREIGN KEY (ProductID) REFERENCES Product(ProductID)
@@ -297,3 +333,221 @@ CREATE TABLE IF NOT EXISTS Invoice (
     FilePath TEXT NOT NULL, -- Path or URL to the generated PDF
     FOREIGN KEY (OrderID) REFERENCES "Order"(OrderID)
 );
+
+-- Named counters handed out in blocks by app/utils/sequence.py
+CREATE TABLE IF NOT EXISTS Sequence (
+    Name TEXT PRIMARY KEY, -- e.g., "invoice"
+    NextValue INTEGER NOT NULL -- First number not yet reserved
+);
+
+INSERT OR IGNORE INTO Sequence (Name, NextValue)
+SELECT 'invoice', COALESCE(MAX(CAST(SUBSTR(InvoiceNumber, 5) AS INTEGER)), 1000) + 1
+FROM Invoice
+WHERE InvoiceNumber LIKE 'INV-%';
+
+
+-- Background CSV product imports (see app/services/import_job_service.py)
+CREATE TABLE IF NOT EXISTS Import_Job (
+    JobID TEXT PRIMARY KEY,
+    Status TEXT NOT NULL DEFAULT 'queued' CHECK (Status IN ('queued', 'running', 'done', 'failed')),
+    FileName TEXT,
+    FilePath TEXT NOT NULL, -- Uploaded CSV, removed once the import finishes
+    RowsProcessed INTEGER NOT NULL DEFAULT 0,
+    RowsImported INTEGER NOT NULL DEFAULT 0,
+    RowsFailed INTEGER NOT NULL DEFAULT 0,
+    Errors TEXT, -- JSON list of {"row", "error"}
+    Message TEXT,
+    CreatedAt TEXT NOT NULL,
+    StartedAt TEXT,
+    FinishedAt TEXT
+);
+
+
+-- Inventory report summaries, kept current by the triggers below (see
+-- migrations/versions/f5a0c3e8b214)
+
+CREATE TABLE IF NOT EXISTS Inventory_Monthly_Stats (
+    Month TEXT PRIMARY KEY,
+    COGS REAL NOT NULL DEFAULT 0,
+    InventoryValueSum REAL NOT NULL DEFAULT 0,
+    InventoryLogCount INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS Product_Sales_Monthly (
+    ProductID INTEGER NOT NULL,
+    Month TEXT NOT NULL,
+    QuantitySold INTEGER NOT NULL DEFAULT 0,
+    COGS REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (ProductID, Month)
+);
+
+CREATE INDEX IF NOT EXISTS ix_product_sales_monthly_month ON Product_Sales_Monthly (Month, QuantitySold);
+
+CREATE TRIGGER IF NOT EXISTS trg_inventory_log_stats AFTER INSERT ON Inventory_Log
+BEGIN
+    INSERT INTO Inventory_Monthly_Stats (Month, InventoryValueSum, InventoryLogCount)
+    SELECT strftime('%Y-%m', NEW.Timestamp), NEW.StockLevel * COALESCE(p.CostPrice, 0), 1
+    FROM Product p
+    WHERE p.ProductID = NEW.ProductID
+    ON CONFLICT (Month) DO UPDATE SET
+        InventoryValueSum = InventoryValueSum + excluded.InventoryValueSum,
+        InventoryLogCount = InventoryLogCount + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_order_delivered_stats AFTER UPDATE OF OrderStatus ON "Order"
+WHEN NEW.OrderStatus = 'Delivered' AND OLD.OrderStatus != 'Delivered'
+BEGIN
+    INSERT INTO Product_Sales_Monthly (ProductID, Month, QuantitySold, COGS)
+    SELECT op.ProductID, strftime('%Y-%m', o.OrderDate), 1 * op.Quantity, 1 * op.Quantity * COALESCE(p.CostPrice, 0)
+    FROM Order_Product op
+    JOIN Product p ON p.ProductID = op.ProductID
+    JOIN "Order" o ON o.OrderID = op.OrderID
+    WHERE op.OrderID = NEW.OrderID
+    ON CONFLICT (ProductID, Month) DO UPDATE SET
+        QuantitySold = QuantitySold + excluded.QuantitySold,
+        COGS = COGS + excluded.COGS;
+    INSERT INTO Inventory_Monthly_Stats (Month, COGS)
+    SELECT strftime('%Y-%m', o.OrderDate), 1 * SUM(op.Quantity * COALESCE(p.CostPrice, 0))
+    FROM Order_Product op
+    JOIN Product p ON p.ProductID = op.ProductID
+    JOIN "Order" o ON o.OrderID = op.OrderID
+    WHERE op.OrderID = NEW.OrderID
+    GROUP BY strftime('%Y-%m', o.OrderDate)
+    ON CONFLICT (Month) DO UPDATE SET COGS = COGS + excluded.COGS;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_order_undelivered_stats AFTER UPDATE OF OrderStatus ON "Order"
+WHEN OLD.OrderStatus = 'Delivered' AND NEW.OrderStatus != 'Delivered'
+BEGIN
+    INSERT INTO Product_Sales_Monthly (ProductID, Month, QuantitySold, COGS)
+    SELECT op.ProductID, strftime('%Y-%m', o.OrderDate), -1 * op.Quantity, -1 * op.Quantity * COALESCE(p.CostPrice, 0)
+    FROM Order_Product op
+    JOIN Product p ON p.ProductID = op.ProductID
+    JOIN "Order" o ON o.OrderID = op.OrderID
+    WHERE op.OrderID = NEW.OrderID
+    ON CONFLICT (ProductID, Month) DO UPDATE SET
+        QuantitySold = QuantitySold + excluded.QuantitySold,
+        COGS = COGS + excluded.COGS;
+    INSERT INTO Inventory_Monthly_Stats (Month, COGS)
+    SELECT strftime('%Y-%m', o.OrderDate), -1 * SUM(op.Quantity * COALESCE(p.CostPrice, 0))
+    FROM Order_Product op
+    JOIN Product p ON p.ProductID = op.ProductID
+    JOIN "Order" o ON o.OrderID = op.OrderID
+    WHERE op.OrderID = NEW.OrderID
+    GROUP BY strftime('%Y-%m', o.OrderDate)
+    ON CONFLICT (Month) DO UPDATE SET COGS = COGS + excluded.COGS;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_delivered_order_line_stats AFTER INSERT ON Order_Product
+WHEN (SELECT OrderStatus FROM "Order" WHERE OrderID = NEW.OrderID) = 'Delivered'
+BEGIN
+    INSERT INTO Product_Sales_Monthly (ProductID, Month, QuantitySold, COGS)
+    SELECT op.ProductID, strftime('%Y-%m', o.OrderDate), 1 * op.Quantity, 1 * op.Quantity * COALESCE(p.CostPrice, 0)
+    FROM Order_Product op
+    JOIN Product p ON p.ProductID = op.ProductID
+    JOIN "Order" o ON o.OrderID = op.OrderID
+    WHERE op.OrderID = NEW.OrderID AND op.ProductID = NEW.ProductID
+    ON CONFLICT (ProductID, Month) DO UPDATE SET
+        QuantitySold = QuantitySold + excluded.QuantitySold,
+        COGS = COGS + excluded.COGS;
+    INSERT INTO Inventory_Monthly_Stats (Month, COGS)
+    SELECT strftime('%Y-%m', o.OrderDate), 1 * SUM(op.Quantity * COALESCE(p.CostPrice, 0))
+    FROM Order_Product op
+    JOIN Product p ON p.ProductID = op.ProductID
+    JOIN "Order" o ON o.OrderID = op.OrderID
+    WHERE op.OrderID = NEW.OrderID AND op.ProductID = NEW.ProductID
+    GROUP BY strftime('%Y-%m', o.OrderDate)
+    ON CONFLICT (Month) DO UPDATE SET COGS = COGS + excluded.COGS;
+END;
+
+
+-- Last change number per product for /inventory/realtime-inventory?since=
+-- (see migrations/versions/b9e4c2d7f150)
+CREATE TABLE IF NOT EXISTS Inventory_Change (
+    ProductID INTEGER PRIMARY KEY,
+    Seq INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_inventory_change_seq ON Inventory_Change (Seq);
+
+CREATE TRIGGER IF NOT EXISTS trg_product_warehouse_insert_change AFTER INSERT ON Product_Warehouse
+BEGIN
+    INSERT INTO Inventory_Change (ProductID, Seq)
+    SELECT NEW.ProductID, COALESCE(MAX(Seq), 0) + 1 FROM Inventory_Change WHERE true
+    ON CONFLICT (ProductID) DO UPDATE SET Seq = excluded.Seq;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_product_warehouse_update_change AFTER UPDATE ON Product_Warehouse
+BEGIN
+    INSERT INTO Inventory_Change (ProductID, Seq)
+    SELECT NEW.ProductID, COALESCE(MAX(Seq), 0) + 1 FROM Inventory_Change WHERE true
+    ON CONFLICT (ProductID) DO UPDATE SET Seq = excluded.Seq;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_product_warehouse_delete_change AFTER DELETE ON Product_Warehouse
+BEGIN
+    INSERT INTO Inventory_Change (ProductID, Seq)
+    SELECT OLD.ProductID, COALESCE(MAX(Seq), 0) + 1 FROM Inventory_Change WHERE true
+    ON CONFLICT (ProductID) DO UPDATE SET Seq = excluded.Seq;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_product_inventory_change AFTER UPDATE OF Name, CategoryID, StockQuantity ON Product
+BEGIN
+    INSERT INTO Inventory_Change (ProductID, Seq)
+    SELECT NEW.ProductID, COALESCE(MAX(Seq), 0) + 1 FROM Inventory_Change WHERE true
+    ON CONFLICT (ProductID) DO UPDATE SET Seq = excluded.Seq;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_product_delete_change AFTER DELETE ON Product
+BEGIN
+    INSERT INTO Inventory_Change (ProductID, Seq)
+    SELECT OLD.ProductID, COALESCE(MAX(Seq), 0) + 1 FROM Inventory_Change WHERE true
+    ON CONFLICT (ProductID) DO UPDATE SET Seq = excluded.Seq;
+END;
+
+
+-- Checkout holds: units are reserved until committed as an order, released
+-- or past ExpiresAt (see migrations/versions/d7a3f0b5e218)
+CREATE TABLE IF NOT EXISTS Stock_Reservation (
+    ReservationID TEXT PRIMARY KEY,
+    UserID INTEGER NOT NULL,
+    Status TEXT NOT NULL DEFAULT 'Held' CHECK(Status IN ('Held', 'Committed', 'Released', 'Expired')),
+    CreatedAt TEXT NOT NULL,
+    ExpiresAt TEXT NOT NULL,
+    OrderID INTEGER, -- Set once committed
+    FOREIGN KEY (UserID) REFERENCES User(UserID),
+    FOREIGN KEY (OrderID) REFERENCES "Order"(OrderID)
+);
+
+-- One row per product and warehouse held; WarehouseID is NULL for products
+-- not stocked per warehouse
+CREATE TABLE IF NOT EXISTS Stock_Reservation_Line (
+    LineID INTEGER PRIMARY KEY,
+    ReservationID TEXT NOT NULL,
+    ProductID INTEGER NOT NULL,
+    WarehouseID INTEGER,
+    Quantity INTEGER NOT NULL,
+    FOREIGN KEY (ReservationID) REFERENCES Stock_Reservation(ReservationID),
+    FOREIGN KEY (ProductID) REFERENCES Product(ProductID),
+    FOREIGN KEY (WarehouseID) REFERENCES Warehouse(WarehouseID)
+);
+
+CREATE INDEX IF NOT EXISTS ix_stock_reservation_status_expires ON Stock_Reservation (Status, ExpiresAt);
+CREATE INDEX IF NOT EXISTS ix_stock_reservation_line_reservation ON Stock_Reservation_Line (ReservationID);
+
+
+-- Indexes for the hot query paths (see migrations/versions/3f2a9c1d7b10)
+CREATE INDEX IF NOT EXISTS ix_product_warehouse_product ON Product_Warehouse (ProductID, WarehouseID, StockQuantity);
+CREATE INDEX IF NOT EXISTS ix_product_image_product ON Product_Image (ProductID, ImageURL);
+CREATE INDEX IF NOT EXISTS ix_order_product_product ON Order_Product (ProductID, OrderID, Quantity);
+CREATE INDEX IF NOT EXISTS ix_order_status_date ON "Order" (OrderStatus, OrderDate);
+CREATE INDEX IF NOT EXISTS ix_order_date ON "Order" (OrderDate);
+CREATE INDEX IF NOT EXISTS ix_inventory_log_timestamp ON Inventory_Log (Timestamp);
+CREATE INDEX IF NOT EXISTS ix_inventory_log_product_timestamp ON Inventory_Log (ProductID, Timestamp);
+CREATE INDEX IF NOT EXISTS ix_return_order ON Return (OrderID);
+CREATE INDEX IF NOT EXISTS ix_payment_order ON Payment (OrderID);
+CREATE INDEX IF NOT EXISTS ix_product_promotion_promotion ON Product_Promotion (PromotionID);
+CREATE INDEX IF NOT EXISTS ix_product_category_subcategory ON Product (CategoryID, SubCategoryID);
+CREATE INDEX IF NOT EXISTS ix_product_price ON Product (Price);
+CREATE INDEX IF NOT EXISTS ix_product_name ON Product (Name);
+CREATE INDEX IF NOT EXISTS ix_product_stock ON Product (StockQuantity);
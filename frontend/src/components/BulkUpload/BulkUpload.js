@@ -10,6 +10,7 @@ function BulkUpload({ onUpload }) {
   const [uploading, setUploading] = useState(false);
   const [error, setError] = useState(null);
   const [success, setSuccess] = useState(null);
+  const [progress, setProgress] = useState(null);
 
   const handleFileChange = (e) => {
     setFile(e.target.files[0]);
@@ -30,6 +31,7 @@ function BulkUpload({ onUpload }) {
       setUploading(true);
       setError(null);
       setSuccess(null);
+      setProgress(null);
 
       const response = await axios.post("http://127.0.0.1:5000/product/bulk-upload", formData, {
         headers: {
@@ -38,9 +40,27 @@ function BulkUpload({ onUpload }) {
         },
       });
 
-      if (response.status === 201) {
-        setSuccess("Bulk upload completed successfully.");
-        onUpload(); // Trigger parent component to refresh product list if needed
+      if (response.status === 202) {
+        // The import runs in the background; follow its progress
+        let job;
+        do {
+          await new Promise((resolve) => setTimeout(resolve, 1000));
+          ({ data: job } = await axios.get(`http://127.0.0.1:5000${response.data.status_url}`, {
+            headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+          }));
+          setProgress(job);
+        } while (job.status === 'queued' || job.status === 'running');
+
+        if (job.status === 'done') {
+          setSuccess(`Imported ${job.rows_imported} products.`);
+          if (job.rows_failed) {
+            const firstErrors = job.errors.slice(0, 3).map((e) => `row ${e.row}: ${e.error}`).join('; ');
+            setError(`${job.rows_failed} rows were skipped (${firstErrors}).`);
+          }
+          onUpload(); // Trigger parent component to refresh product list if needed
+        } else {
+          setError(`Import failed: ${job.message}`);
+        }
       } else {
         setError("Failed to upload file.");
       }
@@ -71,6 +91,12 @@ function BulkUpload({ onUpload }) {
           Upload
         </Button>
         {uploading && <LinearProgress sx={{ mt: 2 }} />}
+        {uploading && progress && (
+          <Typography variant="body2" sx={{ mt: 1 }}>
+            {progress.rows_processed} rows processed, {progress.rows_failed} failed
+            {progress.rows_per_second ? ` (${progress.rows_per_second} rows/s)` : ''}
+          </Typography>
+        )}
         {error && <Typography color="error" sx={{ mt: 2 }}>{error}</Typography>}
         {success && <Typography color="success" sx={{ mt: 2 }}>{success}</Typography>}
       </CardContent>
@@ -72,15 +72,42 @@ function OrderListPage() {
     }
   };
 
-  const handleGetInvoice = async (orderId) => {
-    console.log(`Fetching invoice for Order ID: ${orderId}`);
-    try {
-      const response = await axios.get(`http://localhost:5000/orders/${orderId}/invoice`, {
+  const waitForInvoiceJob = async (statusUrl) => {
+    // Poll the background render until the PDF is ready
+    for (let attempt = 0; attempt < 30; attempt++) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const { data } = await axios.get(`http://localhost:5000${statusUrl}`, {
         headers: {
           Authorization: `Bearer ${localStorage.getItem('token')}`,
         },
-        responseType: 'blob', // Ensure response is received as a Blob
       });
+      if (data.status === 'done') return true;
+      if (data.status === 'failed') {
+        console.error(`Invoice generation failed: ${data.error}`);
+        return false;
+      }
+    }
+    return false;
+  };
+
+  const handleGetInvoice = async (orderId) => {
+    console.log(`Fetching invoice for Order ID: ${orderId}`);
+    try {
+      const requestInvoice = () =>
+        axios.get(`http://localhost:5000/orders/${orderId}/invoice`, {
+          headers: {
+            Authorization: `Bearer ${localStorage.getItem('token')}`,
+          },
+          responseType: 'blob', // Ensure response is received as a Blob
+        });
+
+      let response = await requestInvoice();
+      if (response.status === 202) {
+        // The invoice is being rendered in the background
+        const job = JSON.parse(await response.data.text());
+        if (!(await waitForInvoiceJob(job.status_url))) return;
+        response = await requestInvoice();
+      }
   
       if (response.status === 200) {
         const url = window.URL.createObjectURL(new Blob([response.data]));
@@ -1,6 +1,6 @@
 // src/components/ProductList/ProductList.js
 import React, { useEffect, useState } from 'react';
-import { Typography, CircularProgress, List } from '@mui/material';
+import { Typography, CircularProgress, List, Button } from '@mui/material';
 import ProductItem from './ProductItem';
 import DeleteDialog from './DeleteDialog';
 import EditDialog from './EditDialog';
@@ -14,12 +14,15 @@ function ProductList() {
   const [openDeleteDialog, setOpenDeleteDialog] = useState(false);
   const [selectedProduct, setSelectedProduct] = useState(null);
   const [openEditDialog, setOpenEditDialog] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const loadProducts = async () => {
       try {
         const data = await fetchProducts();
         setProducts(data.products);
+        setNextCursor(data.next_cursor);
       } catch (err) {
         setError(err.message);
       } finally {
@@ -29,6 +32,22 @@ function ProductList() {
     loadProducts();
   }, []);
 
+  // Append the next page of products using the cursor from the last response
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+
+    setLoadingMore(true);
+    try {
+      const data = await fetchProducts({ cursor: nextCursor });
+      setProducts((prevProducts) => [...prevProducts, ...data.products]);
+      setNextCursor(data.next_cursor);
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleOpenDeleteDialog = (product) => {
     setSelectedProduct(product);
     setOpenDeleteDialog(true);
@@ -102,6 +121,11 @@ function ProductList() {
           />
         ))}
       </List>
+      {nextCursor && (
+        <Button variant="outlined" onClick={handleLoadMore} disabled={loadingMore}>
+          {loadingMore ? 'Loading...' : 'Load more'}
+        </Button>
+      )}
 
       {/* Delete Dialog */}
       <DeleteDialog
@@ -18,6 +18,7 @@ import {
 } from '@mui/material';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import { subscribeInventoryEvents } from '../utils/api';
 import InventoryTable from '../components/InventoryTable/InventoryTable';
 import InventoryNotification from '../components/InventoryNotification/InventoryNotification'; 
 import InventoryTurnoverChart from '../components/InventoryReport/InventoryTurnoverChart';
@@ -67,12 +68,30 @@ function InventoryDashboard() {
     };
     
 
+    // After the first load only products changed since the last cursor are fetched
+    let inventoryCursor = null;
     const fetchInventory = async () => {
       try {
         const response = await axios.get('http://127.0.0.1:5000/inventory/realtime-inventory', {
           headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
+          params: inventoryCursor === null ? {} : { since: inventoryCursor },
         });
-        setInventory(response.data);
+        inventoryCursor = response.headers['x-inventory-cursor'] ?? null;
+        if (response.headers['x-inventory-sync'] === 'delta') {
+          setInventory((current) => {
+            const next = { ...current };
+            Object.entries(response.data).forEach(([productId, product]) => {
+              if (product === null) {
+                delete next[productId];
+              } else {
+                next[productId] = product;
+              }
+            });
+            return next;
+          });
+        } else {
+          setInventory(response.data);
+        }
       } catch (err) {
         setError(err.message);
       }
@@ -93,15 +112,40 @@ function InventoryDashboard() {
       fetchAdminRoles(adminId);
     }
 
+    // Apply one pushed inventory change to the loaded snapshot
+    const applyInventoryEvent = (type, event) => {
+      if (type === 'resync') {
+        fetchInventory();
+        return;
+      }
+      setInventory((current) => {
+        const product = current[event.product_id];
+        if (!product) return current;
+        const warehouses = event.warehouse_id != null
+          ? product.warehouses.map((warehouse) => (
+            warehouse.warehouse_id === event.warehouse_id
+              ? { ...warehouse, stock_quantity: event.stock_level }
+              : warehouse
+          ))
+          : product.warehouses;
+        return {
+          ...current,
+          [event.product_id]: { ...product, warehouses, total_stock: event.product_stock },
+        };
+      });
+    };
+
     fetchInventory();
     fetchInventoryReport();
 
-    const intervalId = setInterval(() => {
-      fetchInventory();
-      fetchInventoryReport();
-    }, 10000);
+    // Stock changes are pushed; only the report is still polled
+    const unsubscribe = subscribeInventoryEvents(applyInventoryEvent);
+    const intervalId = setInterval(fetchInventoryReport, 10000);
 
-    return () => clearInterval(intervalId);
+    return () => {
+      unsubscribe();
+      clearInterval(intervalId);
+    };
   }, []);
 
   const handleLogout = () => {
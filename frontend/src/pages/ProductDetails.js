@@ -55,7 +55,7 @@ function ProductDetails() {
           {product.images && product.images.length > 0 ? (
             <Box sx={{ display: 'flex', flexDirection: 'column', gap: 1 }}>
               {product.images.map((image, index) => {
-                const imagePath = `/product/uploads/${image}`; // Updated to directly use the path string
+                const imagePath = `/product/uploads/${image}?variant=card`; // Resized copy sized for this column
                 console.log(`Rendering image at path: ${imagePath}`);
 
                 return (
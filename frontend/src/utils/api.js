@@ -14,8 +14,10 @@ const fetchWithAuth = (url, options = {}) => {
   };
 
 
-export const fetchProducts = async () => {
-    const response = await fetch('http://127.0.0.1:5000/product/all', {
+// Fetch one page of products; pass { cursor: data.next_cursor } for the next page
+export const fetchProducts = async (params = {}) => {
+    const query = new URLSearchParams(params).toString();
+    const response = await fetch(`http://127.0.0.1:5000/product/all${query ? `?${query}` : ''}`, {
       headers: { Authorization: `Bearer ${localStorage.getItem('token')}` },
     });
     if (!response.ok) {
@@ -64,4 +66,59 @@ export const updateProduct = async (productId, productData) => {
     }
     return response.json();
   };
-  
\ No newline at end of file
+  
+
+// Subscribe to the inventory Server-Sent Events feed. EventSource cannot send
+// the Authorization header, so the stream is read with fetch. onEvent gets
+// (type, data) for 'stock', 'low_stock' and 'resync' events; the stream
+// reconnects with Last-Event-ID until the returned function is called.
+export const subscribeInventoryEvents = (onEvent) => {
+    const controller = new AbortController();
+    let lastEventId = null;
+    let retry = 3000;
+
+    const handle = (block) => {
+      let type = 'message';
+      let data = '';
+      block.split('\n').forEach((line) => {
+        if (line.startsWith('id: ')) lastEventId = line.slice(4);
+        else if (line.startsWith('event: ')) type = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+        else if (line.startsWith('retry: ')) retry = parseInt(line.slice(7), 10);
+      });
+      if (data) onEvent(type, JSON.parse(data));
+    };
+
+    const connect = async () => {
+      while (!controller.signal.aborted) {
+        try {
+          const headers = { Authorization: `Bearer ${localStorage.getItem('token')}` };
+          if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+          const response = await fetch('http://127.0.0.1:5000/inventory/events', {
+            headers,
+            signal: controller.signal,
+          });
+          if (!response.ok) throw new Error('Failed to open inventory feed');
+
+          const reader = response.body.getReader();
+          const decoder = new TextDecoder();
+          let buffer = '';
+          for (;;) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const blocks = buffer.split('\n\n');
+            buffer = blocks.pop();
+            blocks.forEach(handle);
+          }
+        } catch (err) {
+          if (controller.signal.aborted) return;
+          console.error('Inventory feed error:', err);
+        }
+        await new Promise((resolve) => setTimeout(resolve, retry));
+      }
+    };
+
+    connect();
+    return () => controller.abort();
+  };
@@ -0,0 +1,47 @@
+"""add indexes for hot query paths
+
+Revision ID: 3f2a9c1d7b10
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+Administrator.Email (login) and Admin_Role.AdminID (role checks) are already
+served by the UNIQUE / PRIMARY KEY autoindexes, so they need nothing here.
+Run ``python check_query_plans.py`` after upgrading to confirm no filtered
+query still scans a whole table.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns). Trailing columns make the index covering for
+# the queries that only read those columns.
+INDEXES = [
+    ('ix_product_warehouse_product', 'Product_Warehouse', ['ProductID', 'WarehouseID', 'StockQuantity']),
+    ('ix_product_image_product', 'Product_Image', ['ProductID', 'ImageURL']),
+    ('ix_order_product_product', 'Order_Product', ['ProductID', 'OrderID', 'Quantity']),
+    ('ix_order_status_date', 'Order', ['OrderStatus', 'OrderDate']),
+    ('ix_order_date', 'Order', ['OrderDate']),
+    ('ix_inventory_log_timestamp', 'Inventory_Log', ['Timestamp']),
+    ('ix_inventory_log_product_timestamp', 'Inventory_Log', ['ProductID', 'Timestamp']),
+    ('ix_return_order', 'Return', ['OrderID']),
+    ('ix_payment_order', 'Payment', ['OrderID']),
+    ('ix_product_promotion_promotion', 'Product_Promotion', ['PromotionID']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
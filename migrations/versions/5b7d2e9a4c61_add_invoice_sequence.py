@@ -0,0 +1,38 @@
+"""add Sequence table for invoice numbering
+
+Revision ID: 5b7d2e9a4c61
+Revises: 8c4e1b2f6a35
+Create Date: 2026-10-18 12:00:00.000000
+
+Invoice numbers used to be derived from SELECT COUNT(*) FROM Invoice. The
+'invoice' row continues after the highest INV-<n> number already issued.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7d2e9a4c61'
+down_revision = '8c4e1b2f6a35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'Sequence',
+        sa.Column('Name', sa.Text(), primary_key=True),
+        sa.Column('NextValue', sa.Integer(), nullable=False),
+        if_not_exists=True
+    )
+    op.execute("""
+        INSERT OR IGNORE INTO Sequence (Name, NextValue)
+        SELECT 'invoice', COALESCE(MAX(CAST(SUBSTR(InvoiceNumber, 5) AS INTEGER)), 1000) + 1
+        FROM Invoice
+        WHERE InvoiceNumber LIKE 'INV-%'
+    """)
+
+
+def downgrade():
+    op.drop_table('Sequence', if_exists=True)
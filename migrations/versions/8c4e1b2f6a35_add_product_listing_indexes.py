@@ -0,0 +1,38 @@
+"""add indexes for product listing filters and sorts
+
+Revision ID: 8c4e1b2f6a35
+Revises: 3f2a9c1d7b10
+Create Date: 2026-10-18 10:00:00.000000
+
+/product/all pages by (sort column, ProductID). ProductID is the rowid, which
+every SQLite index already carries, so a single-column index per sort key is
+enough for the keyset seek.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e1b2f6a35'
+down_revision = '3f2a9c1d7b10'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_product_category_subcategory', 'Product', ['CategoryID', 'SubCategoryID']),
+    ('ix_product_price', 'Product', ['Price']),
+    ('ix_product_name', 'Product', ['Name']),
+    ('ix_product_stock', 'Product', ['StockQuantity']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,40 @@
+"""add Import_Job table for background CSV imports
+
+Revision ID: 9e3a7c5d1f28
+Revises: 5b7d2e9a4c61
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e3a7c5d1f28'
+down_revision = '5b7d2e9a4c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'Import_Job',
+        sa.Column('JobID', sa.Text(), primary_key=True),
+        sa.Column('Status', sa.Text(), nullable=False, server_default='queued'),
+        sa.Column('FileName', sa.Text()),
+        sa.Column('FilePath', sa.Text(), nullable=False),
+        sa.Column('RowsProcessed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('RowsImported', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('RowsFailed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('Errors', sa.Text()),
+        sa.Column('Message', sa.Text()),
+        sa.Column('CreatedAt', sa.Text(), nullable=False),
+        sa.Column('StartedAt', sa.Text()),
+        sa.Column('FinishedAt', sa.Text()),
+        sa.CheckConstraint("Status IN ('queued', 'running', 'done', 'failed')"),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('Import_Job', if_exists=True)
@@ -0,0 +1,27 @@
+"""add Product_Warehouse.LeadTimeDays for replenishment planning
+
+Revision ID: a83d6f1c2b47
+Revises: f5a0c3e8b214
+Create Date: 2026-10-18 20:00:00.000000
+
+NULL means the product uses REPLENISHMENT_LEAD_TIME_DAYS at that warehouse.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83d6f1c2b47'
+down_revision = 'f5a0c3e8b214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Product_Warehouse', sa.Column('LeadTimeDays', sa.Integer()))
+
+
+def downgrade():
+    with op.batch_alter_table('Product_Warehouse') as batch_op:
+        batch_op.drop_column('LeadTimeDays')
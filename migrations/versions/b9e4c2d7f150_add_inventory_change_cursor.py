@@ -0,0 +1,74 @@
+"""add Inventory_Change for delta syncs of the realtime inventory
+
+Revision ID: b9e4c2d7f150
+Revises: a83d6f1c2b47
+Create Date: 2026-10-18 22:00:00.000000
+
+Inventory_Change holds, per product, the sequence number of the last change
+to anything /inventory/realtime-inventory returns for it: its Product_Warehouse
+rows and its name, category and total stock. Triggers keep it current, so
+"?since=<cursor>" only has to read the products with a higher number.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e4c2d7f150'
+down_revision = 'a83d6f1c2b47'
+branch_labels = None
+depends_on = None
+
+
+# Next sequence number: writes are serialized, so MAX + 1 only ever grows
+RECORD_CHANGE = """
+    INSERT INTO Inventory_Change (ProductID, Seq)
+    SELECT {product}, COALESCE(MAX(Seq), 0) + 1 FROM Inventory_Change WHERE true
+    ON CONFLICT (ProductID) DO UPDATE SET Seq = excluded.Seq;
+"""
+
+TRIGGERS = [
+    ('trg_product_warehouse_insert_change', """
+    CREATE TRIGGER IF NOT EXISTS trg_product_warehouse_insert_change AFTER INSERT ON Product_Warehouse
+    BEGIN""" + RECORD_CHANGE.format(product="NEW.ProductID") + """END
+    """),
+    ('trg_product_warehouse_update_change', """
+    CREATE TRIGGER IF NOT EXISTS trg_product_warehouse_update_change AFTER UPDATE ON Product_Warehouse
+    BEGIN""" + RECORD_CHANGE.format(product="NEW.ProductID") + """END
+    """),
+    ('trg_product_warehouse_delete_change', """
+    CREATE TRIGGER IF NOT EXISTS trg_product_warehouse_delete_change AFTER DELETE ON Product_Warehouse
+    BEGIN""" + RECORD_CHANGE.format(product="OLD.ProductID") + """END
+    """),
+    ('trg_product_inventory_change', """
+    CREATE TRIGGER IF NOT EXISTS trg_product_inventory_change AFTER UPDATE OF Name, CategoryID, StockQuantity ON Product
+    BEGIN""" + RECORD_CHANGE.format(product="NEW.ProductID") + """END
+    """),
+    # Deleted products come back as null; their Product_Warehouse rows may stay
+    ('trg_product_delete_change', """
+    CREATE TRIGGER IF NOT EXISTS trg_product_delete_change AFTER DELETE ON Product
+    BEGIN""" + RECORD_CHANGE.format(product="OLD.ProductID") + """END
+    """),
+]
+
+
+def upgrade():
+    op.create_table(
+        'Inventory_Change',
+        sa.Column('ProductID', sa.Integer(), primary_key=True),
+        sa.Column('Seq', sa.Integer(), nullable=False),
+        if_not_exists=True
+    )
+    op.create_index('ix_inventory_change_seq', 'Inventory_Change', ['Seq'], if_not_exists=True)
+    # Products already stocked start at 0, the cursor of an empty history
+    op.execute("INSERT OR IGNORE INTO Inventory_Change (ProductID, Seq) SELECT DISTINCT ProductID, 0 FROM Product_Warehouse")
+    for name, statement in TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade():
+    for name, statement in reversed(TRIGGERS):
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_index('ix_inventory_change_seq', table_name='Inventory_Change', if_exists=True)
+    op.drop_table('Inventory_Change', if_exists=True)
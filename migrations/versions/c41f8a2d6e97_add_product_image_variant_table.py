@@ -0,0 +1,36 @@
+"""add Product_Image_Variant table for resized product images
+
+Revision ID: c41f8a2d6e97
+Revises: 9e3a7c5d1f28
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f8a2d6e97'
+down_revision = '9e3a7c5d1f28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'Product_Image_Variant',
+        sa.Column('VariantID', sa.Integer(), primary_key=True),
+        sa.Column('ImageID', sa.Integer(), sa.ForeignKey('Product_Image.ImageID'), nullable=False),
+        sa.Column('Variant', sa.Text(), nullable=False),
+        sa.Column('Format', sa.Text(), nullable=False),
+        sa.Column('Width', sa.Integer(), nullable=False),
+        sa.Column('Height', sa.Integer(), nullable=False),
+        sa.Column('FilePath', sa.Text(), nullable=False),
+        sa.Column('FileSize', sa.Integer(), nullable=False),
+        sa.UniqueConstraint('ImageID', 'Variant', 'Format'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('Product_Image_Variant', if_exists=True)
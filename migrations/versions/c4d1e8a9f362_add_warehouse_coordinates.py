@@ -0,0 +1,61 @@
+"""add Warehouse.Latitude and Longitude for nearest-warehouse allocation
+
+Revision ID: c4d1e8a9f362
+Revises: b9e4c2d7f150
+Create Date: 2026-10-18 23:00:00.000000
+
+Warehouses without coordinates are ranked after the others when orders
+are allocated with the "nearest" strategy.
+
+Allocation takes stock from Product_Warehouse and Product together, but
+returns and replacements used to change only Product.StockQuantity, so the
+two drifted apart. For products stocked per warehouse the warehouse rows
+are taken as the truth and the product total is reset to their sum, with a
+'Stock Reconciliation' Inventory_Log row for each product that changed.
+Downgrading keeps the reconciled totals.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d1e8a9f362'
+down_revision = 'b9e4c2d7f150'
+branch_labels = None
+depends_on = None
+
+
+# Warehouse totals that differ from Product.StockQuantity; the log rows are
+# written first, while the old total is still there to compute the change
+WAREHOUSE_TOTALS = """
+    SELECT ProductID, SUM(StockQuantity) AS Total FROM Product_Warehouse GROUP BY ProductID
+"""
+
+RECONCILE = [
+    """
+    INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp, StockLevel)
+    SELECT p.ProductID, w.Total - p.StockQuantity, 'Stock Reconciliation', datetime('now'), w.Total
+    FROM Product p
+    JOIN (""" + WAREHOUSE_TOTALS + """) w ON w.ProductID = p.ProductID
+    WHERE p.StockQuantity != w.Total
+    """,
+    """
+    UPDATE Product SET StockQuantity = w.Total
+    FROM (""" + WAREHOUSE_TOTALS + """) w
+    WHERE w.ProductID = Product.ProductID AND Product.StockQuantity != w.Total
+    """,
+]
+
+
+def upgrade():
+    op.add_column('Warehouse', sa.Column('Latitude', sa.Float()))
+    op.add_column('Warehouse', sa.Column('Longitude', sa.Float()))
+    for statement in RECONCILE:
+        op.execute(statement)
+
+
+def downgrade():
+    with op.batch_alter_table('Warehouse') as batch_op:
+        batch_op.drop_column('Longitude')
+        batch_op.drop_column('Latitude')
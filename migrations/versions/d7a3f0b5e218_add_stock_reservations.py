@@ -0,0 +1,58 @@
+"""add stock reservations (checkout holds with an expiry)
+
+Revision ID: d7a3f0b5e218
+Revises: c4d1e8a9f362
+Create Date: 2026-10-19 00:00:00.000000
+
+ReservedQuantity on Product and Product_Warehouse counts units held by
+reservations that are neither committed nor released; only
+StockQuantity - ReservedQuantity can be ordered or reserved.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3f0b5e218'
+down_revision = 'c4d1e8a9f362'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Product', sa.Column('ReservedQuantity', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('Product_Warehouse', sa.Column('ReservedQuantity', sa.Integer(), nullable=False, server_default='0'))
+    op.create_table(
+        'Stock_Reservation',
+        sa.Column('ReservationID', sa.Text(), primary_key=True),
+        sa.Column('UserID', sa.Integer(), sa.ForeignKey('User.UserID'), nullable=False),
+        sa.Column('Status', sa.Text(), nullable=False, server_default='Held'),
+        sa.Column('CreatedAt', sa.Text(), nullable=False),
+        sa.Column('ExpiresAt', sa.Text(), nullable=False),
+        sa.Column('OrderID', sa.Integer(), sa.ForeignKey('Order.OrderID')),
+        sa.CheckConstraint("Status IN ('Held', 'Committed', 'Released', 'Expired')"),
+        if_not_exists=True
+    )
+    op.create_table(
+        'Stock_Reservation_Line',
+        sa.Column('LineID', sa.Integer(), primary_key=True),
+        sa.Column('ReservationID', sa.Text(), sa.ForeignKey('Stock_Reservation.ReservationID'), nullable=False),
+        sa.Column('ProductID', sa.Integer(), sa.ForeignKey('Product.ProductID'), nullable=False),
+        sa.Column('WarehouseID', sa.Integer(), sa.ForeignKey('Warehouse.WarehouseID')),
+        sa.Column('Quantity', sa.Integer(), nullable=False),
+        if_not_exists=True
+    )
+    op.create_index('ix_stock_reservation_status_expires', 'Stock_Reservation', ['Status', 'ExpiresAt'], if_not_exists=True)
+    op.create_index('ix_stock_reservation_line_reservation', 'Stock_Reservation_Line', ['ReservationID'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_stock_reservation_line_reservation', table_name='Stock_Reservation_Line', if_exists=True)
+    op.drop_index('ix_stock_reservation_status_expires', table_name='Stock_Reservation', if_exists=True)
+    op.drop_table('Stock_Reservation_Line', if_exists=True)
+    op.drop_table('Stock_Reservation', if_exists=True)
+    # Plain DROP COLUMN (SQLite 3.35+): a batch rebuild would drop the
+    # triggers on both tables
+    op.execute('ALTER TABLE Product_Warehouse DROP COLUMN ReservedQuantity')
+    op.execute('ALTER TABLE Product DROP COLUMN ReservedQuantity')
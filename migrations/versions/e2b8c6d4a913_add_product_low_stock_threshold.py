@@ -0,0 +1,27 @@
+"""add Product.LowStockThreshold for per-product low-stock alerts
+
+Revision ID: e2b8c6d4a913
+Revises: d7a3f0b5e218
+Create Date: 2026-10-19 01:00:00.000000
+
+NULL means the product is alerted below LOW_STOCK_THRESHOLD.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b8c6d4a913'
+down_revision = 'd7a3f0b5e218'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Product', sa.Column('LowStockThreshold', sa.Integer()))
+
+
+def downgrade():
+    # Plain DROP COLUMN (SQLite 3.35+) keeps the triggers on Product
+    op.execute('ALTER TABLE Product DROP COLUMN LowStockThreshold')
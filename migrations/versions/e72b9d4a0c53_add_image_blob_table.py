@@ -0,0 +1,32 @@
+"""add Image_Blob table for content-addressed product images
+
+Revision ID: e72b9d4a0c53
+Revises: c41f8a2d6e97
+Create Date: 2026-10-18 16:00:00.000000
+
+Images uploaded before this change stay where they are (products/<id>/...)
+and are not reference counted.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e72b9d4a0c53'
+down_revision = 'c41f8a2d6e97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'Image_Blob',
+        sa.Column('FilePath', sa.Text(), primary_key=True),
+        sa.Column('RefCount', sa.Integer(), nullable=False, server_default='0'),
+        if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_table('Image_Blob', if_exists=True)
@@ -0,0 +1,73 @@
+"""rename product image variants to include the original's extension
+
+Revision ID: f3c9a1e6d820
+Revises: e2b8c6d4a913
+Create Date: 2026-10-19 02:00:00.000000
+
+Variants used to be named <stem>_<variant>.<format>, so stored files that
+only differ by extension shared them. Each variant file is copied to
+<stem>_<ext>_<variant>.<format> for every image that uses it, and the old
+names are removed once nothing points at them. Downgrading keeps the new
+names; the old code serves originals until variants are rendered again.
+
+"""
+import os
+import shutil
+
+from alembic import op
+from flask import current_app
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c9a1e6d820'
+down_revision = 'e2b8c6d4a913'
+branch_labels = None
+depends_on = None
+
+
+def variant_path(image_path, variant, image_format):
+    # Frozen copy of app.utils.image_processing.variant_path at this revision
+    folder, filename = os.path.split(image_path)
+    stem, extension = os.path.splitext(filename)
+    return os.path.join(folder, 'variants', f"{stem}_{extension.lstrip('.')}_{variant}.{image_format}")
+
+
+def upgrade():
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("""
+        SELECT v.VariantID, v.Variant, v.Format, v.FilePath, pi.ImageURL
+        FROM Product_Image_Variant v
+        JOIN Product_Image pi ON pi.ImageID = v.ImageID
+    """)).fetchall()
+
+    old_paths = set()
+    for variant_id, variant, image_format, file_path, image_url in rows:
+        new_path = variant_path(image_url, variant, image_format)
+        if new_path == file_path:
+            continue
+        source = os.path.join(upload_folder, file_path)
+        target = os.path.join(upload_folder, new_path)
+        if os.path.isfile(source) and not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+        bind.execute(
+            sa.text("UPDATE Product_Image_Variant SET FilePath = :path WHERE VariantID = :id"),
+            {"path": new_path, "id": variant_id}
+        )
+        old_paths.add(file_path)
+
+    still_used = {
+        file_path for (file_path,) in
+        bind.execute(sa.text("SELECT DISTINCT FilePath FROM Product_Image_Variant")).fetchall()
+    }
+    for file_path in old_paths - still_used:
+        try:
+            os.remove(os.path.join(upload_folder, file_path))
+        except FileNotFoundError:
+            pass
+
+
+def downgrade():
+    pass
@@ -0,0 +1,152 @@
+"""add summary tables for the inventory report, kept current by triggers
+
+Revision ID: f5a0c3e8b214
+Revises: e72b9d4a0c53
+Create Date: 2026-10-18 17:00:00.000000
+
+Inventory_Monthly_Stats holds per-month COGS of delivered orders and the sum
+and count of inventory values logged that month; Product_Sales_Monthly holds
+delivered quantity and COGS per product and month. Triggers update both in
+the same transaction as the Inventory_Log insert or order status change, so
+no code path can forget them. Cost prices are taken when the event happens;
+a product without one counts at 0.
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5a0c3e8b214'
+down_revision = 'e72b9d4a0c53'
+branch_labels = None
+depends_on = None
+
+
+TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS Inventory_Monthly_Stats (
+        Month TEXT PRIMARY KEY,
+        COGS REAL NOT NULL DEFAULT 0,
+        InventoryValueSum REAL NOT NULL DEFAULT 0,
+        InventoryLogCount INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS Product_Sales_Monthly (
+        ProductID INTEGER NOT NULL,
+        Month TEXT NOT NULL,
+        QuantitySold INTEGER NOT NULL DEFAULT 0,
+        COGS REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (ProductID, Month)
+    )
+    """,
+]
+
+# (index name, table, columns). The report's fast path looks up the months
+# with sales; QuantitySold makes the index covering for it.
+INDEXES = [
+    ('ix_product_sales_monthly_month', 'Product_Sales_Monthly', ['Month', 'QuantitySold']),
+]
+
+# Adds (sign = +1) or removes (sign = -1) the lines of one order
+ORDER_SALES = """
+    INSERT INTO Product_Sales_Monthly (ProductID, Month, QuantitySold, COGS)
+    SELECT op.ProductID, strftime('%Y-%m', o.OrderDate), {sign} * op.Quantity, {sign} * op.Quantity * COALESCE(p.CostPrice, 0)
+    FROM Order_Product op
+    JOIN Product p ON p.ProductID = op.ProductID
+    JOIN "Order" o ON o.OrderID = op.OrderID
+    WHERE {where}
+    ON CONFLICT (ProductID, Month) DO UPDATE SET
+        QuantitySold = QuantitySold + excluded.QuantitySold,
+        COGS = COGS + excluded.COGS;
+    INSERT INTO Inventory_Monthly_Stats (Month, COGS)
+    SELECT strftime('%Y-%m', o.OrderDate), {sign} * SUM(op.Quantity * COALESCE(p.CostPrice, 0))
+    FROM Order_Product op
+    JOIN Product p ON p.ProductID = op.ProductID
+    JOIN "Order" o ON o.OrderID = op.OrderID
+    WHERE {where}
+    GROUP BY strftime('%Y-%m', o.OrderDate)
+    ON CONFLICT (Month) DO UPDATE SET COGS = COGS + excluded.COGS;
+"""
+
+TRIGGERS = [
+    ('trg_inventory_log_stats', """
+    CREATE TRIGGER IF NOT EXISTS trg_inventory_log_stats AFTER INSERT ON Inventory_Log
+    BEGIN
+        INSERT INTO Inventory_Monthly_Stats (Month, InventoryValueSum, InventoryLogCount)
+        SELECT strftime('%Y-%m', NEW.Timestamp), NEW.StockLevel * COALESCE(p.CostPrice, 0), 1
+        FROM Product p
+        WHERE p.ProductID = NEW.ProductID
+        ON CONFLICT (Month) DO UPDATE SET
+            InventoryValueSum = InventoryValueSum + excluded.InventoryValueSum,
+            InventoryLogCount = InventoryLogCount + 1;
+    END
+    """),
+    ('trg_order_delivered_stats', """
+    CREATE TRIGGER IF NOT EXISTS trg_order_delivered_stats AFTER UPDATE OF OrderStatus ON "Order"
+    WHEN NEW.OrderStatus = 'Delivered' AND OLD.OrderStatus != 'Delivered'
+    BEGIN
+    """ + ORDER_SALES.format(sign=1, where="op.OrderID = NEW.OrderID") + """
+    END
+    """),
+    ('trg_order_undelivered_stats', """
+    CREATE TRIGGER IF NOT EXISTS trg_order_undelivered_stats AFTER UPDATE OF OrderStatus ON "Order"
+    WHEN OLD.OrderStatus = 'Delivered' AND NEW.OrderStatus != 'Delivered'
+    BEGIN
+    """ + ORDER_SALES.format(sign=-1, where="op.OrderID = NEW.OrderID") + """
+    END
+    """),
+    ('trg_delivered_order_line_stats', """
+    CREATE TRIGGER IF NOT EXISTS trg_delivered_order_line_stats AFTER INSERT ON Order_Product
+    WHEN (SELECT OrderStatus FROM "Order" WHERE OrderID = NEW.OrderID) = 'Delivered'
+    BEGIN
+    """ + ORDER_SALES.format(sign=1, where="op.OrderID = NEW.OrderID AND op.ProductID = NEW.ProductID") + """
+    END
+    """),
+]
+
+BACKFILL = [
+    """
+    INSERT INTO Product_Sales_Monthly (ProductID, Month, QuantitySold, COGS)
+    SELECT op.ProductID, strftime('%Y-%m', o.OrderDate), SUM(op.Quantity), SUM(op.Quantity * COALESCE(p.CostPrice, 0))
+    FROM Order_Product op
+    JOIN Product p ON p.ProductID = op.ProductID
+    JOIN "Order" o ON o.OrderID = op.OrderID
+    WHERE o.OrderStatus = 'Delivered'
+    GROUP BY op.ProductID, strftime('%Y-%m', o.OrderDate)
+    """,
+    """
+    INSERT INTO Inventory_Monthly_Stats (Month, InventoryValueSum, InventoryLogCount)
+    SELECT strftime('%Y-%m', il.Timestamp), SUM(il.StockLevel * COALESCE(p.CostPrice, 0)), COUNT(*)
+    FROM Inventory_Log il
+    JOIN Product p ON p.ProductID = il.ProductID
+    GROUP BY strftime('%Y-%m', il.Timestamp)
+    """,
+    """
+    INSERT INTO Inventory_Monthly_Stats (Month, COGS)
+    SELECT Month, SUM(COGS) FROM Product_Sales_Monthly WHERE true GROUP BY Month
+    ON CONFLICT (Month) DO UPDATE SET COGS = excluded.COGS
+    """,
+]
+
+
+def upgrade():
+    for statement in TABLES:
+        op.execute(statement)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    op.execute("DELETE FROM Product_Sales_Monthly")
+    op.execute("DELETE FROM Inventory_Monthly_Stats")
+    for statement in BACKFILL:
+        op.execute(statement)
+    for name, statement in TRIGGERS:
+        op.execute(statement)
+
+
+def downgrade():
+    for name, statement in reversed(TRIGGERS):
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+    op.execute("DROP TABLE IF EXISTS Product_Sales_Monthly")
+    op.execute("DROP TABLE IF EXISTS Inventory_Monthly_Stats")
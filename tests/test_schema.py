@@ -0,0 +1,94 @@
+"""db.sql builds a working schema and its summary triggers keep the report tables current."""
+import os
+import sqlite3
+
+import pytest
+
+from db import split_sql_statements
+
+SCHEMA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db.sql')
+
+
+def build_schema():
+    """A fresh in-memory database built from db.sql the way setup_database does."""
+    conn = sqlite3.connect(':memory:')
+    with open(SCHEMA, 'r') as file:
+        for statement in split_sql_statements(file.read()):
+            if statement.strip(' \n;'):
+                conn.execute(statement)
+    return conn
+
+
+@pytest.fixture
+def conn():
+    conn = build_schema()
+    conn.execute("INSERT INTO User (UserID, UserType) VALUES (1, 'Customer')")
+    conn.execute(
+        "INSERT INTO Product (ProductID, Name, Price, CostPrice, StockQuantity) VALUES (1, 'Mat', 30.0, 12.5, 100)"
+    )
+    conn.execute(
+        "INSERT INTO \"Order\" (OrderID, OrderDate, OrderStatus, TotalAmount, PaymentStatus, UserID) "
+        "VALUES (1, '2026-03-14 10:00:00', 'Pending', 90.0, 'Paid', 1)"
+    )
+    conn.execute("INSERT INTO Order_Product (OrderID, ProductID, Quantity) VALUES (1, 1, 3)")
+    yield conn
+    conn.close()
+
+
+def test_every_statement_applies():
+    conn = build_schema()
+    triggers = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    assert {'trg_inventory_log_stats', 'trg_order_delivered_stats', 'trg_order_undelivered_stats',
+            'trg_delivered_order_line_stats'} <= triggers
+
+
+def test_inventory_log_updates_monthly_value(conn):
+    conn.execute(
+        "INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp, StockLevel) "
+        "VALUES (1, -3, 'Order Created', '2026-03-14 10:00:00', 97)"
+    )
+    row = conn.execute(
+        "SELECT InventoryValueSum, InventoryLogCount FROM Inventory_Monthly_Stats WHERE Month = '2026-03'"
+    ).fetchone()
+    assert row == (97 * 12.5, 1)
+
+
+def test_delivery_records_sales_and_undelivery_reverses_them(conn):
+    conn.execute("UPDATE \"Order\" SET OrderStatus = 'Delivered' WHERE OrderID = 1")
+    assert conn.execute(
+        "SELECT QuantitySold, COGS FROM Product_Sales_Monthly WHERE ProductID = 1 AND Month = '2026-03'"
+    ).fetchone() == (3, 3 * 12.5)
+    assert conn.execute("SELECT COGS FROM Inventory_Monthly_Stats WHERE Month = '2026-03'").fetchone() == (3 * 12.5,)
+
+    # A line added to a delivered order counts straight away
+    conn.execute("INSERT INTO Product (ProductID, Name, Price, CostPrice, StockQuantity) VALUES (2, 'Block', 10.0, 4.0, 50)")
+    conn.execute("INSERT INTO Order_Product (OrderID, ProductID, Quantity) VALUES (1, 2, 2)")
+    assert conn.execute("SELECT COGS FROM Inventory_Monthly_Stats WHERE Month = '2026-03'").fetchone() == (3 * 12.5 + 8.0,)
+
+    conn.execute("UPDATE \"Order\" SET OrderStatus = 'Shipped' WHERE OrderID = 1")
+    assert conn.execute("SELECT SUM(QuantitySold), SUM(COGS) FROM Product_Sales_Monthly").fetchone() == (0, 0)
+    assert conn.execute("SELECT COGS FROM Inventory_Monthly_Stats WHERE Month = '2026-03'").fetchone() == (0,)
+
+
+def test_product_without_cost_price_counts_at_zero(conn):
+    # add_product and the CSV import do not set CostPrice
+    conn.execute("INSERT INTO Product (ProductID, Name, Price, StockQuantity) VALUES (3, 'Strap', 8.0, 20)")
+    conn.execute(
+        "INSERT INTO Inventory_Log (ProductID, ChangeAmount, ChangeType, Timestamp, StockLevel) "
+        "VALUES (3, -2, 'Order Created', '2026-03-14 10:00:00', 18)"
+    )
+    conn.execute("INSERT INTO Order_Product (OrderID, ProductID, Quantity) VALUES (1, 3, 2)")
+    conn.execute("UPDATE \"Order\" SET OrderStatus = 'Delivered' WHERE OrderID = 1")
+
+    assert conn.execute(
+        "SELECT QuantitySold, COGS FROM Product_Sales_Monthly WHERE ProductID = 3 AND Month = '2026-03'"
+    ).fetchone() == (2, 0)
+    assert conn.execute(
+        "SELECT COGS, InventoryValueSum, InventoryLogCount FROM Inventory_Monthly_Stats WHERE Month = '2026-03'"
+    ).fetchone() == (3 * 12.5, 0, 1)
+
+
+def test_deleting_a_product_advances_the_inventory_cursor(conn):
+    before = conn.execute("SELECT COALESCE(MAX(Seq), 0) FROM Inventory_Change").fetchone()[0]
+    conn.execute("DELETE FROM Product WHERE ProductID = 1")
+    assert conn.execute("SELECT ProductID, Seq FROM Inventory_Change ORDER BY Seq DESC LIMIT 1").fetchone() == (1, before + 1)